@@ -0,0 +1,105 @@
+"""
+Configurações da aplicação
+Valores lidos de variáveis de ambiente, com padrões para o container
+"""
+
+import os
+
+
+def _int_env(nome: str, padrao: int) -> int:
+    valor = os.getenv(nome)
+    if valor is None or valor.strip() == "":
+        return padrao
+    return int(valor)
+
+
+def _bool_env(nome: str, padrao: bool) -> bool:
+    valor = os.getenv(nome)
+    if valor is None or valor.strip() == "":
+        return padrao
+    return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+
+
+# Diretório onde os PDFs gerados ficam disponíveis para download
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "/tmp/propostas")
+
+# Executor de renderização: "processo" (pool de processos), "thread" ou "inline"
+RENDER_EXECUTOR = os.getenv("RENDER_EXECUTOR", "processo").lower()
+
+# Quantidade de workers do pool (0 = um por núcleo)
+RENDER_WORKERS = _int_env("RENDER_WORKERS", 0) or (os.cpu_count() or 1)
+
+# Renderizações aguardando um worker antes de novas requisições esperarem na fila
+RENDER_MAX_PENDENTES = _int_env("RENDER_MAX_PENDENTES", 0) or RENDER_WORKERS * 4
+
+# Método de criação dos processos do pool ("spawn", "forkserver" ou "fork")
+RENDER_MP_START = os.getenv("RENDER_MP_START", "spawn")
+
+# Renderiza gráficos e PDF em buffers, sem arquivos temporários em disco
+RENDER_EM_MEMORIA = _bool_env("RENDER_EM_MEMORIA", True)
+
+# Cache de respostas para payloads idênticos (0 itens desativa)
+CACHE_RESULTADOS_MAX_ITENS = _int_env("CACHE_RESULTADOS_MAX_ITENS", 256)
+CACHE_RESULTADOS_MAX_MB = _int_env("CACHE_RESULTADOS_MAX_MB", 256)
+
+# Cache do gráfico de produção nos workers; GRAFICO_CACHE_DIR vazio desativa o spill em disco
+GRAFICO_CACHE_MAX_ITENS = _int_env("GRAFICO_CACHE_MAX_ITENS", 64)
+GRAFICO_CACHE_DIR = os.getenv("GRAFICO_CACHE_DIR", "")
+GRAFICO_CACHE_DISCO_MAX_MB = _int_env("GRAFICO_CACHE_DISCO_MAX_MB", 256)
+
+# Mantém a figura matplotlib do gráfico de produção montada no worker e troca apenas os dados
+GRAFICO_FIGURA_REUTILIZAVEL = _bool_env("GRAFICO_FIGURA_REUTILIZAVEL", True)
+
+# Tabela de retorno: "vetorial" (Table nativa do reportlab) ou "imagem" (PNG via matplotlib)
+TABELA_RETORNO_MODO = os.getenv("TABELA_RETORNO_MODO", "vetorial").lower()
+
+# Backend padrão do gráfico de produção: "reportlab" (vetorial) ou "matplotlib" (PNG)
+GRAFICO_BACKEND = os.getenv("GRAFICO_BACKEND", "reportlab").lower()
+
+# Perfil de saída padrão: "padrao", "email", "impressao" ou "arquivo" (ver app/services/perfis_saida.py)
+PERFIL_SAIDA = os.getenv("PERFIL_SAIDA", "padrao").lower()
+
+# Templates de proposta (JSON) e template usado quando a requisição não escolhe outro
+TEMPLATES_DIR = os.getenv("TEMPLATES_DIR", os.path.join(os.path.dirname(__file__), "templates"))
+TEMPLATE_PADRAO = os.getenv("TEMPLATE_PADRAO", "level5")
+
+# Monta o PDF mesclando (pypdf) trechos estáticos pré-renderizados na inicialização do worker
+MONTAGEM_PAGINAS = _bool_env("MONTAGEM_PAGINAS", False)
+
+# Lote de propostas: itens por requisição e renderizações simultâneas por lote
+LOTE_MAX_ITENS = _int_env("LOTE_MAX_ITENS", 1000)
+LOTE_CONCORRENCIA = _int_env("LOTE_CONCORRENCIA", 0) or RENDER_WORKERS
+
+# Jobs assíncronos: capacidade da fila, renderizações simultâneas e retenção dos resultados
+JOBS_FILA_MAX = _int_env("JOBS_FILA_MAX", 0) or RENDER_WORKERS * 16
+JOBS_CONSUMIDORES = _int_env("JOBS_CONSUMIDORES", 0) or RENDER_WORKERS
+JOBS_RETENCAO_SEGUNDOS = _int_env("JOBS_RETENCAO_SEGUNDOS", 600)
+# Tempo máximo de long-poll em GET /api/v1/jobs/{id}
+JOBS_AGUARDAR_MAX_SEGUNDOS = _int_env("JOBS_AGUARDAR_MAX_SEGUNDOS", 30)
+
+# Armazenamento dos PDFs para download: tamanho total, TTL desde o último download e limpeza
+ARMAZENAMENTO_MAX_MB = _int_env("ARMAZENAMENTO_MAX_MB", 1024)
+ARMAZENAMENTO_TTL_HORAS = _int_env("ARMAZENAMENTO_TTL_HORAS", 168)
+ARMAZENAMENTO_INTERVALO_LIMPEZA = _int_env("ARMAZENAMENTO_INTERVALO_LIMPEZA", 60)
+# Cache-Control dos downloads: segundos que clientes e proxies reutilizam o
+# arquivo sem revalidar (0 = revalida sempre, via ETag)
+DOWNLOAD_CACHE_MAX_AGE = _int_env("DOWNLOAD_CACHE_MAX_AGE", 31536000)
+
+# Variantes avaliadas por requisição em /api/v1/calculos/fluxo-caixa
+CALCULOS_MAX_VARIANTES = _int_env("CALCULOS_MAX_VARIANTES", 10000)
+
+# Cenários por simulação de Monte Carlo (endpoint e análise de sensibilidade do PDF)
+SIMULACAO_MAX_CENARIOS = _int_env("SIMULACAO_MAX_CENARIOS", 100000)
+
+# Token de administrador (header X-Admin-Token) exigido pelo perfilamento de
+# requisições; vazio desativa o recurso
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Intervalo entre amostras do perfil por amostragem (milissegundos)
+PERFIL_INTERVALO_MS = _int_env("PERFIL_INTERVALO_MS", 1)
+
+# Servidor prefork (python -m app.servidor): processos HTTP, reciclagem por
+# requisições atendidas ou memória própria (0 desativa) e prazo de encerramento
+SERVIDOR_WORKERS = _int_env("SERVIDOR_WORKERS", 0) or (os.cpu_count() or 1)
+SERVIDOR_MAX_REQUISICOES = _int_env("SERVIDOR_MAX_REQUISICOES", 0)
+SERVIDOR_MAX_MEMORIA_MB = _int_env("SERVIDOR_MAX_MEMORIA_MB", 0)
+SERVIDOR_TIMEOUT_ENCERRAMENTO = _int_env("SERVIDOR_TIMEOUT_ENCERRAMENTO", 30)
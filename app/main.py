@@ -5,22 +5,159 @@ Level5 Engenharia Elétrica
 Porta: 3493
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
 import base64
+import hmac
 import os
-import uuid
+import time
+import numpy as np
 from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from urllib.parse import quote
+
+from app import config
+from app.models.proposta import (
+    AnaliseSensibilidade,
+    JobResponse,
+    ProjecaoRequest,
+    PropostaRequest,
+    PropostaResponse,
+    SimulacaoRequest,
+    AnaliseRequest,
+)
+from app.services.armazenamento import ArmazenamentoPropostas
+from app.services.calculos import CalculoService
+from app.services.download import (
+    IntervaloInvalido,
+    cabecalhos_cache,
+    intervalo_solicitado,
+    ler_intervalo,
+    nao_modificado,
+)
+from app.services.cache_resultados import CacheResultados, chave_requisicao
+from app.services.executor import ExecutorRenderizacao
+from app.services.jobs import FilaCheia, FilaMemoria, GerenciadorJobs, Job
+from app.services.lote import gerar_lote_zip
+from app.services.metricas import LIMITES_BYTES, MiddlewareMetricas, RegistroMetricas
+from app.services.perfil import MODOS_PERFIL
+from app.services.renderizacao import (
+    OpcoesRenderizacao,
+    ResultadoRenderizacao,
+    renderizar_proposta,
+    revisar_proposta,
+)
+from app.services.revisao import (
+    RevisaoIndisponivel,
+    aplicar_alteracoes,
+    carregar_estado,
+    nome_estado,
+    proposta_id as id_proposta,
+)
+from app.services.templates import TemplateInvalido, listar_templates, obter_template
+
+OUTPUT_DIR = config.OUTPUT_DIR
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+armazenamento = ArmazenamentoPropostas(
+    raiz=OUTPUT_DIR,
+    max_bytes=config.ARMAZENAMENTO_MAX_MB * 1024 * 1024,
+    ttl_segundos=config.ARMAZENAMENTO_TTL_HORAS * 3600,
+    intervalo_limpeza=config.ARMAZENAMENTO_INTERVALO_LIMPEZA
+)
+
+executor = ExecutorRenderizacao(
+    modo=config.RENDER_EXECUTOR,
+    workers=config.RENDER_WORKERS,
+    max_pendentes=config.RENDER_MAX_PENDENTES,
+    mp_start=config.RENDER_MP_START
+)
+
+cache_resultados = CacheResultados(
+    max_itens=config.CACHE_RESULTADOS_MAX_ITENS,
+    max_bytes=config.CACHE_RESULTADOS_MAX_MB * 1024 * 1024,
+    tamanho=lambda resultado: len(resultado.pdf_bytes or b"")
+)
+
+calculo_service = CalculoService()
+
+# Somatório dos contadores do cache de gráficos reportados pelos workers
+estatisticas_cache_graficos = {"hits": 0, "misses": 0}
+
+
+async def _processar_job(dados: Dict[str, Any]) -> ResultadoRenderizacao:
+    return await _gerar_resultado(dados["request"], dados["opcoes"])
+
+
+jobs = GerenciadorJobs(
+    fila=FilaMemoria(capacidade=config.JOBS_FILA_MAX),
+    processar=_processar_job,
+    consumidores=config.JOBS_CONSUMIDORES,
+    retencao_segundos=config.JOBS_RETENCAO_SEGUNDOS
+)
+
+metricas = RegistroMetricas()
+metricas_requisicoes = metricas.contador(
+    "http_requisicoes_total", "Requisições HTTP por método, rota e status", ("metodo", "rota", "status")
+)
+metricas_duracao = metricas.histograma(
+    "http_requisicao_duracao_segundos", "Duração das requisições HTTP por rota", ("rota",)
+)
+metricas_em_andamento = metricas.gauge("http_requisicoes_em_andamento", "Requisições HTTP em andamento")
+metricas_estagios = metricas.histograma(
+    "proposta_estagio_duracao_segundos",
+    "Duração de cada estágio da geração de propostas (validacao, calculos, grafico_producao, "
+    "tabela_retorno, sensibilidade, pdf, gravacao, limpeza, codificacao, executor)",
+    ("estagio",)
+)
+metricas_pdf_bytes = metricas.histograma(
+    "proposta_pdf_bytes", "Tamanho dos PDFs gerados", limites=LIMITES_BYTES
+)
+metricas_erros = metricas.contador(
+    "proposta_erros_total", "Falhas na geração de propostas por etapa", ("etapa",)
+)
+
+
+def _gauge_estatisticas(nome: str, ajuda: str, estatisticas):
+    """Gauge com uma série por chave do dicionário de estatísticas de um componente"""
+    metricas.gauge(
+        nome, ajuda, ("estatistica",),
+        coletar=lambda: {(chave,): valor for chave, valor in estatisticas().items()}
+    )
+
+
+_gauge_estatisticas("proposta_cache_resultados", "Cache de respostas", lambda: cache_resultados.estatisticas())
+_gauge_estatisticas("proposta_cache_graficos", "Cache de gráficos (soma dos workers)", lambda: estatisticas_cache_graficos)
+_gauge_estatisticas("proposta_jobs", "Fila e consumidores de jobs", jobs.estatisticas)
+_gauge_estatisticas("proposta_armazenamento", "PDFs disponíveis para download", armazenamento.estatisticas)
+_gauge_estatisticas("proposta_executor", "Renderizações submetidas ao executor", lambda: {
+    "em_andamento": executor.em_andamento,
+    "workers": executor.workers,
+    "max_pendentes": executor.max_pendentes
+})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    armazenamento.iniciar()
+    executor.iniciar()
+    jobs.iniciar()
+    yield
+    await jobs.encerrar()
+    executor.encerrar()
+    await armazenamento.encerrar()
 
-from app.models.proposta import PropostaRequest, PropostaResponse
-from app.services.pdf_generator import PDFGenerator
-from app.services.graficos import GraficoService
 
 app = FastAPI(
     title="API Gerador de Propostas Solar",
     description="API para geração automática de propostas comerciais para sistemas fotovoltaicos",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -31,8 +168,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-OUTPUT_DIR = "/tmp/propostas"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+app.add_middleware(
+    MiddlewareMetricas,
+    requisicoes=metricas_requisicoes,
+    duracao=metricas_duracao,
+    em_andamento=metricas_em_andamento
+)
 
 
 @app.get("/")
@@ -52,87 +193,639 @@ async def health_check():
     }
 
 
-@app.post("/api/v1/proposta/gerar", response_model=PropostaResponse)
-async def gerar_proposta(request: PropostaRequest):
+@app.get("/api/v1/metrics", response_class=PlainTextResponse)
+async def exportar_metricas():
+    """Métricas no formato texto do Prometheus"""
+    return PlainTextResponse(
+        metricas.exportar(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/api/v1/cache/estatisticas")
+async def estatisticas_cache():
+    return {
+        "resultados": cache_resultados.estatisticas(),
+        "graficos": estatisticas_cache_graficos,
+        "armazenamento": armazenamento.estatisticas()
+    }
+
+
+@app.get("/api/v1/templates")
+async def listar_templates_disponiveis():
+    """Templates disponíveis, com a versão e as seções de cada um"""
+    templates = []
+    for nome in listar_templates():
+        try:
+            template = obter_template(nome)
+        except TemplateInvalido as e:
+            templates.append({"nome": nome, "erro": str(e)})
+            continue
+        templates.append({
+            "nome": nome,
+            "versao": template.versao,
+            "secoes": [secao.nome for secao in template.secoes],
+            "padrao": nome == config.TEMPLATE_PADRAO
+        })
+    return {"templates": templates}
+
+
+@app.post(
+    "/api/v1/proposta/gerar",
+    response_model=PropostaResponse,
+    responses={200: {"content": {"application/pdf": {}}}}
+)
+async def gerar_proposta(
+    request: PropostaRequest,
+    http_request: Request,
+    salvar: bool = Query(True, description="Grava uma cópia do PDF para download posterior"),
+    backend_grafico: Optional[Literal["reportlab", "matplotlib"]] = Query(
+        None, description="Backend do gráfico de produção (padrão: GRAFICO_BACKEND)"
+    ),
+    perfil_saida: Optional[Literal["padrao", "email", "impressao", "arquivo"]] = Query(
+        None, description="Resolução e codificação das imagens e compressão do PDF (padrão: PERFIL_SAIDA)"
+    ),
+    template: Optional[str] = Query(
+        None, description="Template do documento (padrão: TEMPLATE_PADRAO; ver /api/v1/templates)"
+    ),
+    formato: Optional[Literal["json", "pdf"]] = Query(
+        None, description="json (padrão) ou pdf; sem o parâmetro, decide pelo header Accept"
+    ),
+    incluir_base64: bool = Query(True, description="Inclui pdf_base64 na resposta JSON"),
+    perfil: Optional[str] = Query(
+        None, description="Perfila a renderização: deterministico ou amostragem (exige X-Admin-Token)"
+    )
+):
+    _registrar_validacao(http_request)
+    _validar_cenarios(request.analise_sensibilidade)
+    modo_perfil = _modo_perfil(http_request, perfil)
+    opcoes = _opcoes_renderizacao(
+        salvar_arquivo=salvar,
+        backend_grafico=backend_grafico,
+        perfil_saida=perfil_saida,
+        template=template,
+        codificar_base64=False,
+        perfil=modo_perfil
+    )
+    try:
+        if modo_perfil:
+            # Sem cache: o perfil precisa de uma renderização de fato
+            resultado = await _executar_renderizacao(request, opcoes)
+        else:
+            resultado = await _gerar_resultado(request, opcoes)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar proposta: {str(e)}")
+    
+    if formato is None:
+        formato = "pdf" if _aceita_pdf(http_request.headers.get("accept", "")) else "json"
+    
+    if formato == "pdf":
+        return _resposta_pdf(resultado)
+    return _resposta_json(resultado, "Proposta gerada com sucesso", incluir_base64)
+
+
+def _resposta_json(resultado: ResultadoRenderizacao, mensagem: str, incluir_base64: bool):
+    inicio = time.perf_counter()
+    pdf_url = f"/api/v1/download/{resultado.pdf_filename}" if resultado.pdf_filename else None
+    resposta = PropostaResponse(
+        success=True,
+        message=mensagem,
+        proposta_id=id_proposta(resultado.pdf_filename) if resultado.pdf_filename else None,
+        pdf_filename=resultado.pdf_filename,
+        pdf_url=pdf_url,
+        pdf_base64=base64.b64encode(resultado.pdf_bytes).decode("utf-8") if incluir_base64 else None,
+        dados_calculados=resultado.dados_calculados,
+        perfil=_resumo_perfil(resultado),
+        revisao=resultado.revisao
+    )
+    if not incluir_base64:
+        resposta = JSONResponse(resposta.model_dump(exclude={"pdf_base64"}))
+    metricas_estagios.observar(time.perf_counter() - inicio, "codificacao")
+    return resposta
+
+
+@app.post(
+    "/api/v1/proposta/{proposta_id}/revisao",
+    response_model=PropostaResponse,
+    responses={200: {"content": {"application/pdf": {}}}}
+)
+async def revisar_proposta_salva(
+    proposta_id: str,
+    http_request: Request,
+    alteracoes: Dict[str, Any] = Body(
+        ..., description="Campos de /proposta/gerar a alterar, ex.: {\"investimento_mao_de_obra\": 4500}"
+    ),
+    formato: Optional[Literal["json", "pdf"]] = Query(
+        None, description="json (padrão) ou pdf; sem o parâmetro, decide pelo header Accept"
+    ),
+    incluir_base64: bool = Query(True, description="Inclui pdf_base64 na resposta JSON")
+):
+    """
+    Gera uma nova versão de uma proposta salva a partir de uma atualização
+    parcial dos dados, com as mesmas opções de renderização da original.
+    
+    Apenas as seções afetadas pelas alterações são renderizadas; as páginas
+    das demais vêm do PDF anterior. A revisão também é salva e pode ser
+    revisada de novo pelo seu próprio proposta_id.
+    """
+    estado = await _carregar_estado_revisao(proposta_id)
+    try:
+        request = aplicar_alteracoes(estado, alteracoes)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    _validar_cenarios(request.analise_sensibilidade)
+    
+    opcoes = _opcoes_renderizacao(
+        **estado["opcoes"],
+        salvar_arquivo=True,
+        em_memoria=True,
+        codificar_base64=False
+    )
+    try:
+        resultado = await _executar_renderizacao(request, opcoes, revisao=estado)
+    except RevisaoIndisponivel as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao revisar proposta: {str(e)}")
+    
+    if formato is None:
+        formato = "pdf" if _aceita_pdf(http_request.headers.get("accept", "")) else "json"
+    if formato == "pdf":
+        return _resposta_pdf(resultado)
+    return _resposta_json(resultado, "Proposta revisada com sucesso", incluir_base64)
+
+
+async def _carregar_estado_revisao(proposta_id: str) -> Dict[str, Any]:
+    """Estado de revisão de uma proposta salva (404 se o PDF ou o estado não existem)"""
+    pdf_filename = f"{proposta_id}.pdf"
+    caminho = None
+    if armazenamento.abrir_para_download(pdf_filename) is not None:
+        caminho = armazenamento.abrir_para_download(nome_estado(pdf_filename))
+    if caminho is None:
+        raise HTTPException(status_code=404, detail="Proposta não encontrada ou expirada")
     try:
-        grafico_service = GraficoService()
-        pdf_generator = PDFGenerator()
-        
-        investimento_total = request.investimento_kit_fotovoltaico + request.investimento_mao_de_obra
-        
-        ano_payback = None
-        valor_payback = None
-        for item in request.retorno_investimento:
-            if item.saldo > 0:
-                ano_payback = item.ano
-                valor_payback = item.saldo
-                break
-        
-        economia_25_anos = request.retorno_investimento[-1].saldo if request.retorno_investimento else 0
-        
-        grafico_producao_path = grafico_service.gerar_grafico_producao(
-            dados_producao=request.producao_mensal,
-            quantidade_modulos=request.modulos_quantidade,
-            output_dir=OUTPUT_DIR
+        return await asyncio.to_thread(carregar_estado, caminho)
+    except RevisaoIndisponivel as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+async def _gerar_resultado(request: PropostaRequest, opcoes: OpcoesRenderizacao) -> ResultadoRenderizacao:
+    """Renderiza a proposta passando pelo cache de resultados"""
+    # Uma nova versão do template não reaproveita PDFs da anterior
+    versao_template = obter_template(opcoes.template).versao
+    chave = chave_requisicao(request, opcoes, extras={"versao_template": versao_template})
+    fabrica = lambda: _executar_renderizacao(request, opcoes)
+    
+    resultado = await cache_resultados.obter_ou_gerar(chave, fabrica)
+    if resultado.pdf_filename and not armazenamento.existe(resultado.pdf_filename):
+        # A cópia para download foi removida; gera novamente
+        cache_resultados.invalidar(chave)
+        resultado = await cache_resultados.obter_ou_gerar(chave, fabrica)
+    return resultado
+
+
+def _registrar_validacao(http_request: Request):
+    """Tempo desde a chegada da requisição até o endpoint: leitura e validação do corpo"""
+    inicio = getattr(http_request.state, "inicio_requisicao", None)
+    if inicio is not None:
+        metricas_estagios.observar(time.perf_counter() - inicio, "validacao")
+
+
+def _modo_perfil(http_request: Request, perfil: Optional[str]) -> Optional[str]:
+    """
+    Modo de perfilamento pedido (query `perfil` ou header X-Perfil), após
+    conferir o token de administrador. None quando não foi pedido.
+    """
+    modo = perfil or http_request.headers.get("x-perfil")
+    if not modo:
+        return None
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Perfilamento desativado (ADMIN_TOKEN não configurado)")
+    token = http_request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode("utf-8"), config.ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Token de administrador inválido")
+    if modo not in MODOS_PERFIL:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Modo de perfil inválido: {modo} (use {', '.join(MODOS_PERFIL)})"
         )
-        
-        tabela_retorno_path = grafico_service.gerar_tabela_retorno(
-            dados_retorno=request.retorno_investimento,
-            output_dir=OUTPUT_DIR
+    return modo
+
+
+def _resumo_perfil(resultado: ResultadoRenderizacao) -> Optional[Dict[str, Any]]:
+    """Resumo do perfil com os links de download dos artefatos"""
+    if not resultado.perfil:
+        return None
+    resumo = dict(resultado.perfil)
+    resumo["urls"] = [f"/api/v1/download/{quote(nome)}" for nome in resumo["arquivos"]]
+    return resumo
+
+
+def _aceita_pdf(accept: str) -> bool:
+    """True quando o cliente pede application/pdf antes de application/json"""
+    tipos = [parte.split(";")[0].strip().lower() for parte in accept.split(",")]
+    if "application/pdf" not in tipos:
+        return False
+    return "application/json" not in tipos or tipos.index("application/pdf") < tipos.index("application/json")
+
+
+def _resposta_pdf(resultado: ResultadoRenderizacao) -> Response:
+    """PDF binário, com os dados calculados nos headers X-*"""
+    headers = {}
+    cabecalhos_dados = {
+        "investimento_total": "X-Investimento-Total",
+        "ano_payback": "X-Ano-Payback",
+        "valor_payback": "X-Valor-Payback",
+        "economia_25_anos": "X-Economia-25-Anos"
+    }
+    for campo, cabecalho in cabecalhos_dados.items():
+        valor = resultado.dados_calculados.get(campo)
+        if valor is not None:
+            headers[cabecalho] = str(valor)
+    
+    nome = "proposta.pdf"
+    if resultado.pdf_filename:
+        # headers são latin-1: o nome do arquivo vai percent-encoded
+        headers["X-Pdf-Url"] = f"/api/v1/download/{quote(resultado.pdf_filename)}"
+        headers["X-Proposta-Id"] = quote(id_proposta(resultado.pdf_filename))
+        nome = resultado.pdf_filename
+    if resultado.revisao:
+        headers["X-Secoes-Renderizadas"] = ", ".join(resultado.revisao["secoes_renderizadas"])
+    if resultado.perfil:
+        headers["X-Perfil-Urls"] = ", ".join(_resumo_perfil(resultado)["urls"])
+    headers["Content-Disposition"] = _content_disposition("inline", nome)
+    
+    return Response(content=resultado.pdf_bytes, media_type="application/pdf", headers=headers)
+
+
+def _content_disposition(tipo: str, nome: str) -> str:
+    """Content-Disposition com fallback ASCII e nome UTF-8 (RFC 6266)"""
+    ascii_nome = nome.encode("ascii", "ignore").decode("ascii") or "proposta.pdf"
+    return f'{tipo}; filename="{ascii_nome}"; filename*=utf-8\'\'{quote(nome)}'
+
+
+@app.post("/api/v1/jobs", status_code=202, response_model=JobResponse)
+async def criar_job(
+    request: PropostaRequest,
+    http_request: Request,
+    salvar: bool = Query(True, description="Grava uma cópia do PDF para download posterior"),
+    backend_grafico: Optional[Literal["reportlab", "matplotlib"]] = Query(
+        None, description="Backend do gráfico de produção (padrão: GRAFICO_BACKEND)"
+    ),
+    perfil_saida: Optional[Literal["padrao", "email", "impressao", "arquivo"]] = Query(
+        None, description="Resolução e codificação das imagens e compressão do PDF (padrão: PERFIL_SAIDA)"
+    ),
+    template: Optional[str] = Query(
+        None, description="Template do documento (padrão: TEMPLATE_PADRAO; ver /api/v1/templates)"
+    )
+):
+    """
+    Enfileira a geração de uma proposta e retorna o id do job imediatamente.
+    
+    Com a fila cheia responde 429 com Retry-After estimado.
+    """
+    _registrar_validacao(http_request)
+    _validar_cenarios(request.analise_sensibilidade)
+    opcoes = _opcoes_renderizacao(
+        salvar_arquivo=salvar,
+        backend_grafico=backend_grafico,
+        perfil_saida=perfil_saida,
+        template=template,
+        codificar_base64=False
+    )
+    try:
+        job = jobs.submeter({"request": request, "opcoes": opcoes})
+    except FilaCheia as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(jobs.retry_after())}
         )
-        
-        nome_arquivo = f"proposta_{request.nome.lower().replace(' ', '_')}_{uuid.uuid4().hex[:8]}.pdf"
-        pdf_path = os.path.join(OUTPUT_DIR, nome_arquivo)
-        
-        pdf_generator.gerar_proposta_plana(
-            nome_cliente=request.nome,
-            modulos_quantidade=request.modulos_quantidade,
-            especificacoes_modulo=request.especificacoes_modulo,
-            inversores_quantidade=request.inversores_quantidade,
-            especificacoes_inversores=request.especificacoes_inversores,
-            investimento_kit=request.investimento_kit_fotovoltaico,
-            investimento_mao_de_obra=request.investimento_mao_de_obra,
-            investimento_total=investimento_total,
-            grafico_producao_path=grafico_producao_path,
-            tabela_retorno_path=tabela_retorno_path,
-            ano_payback=ano_payback,
-            valor_payback=valor_payback,
-            economia_25_anos=economia_25_anos,
-            output_path=pdf_path
+    return _resposta_job(job)
+
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse)
+async def consultar_job(
+    job_id: str,
+    aguardar: float = Query(
+        0, ge=0, description="Segundos para aguardar a conclusão (long-poll)"
+    )
+):
+    job = _obter_job(job_id)
+    await jobs.aguardar(job, min(aguardar, config.JOBS_AGUARDAR_MAX_SEGUNDOS))
+    return _resposta_job(job)
+
+
+@app.get("/api/v1/jobs/{job_id}/pdf")
+async def baixar_pdf_job(job_id: str):
+    job = _obter_job(job_id)
+    if job.status == "erro":
+        raise HTTPException(status_code=409, detail=f"Job terminou com erro: {job.erro}")
+    if job.status != "concluido":
+        raise HTTPException(
+            status_code=409,
+            detail="Job ainda não concluído",
+            headers={"Retry-After": str(jobs.retry_after())}
         )
-        
-        with open(pdf_path, "rb") as f:
-            pdf_base64 = base64.b64encode(f.read()).decode("utf-8")
-        
-        if os.path.exists(grafico_producao_path):
-            os.remove(grafico_producao_path)
-        if os.path.exists(tabela_retorno_path):
-            os.remove(tabela_retorno_path)
-        
-        return PropostaResponse(
-            success=True,
-            message="Proposta gerada com sucesso",
-            pdf_filename=nome_arquivo,
-            pdf_url=f"/api/v1/download/{nome_arquivo}",
-            pdf_base64=pdf_base64,
-            dados_calculados={
-                "investimento_total": investimento_total,
-                "ano_payback": ano_payback,
-                "valor_payback": valor_payback,
-                "economia_25_anos": economia_25_anos
-            }
+    return _resposta_pdf(job.resultado)
+
+
+@app.get("/api/v1/jobs")
+async def estatisticas_jobs():
+    return jobs.estatisticas()
+
+
+def _obter_job(job_id: str) -> Job:
+    job = jobs.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado ou expirado")
+    return job
+
+
+def _resposta_job(job: Job) -> JobResponse:
+    resposta = JobResponse(
+        job_id=job.id,
+        status=job.status,
+        status_url=f"/api/v1/jobs/{job.id}",
+        posicao_fila=jobs.posicao(job),
+        criado_em=datetime.fromtimestamp(job.criado_em).isoformat(),
+        concluido_em=datetime.fromtimestamp(job.concluido_em).isoformat() if job.concluido_em else None,
+        erro=job.erro
+    )
+    if job.status == "concluido":
+        resultado = job.resultado
+        resposta.proposta_id = id_proposta(resultado.pdf_filename) if resultado.pdf_filename else None
+        resposta.pdf_filename = resultado.pdf_filename
+        resposta.pdf_url = (
+            f"/api/v1/download/{resultado.pdf_filename}"
+            if resultado.pdf_filename else f"/api/v1/jobs/{job.id}/pdf"
         )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar proposta: {str(e)}")
+        resposta.dados_calculados = resultado.dados_calculados
+    return resposta
+
+
+@app.post("/api/v1/proposta/lote")
+async def gerar_lote(
+    itens: List[Dict[str, Any]] = Body(..., description="Lista de payloads no formato de /proposta/gerar"),
+    backend_grafico: Optional[Literal["reportlab", "matplotlib"]] = Query(
+        None, description="Backend do gráfico de produção (padrão: GRAFICO_BACKEND)"
+    ),
+    perfil_saida: Optional[Literal["padrao", "email", "impressao", "arquivo"]] = Query(
+        None, description="Resolução e codificação das imagens e compressão do PDF (padrão: PERFIL_SAIDA)"
+    ),
+    template: Optional[str] = Query(
+        None, description="Template do documento (padrão: TEMPLATE_PADRAO; ver /api/v1/templates)"
+    )
+):
+    """
+    Gera um lote de propostas e devolve um ZIP em streaming com um PDF por
+    item e um manifest.json com os dados calculados e os erros de cada um.
+    """
+    if len(itens) > config.LOTE_MAX_ITENS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote com {len(itens)} itens excede o máximo de {config.LOTE_MAX_ITENS}"
+        )
+    
+    opcoes = _opcoes_renderizacao(
+        salvar_arquivo=False,
+        backend_grafico=backend_grafico,
+        perfil_saida=perfil_saida,
+        template=template,
+        em_memoria=True,
+        codificar_base64=False
+    )
+    
+    async def renderizar(request: PropostaRequest) -> ResultadoRenderizacao:
+        # Mesmo limite das demais rotas; a falha vira o erro do item no manifest
+        erro = _erro_cenarios(request.analise_sensibilidade)
+        if erro:
+            raise ValueError(erro)
+        return await _executar_renderizacao(request, opcoes)
+    
+    return StreamingResponse(
+        gerar_lote_zip(itens, renderizar, config.LOTE_CONCORRENCIA),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="propostas.zip"'}
+    )
+
+
+def _opcoes_renderizacao(
+    backend_grafico: Optional[str] = None,
+    perfil_saida: Optional[str] = None,
+    template: Optional[str] = None,
+    **extras
+) -> OpcoesRenderizacao:
+    """
+    Opções de renderização da configuração, com ajustes da requisição.
+    
+    Raises:
+        HTTPException: 422 se o template não existe ou é inválido
+    """
+    template = template or config.TEMPLATE_PADRAO
+    try:
+        obter_template(template)
+    except TemplateInvalido as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    opcoes = dict(
+        output_dir=OUTPUT_DIR,
+        em_memoria=config.RENDER_EM_MEMORIA,
+        modo_tabela=config.TABELA_RETORNO_MODO,
+        backend_grafico=backend_grafico or config.GRAFICO_BACKEND,
+        montagem_paginas=config.MONTAGEM_PAGINAS,
+        perfil_saida=perfil_saida or config.PERFIL_SAIDA,
+        template=template
+    )
+    opcoes.update(extras)
+    return OpcoesRenderizacao(**opcoes)
+
+
+async def _executar_renderizacao(
+    request: PropostaRequest,
+    opcoes: OpcoesRenderizacao,
+    revisao: Optional[Dict[str, Any]] = None
+) -> ResultadoRenderizacao:
+    """Renderiza no executor; com `revisao` (estado da proposta anterior), apenas o que mudou"""
+    inicio = time.perf_counter()
+    try:
+        if revisao is None:
+            resultado = await executor.executar(renderizar_proposta, request, opcoes)
+        else:
+            resultado = await executor.executar(revisar_proposta, request, opcoes, revisao)
+    except Exception:
+        metricas_erros.incrementar("renderizacao")
+        raise
+    decorrido = time.perf_counter() - inicio
+    
+    for estagio, segundos in resultado.tempos.items():
+        metricas_estagios.observar(segundos, estagio)
+    # Espera por um worker e transferência entre processos
+    metricas_estagios.observar(max(0.0, decorrido - sum(resultado.tempos.values())), "executor")
+    if resultado.pdf_bytes is not None:
+        metricas_pdf_bytes.observar(len(resultado.pdf_bytes))
+    
+    if resultado.pdf_filename:
+        armazenamento.registrar(resultado.pdf_filename)
+        armazenamento.registrar(nome_estado(resultado.pdf_filename))
+    if resultado.perfil:
+        for nome in resultado.perfil["arquivos"]:
+            armazenamento.registrar(nome)
+    for contador, valor in resultado.cache_graficos.items():
+        estatisticas_cache_graficos[contador] += valor
+    return resultado
+
+
+@app.post("/api/v1/calculos/fluxo-caixa")
+async def projetar_fluxo_caixa(request: ProjecaoRequest):
+    """
+    Projeta saldo e economia anuais para uma ou várias variantes de premissas
+    numa única avaliação vetorizada.
+    """
+    parametros = request.model_dump(exclude={"anos"})
+    try:
+        formato = np.broadcast_shapes(*[np.shape(valor) for valor in parametros.values()])
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Listas de parâmetros com tamanhos diferentes")
+    variantes = formato[0] if formato else 1
+    if variantes > config.CALCULOS_MAX_VARIANTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{variantes} variantes excedem o máximo de {config.CALCULOS_MAX_VARIANTES}"
+        )
+    
+    with np.errstate(over="ignore", invalid="ignore"):
+        projecao = calculo_service.projetar_fluxo_caixa(**parametros, anos=request.anos)
+        series = {
+            nome: np.round(getattr(projecao, nome), 2)
+            for nome in ("economia_anual", "economia_mensal", "saldo")
+        }
+    # Valores dentro dos limites ainda podem estourar o float64 (ex.: 1e308)
+    if not all(np.isfinite(serie).all() for serie in series.values()):
+        raise HTTPException(status_code=422, detail="Parâmetros fora do intervalo calculável")
+    anos_payback = calculo_service.encontrar_anos_payback(projecao)
+    return {
+        "ano": projecao.ano.tolist(),
+        **{nome: serie.tolist() for nome, serie in series.items()},
+        "ano_payback": np.where(anos_payback > 0, anos_payback, None).tolist(),
+        "economia_total": series["saldo"][..., -1].tolist()
+    }
+
+
+@app.post("/api/v1/calculos/analise")
+async def analisar_propostas(request: AnaliseRequest):
+    """
+    VPL, TIR, payback simples, fracionado e descontado de várias propostas
+    (linhas de economia_anual) numa única avaliação vetorizada.
+    """
+    propostas = len(request.economia_anual)
+    if propostas > config.CALCULOS_MAX_VARIANTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{propostas} propostas excedem o máximo de {config.CALCULOS_MAX_VARIANTES}"
+        )
+    
+    taxa = request.taxa_desconto
+    analise = await executor.executar(
+        calculo_service.analisar_fluxos,
+        np.asarray(request.investimento, dtype=np.float64),
+        np.asarray(request.economia_anual, dtype=np.float64),
+        np.nan if taxa is None else np.asarray(taxa, dtype=np.float64)
+    )
+    # Como em fluxo-caixa: valores dentro dos limites ainda podem estourar o float64
+    if not analise.calculavel:
+        raise HTTPException(status_code=422, detail="Parâmetros fora do intervalo calculável")
+    return analise.como_dict()
+
+
+@app.post("/api/v1/calculos/monte-carlo")
+async def simular_monte_carlo(request: SimulacaoRequest):
+    """
+    Análise de sensibilidade: simula cenários de reajuste da tarifa, degradação
+    e variação da geração e devolve percentis do payback, a distribuição da
+    economia total e as faixas de saldo ano a ano (gráfico em leque).
+    """
+    _validar_cenarios(request)
+    simulacao = await executor.executar(
+        calculo_service.simular_monte_carlo,
+        request.investimento,
+        request.geracao_mensal,
+        request.tarifa_kwh,
+        request,
+        request.custo_om_anual,
+        request.reajuste_om,
+        request.anos
+    )
+    # Como em fluxo-caixa: valores dentro dos limites ainda podem estourar o float64
+    if not simulacao.calculavel:
+        raise HTTPException(status_code=422, detail="Parâmetros fora do intervalo calculável")
+    return simulacao.resumo()
 
 
-@app.get("/api/v1/download/{filename}")
-async def download_proposta(filename: str):
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(file_path):
+def _erro_cenarios(sensibilidade: Optional[AnaliseSensibilidade]) -> Optional[str]:
+    """Mensagem de erro se a simulação passa de SIMULACAO_MAX_CENARIOS"""
+    if sensibilidade is not None and sensibilidade.cenarios > config.SIMULACAO_MAX_CENARIOS:
+        return f"{sensibilidade.cenarios} cenários excedem o máximo de {config.SIMULACAO_MAX_CENARIOS}"
+    return None
+
+
+def _validar_cenarios(sensibilidade: Optional[AnaliseSensibilidade]):
+    erro = _erro_cenarios(sensibilidade)
+    if erro:
+        raise HTTPException(status_code=413, detail=erro)
+
+
+@app.api_route("/api/v1/download/{filename}", methods=["GET", "HEAD"])
+async def download_proposta(filename: str, http_request: Request):
+    """
+    Baixa um arquivo do armazenamento.
+    
+    Responde 304 quando If-None-Match/If-Modified-Since indicam que a cópia
+    do cliente está atualizada e 206 para um Range de bytes (ver
+    app.services.download).
+    """
+    file_path = armazenamento.abrir_para_download(filename)
+    etag = await armazenamento.obter_etag(filename) if file_path else None
+    try:
+        info = os.stat(file_path) if etag else None
+    except FileNotFoundError:
+        info = None
+    if info is None:
         raise HTTPException(status_code=404, detail="Arquivo não encontrado")
-    return FileResponse(path=file_path, filename=filename, media_type="application/pdf")
+    
+    cabecalhos = cabecalhos_cache(etag, info.st_mtime, config.DOWNLOAD_CACHE_MAX_AGE)
+    if nao_modificado(http_request.headers, etag, info.st_mtime):
+        return Response(status_code=304, headers=cabecalhos)
+    
+    media_type = "application/pdf"
+    if filename.endswith(".json"):
+        media_type = "application/json"
+    elif filename.endswith(".pstats"):
+        media_type = "application/octet-stream"
+    
+    try:
+        intervalo = intervalo_solicitado(http_request.headers, info.st_size, etag, info.st_mtime)
+    except IntervaloInvalido as e:
+        raise HTTPException(
+            status_code=416,
+            detail=str(e),
+            headers={"Content-Range": f"bytes */{info.st_size}"}
+        )
+    if intervalo is not None:
+        inicio, fim = intervalo
+        conteudo = await asyncio.to_thread(ler_intervalo, file_path, inicio, fim)
+        cabecalhos["Content-Range"] = f"bytes {inicio}-{fim}/{info.st_size}"
+        cabecalhos["Content-Disposition"] = _content_disposition("attachment", filename)
+        return Response(content=conteudo, status_code=206, media_type=media_type, headers=cabecalhos)
+    
+    return FileResponse(
+        path=file_path,
+        filename=filename,
+        media_type=media_type,
+        headers=cabecalhos,
+        stat_result=info
+    )
 
 
 if __name__ == "__main__":
@@ -1,13 +1,31 @@
 from app.models.proposta import (
     ProducaoMensalModel,
     RetornoInvestimentoModel,
+    ProducaoMensalColunas,
+    RetornoInvestimentoColunas,
+    ParametrosFinanceiros,
+    Distribuicao,
+    AnaliseSensibilidade,
     PropostaRequest,
-    PropostaResponse
+    ProjecaoRequest,
+    SimulacaoRequest,
+    AnaliseRequest,
+    PropostaResponse,
+    JobResponse
 )
 
 __all__ = [
     "ProducaoMensalModel",
     "RetornoInvestimentoModel",
+    "ProducaoMensalColunas",
+    "RetornoInvestimentoColunas",
+    "ParametrosFinanceiros",
+    "Distribuicao",
+    "AnaliseSensibilidade",
     "PropostaRequest",
-    "PropostaResponse"
+    "ProjecaoRequest",
+    "SimulacaoRequest",
+    "AnaliseRequest",
+    "PropostaResponse",
+    "JobResponse"
 ]
@@ -1,8 +1,43 @@
 """
 Modelos Pydantic para validação de dados da API
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union, Dict, Any
+import numpy as np
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    Field,
+    PlainSerializer,
+    field_validator,
+    model_validator,
+)
+from typing import Annotated, List, Literal, Optional, Union, Dict, Any
+
+
+def _array_float(valores: List[float]) -> np.ndarray:
+    array = np.array(valores, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+def _array_int(valores: List[int]) -> np.ndarray:
+    array = np.array(valores, dtype=np.int64)
+    array.flags.writeable = False
+    return array
+
+
+def _lista(array: np.ndarray) -> list:
+    return array.tolist()
+
+
+# Colunas numéricas: validadas elemento a elemento pelo pydantic-core (sem
+# objetos intermediários) e guardadas como arrays NumPy somente leitura
+ColunaFloat = Annotated[List[float], AfterValidator(_array_float), PlainSerializer(_lista)]
+ColunaFloatPositiva = Annotated[
+    List[Annotated[float, Field(ge=0)]], AfterValidator(_array_float), PlainSerializer(_lista)
+]
+ColunaAno = Annotated[
+    List[Annotated[int, Field(ge=1, le=25)]], AfterValidator(_array_int), PlainSerializer(_lista)
+]
 
 
 class ProducaoMensalModel(BaseModel):
@@ -19,6 +54,137 @@ class RetornoInvestimentoModel(BaseModel):
     economia_anual: float = Field(..., ge=0, description="Economia anual")
 
 
+class ProducaoMensalColunas(BaseModel):
+    """Produção mensal em colunas: {"mes": [...], "geracao_total": [...]}"""
+    mes: List[Union[int, str]] = Field(..., description="Meses (1-12 ou 'média')")
+    geracao_total: ColunaFloatPositiva = Field(..., description="Geração total estimada em kWh")
+    
+    @model_validator(mode="after")
+    def _validar_colunas(self) -> "ProducaoMensalColunas":
+        if len(self.mes) != len(self.geracao_total):
+            raise ValueError("mes e geracao_total devem ter o mesmo tamanho")
+        return self
+    
+    @classmethod
+    def de_linhas(cls, linhas: List[ProducaoMensalModel]) -> "ProducaoMensalColunas":
+        """Converte linhas já validadas, sem validar de novo"""
+        return cls.model_construct(
+            mes=[linha.mes for linha in linhas],
+            geracao_total=_array_float([linha.geracao_total for linha in linhas])
+        )
+    
+    def __len__(self) -> int:
+        return len(self.mes)
+    
+    def rotulos(self) -> List[str]:
+        """Rótulos do eixo dos meses ('MÉDIA' para a linha de média)"""
+        return [str(mes) if isinstance(mes, int) else 'MÉDIA' for mes in self.mes]
+
+
+class RetornoInvestimentoColunas(BaseModel):
+    """Retorno do investimento em colunas: {"ano": [...], "saldo": [...], ...}"""
+    ano: ColunaAno = Field(..., description="Anos (1-25)")
+    saldo: ColunaFloat = Field(..., description="Saldo acumulado")
+    economia_mensal: ColunaFloatPositiva = Field(..., description="Economia média mensal")
+    economia_anual: ColunaFloatPositiva = Field(..., description="Economia anual")
+    
+    @model_validator(mode="after")
+    def _validar_colunas(self) -> "RetornoInvestimentoColunas":
+        tamanhos = {len(self.ano), len(self.saldo), len(self.economia_mensal), len(self.economia_anual)}
+        if len(tamanhos) != 1:
+            raise ValueError("ano, saldo, economia_mensal e economia_anual devem ter o mesmo tamanho")
+        return self
+    
+    @classmethod
+    def de_linhas(cls, linhas: List[RetornoInvestimentoModel]) -> "RetornoInvestimentoColunas":
+        """Converte linhas já validadas, sem validar de novo"""
+        # Uma única conversão para NumPy; cada linha da transposta vira uma coluna
+        tabela = np.array(
+            [(linha.ano, linha.saldo, linha.economia_mensal, linha.economia_anual) for linha in linhas],
+            dtype=np.float64
+        ).reshape(-1, 4).T.copy()
+        tabela.flags.writeable = False
+        ano = tabela[0].astype(np.int64)
+        ano.flags.writeable = False
+        return cls.model_construct(
+            ano=ano,
+            saldo=tabela[1],
+            economia_mensal=tabela[2],
+            economia_anual=tabela[3]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ano)
+
+
+# Limites de ParametrosFinanceiros, reaproveitados pelas requisições de
+# cálculos (inclusive em campos que aceitam número ou lista)
+TaxaDesconto = Annotated[float, Field(gt=-1, le=1)]
+Reajuste = Annotated[float, Field(ge=-0.5, le=1)]
+NaoNegativo = Annotated[float, Field(ge=0)]
+# Parâmetros das distribuições da análise de sensibilidade (frações e fatores)
+ParametroDistribuicao = Annotated[float, Field(ge=-1, le=10)]
+
+
+class ParametrosFinanceiros(BaseModel):
+    """Premissas para o servidor projetar o retorno do investimento"""
+    tarifa_kwh: float = Field(..., gt=0, description="Tarifa de energia no primeiro ano (R$/kWh)")
+    inflacao_tarifa: float = Field(0.0, ge=-0.5, le=1, description="Reajuste anual da tarifa (0.05 = 5%)")
+    degradacao_anual: float = Field(0.0, ge=0, lt=1, description="Perda anual de geração dos módulos")
+    custo_om_anual: float = Field(0.0, ge=0, description="Custo anual de operação e manutenção (R$)")
+    reajuste_om: float = Field(0.0, ge=-0.5, le=1, description="Reajuste anual do custo de O&M")
+    geracao_mensal: Optional[float] = Field(
+        None, ge=0, description="Geração média mensal em kWh (padrão: média de producao_mensal)"
+    )
+    anos: int = Field(25, ge=1, le=25, description="Horizonte da projeção")
+    taxa_desconto: Optional[float] = Field(
+        None, gt=-1, le=1, description="Taxa anual para VPL e payback descontado"
+    )
+
+
+class Distribuicao(BaseModel):
+    """Distribuição de uma premissa incerta na análise de sensibilidade"""
+    tipo: Literal["fixa", "normal", "uniforme", "triangular"] = "normal"
+    media: Optional[ParametroDistribuicao] = Field(None, description="Valor (fixa) ou média (normal)")
+    desvio: float = Field(0.0, ge=0, le=10, description="Desvio padrão (normal)")
+    minimo: Optional[ParametroDistribuicao] = Field(
+        None, description="Limite inferior (uniforme, triangular; corta a normal)"
+    )
+    maximo: Optional[ParametroDistribuicao] = Field(
+        None, description="Limite superior (uniforme, triangular; corta a normal)"
+    )
+    moda: Optional[ParametroDistribuicao] = Field(None, description="Valor mais provável (triangular)")
+    
+    @model_validator(mode="after")
+    def _validar_parametros(self) -> "Distribuicao":
+        if self.tipo in ("fixa", "normal") and self.media is None:
+            raise ValueError(f"Distribuição {self.tipo} exige media")
+        if self.tipo in ("uniforme", "triangular") and (self.minimo is None or self.maximo is None):
+            raise ValueError(f"Distribuição {self.tipo} exige minimo e maximo")
+        if self.tipo == "triangular" and self.moda is None:
+            raise ValueError("Distribuição triangular exige moda")
+        if self.minimo is not None and self.maximo is not None and self.minimo > self.maximo:
+            raise ValueError("minimo deve ser menor ou igual a maximo")
+        if self.tipo == "triangular" and not (self.minimo <= self.moda <= self.maximo):
+            raise ValueError("moda deve estar entre minimo e maximo")
+        return self
+
+
+class AnaliseSensibilidade(BaseModel):
+    """Premissas incertas simuladas por Monte Carlo"""
+    inflacao_tarifa: Distribuicao = Field(..., description="Reajuste anual da tarifa (fração)")
+    degradacao_anual: Distribuicao = Field(
+        default_factory=lambda: Distribuicao(tipo="fixa", media=0.0),
+        description="Perda anual de geração (fração)"
+    )
+    variacao_geracao: Distribuicao = Field(
+        default_factory=lambda: Distribuicao(tipo="fixa", media=1.0),
+        description="Fator sobre a geração estimada (1.0 = conforme projetado)"
+    )
+    cenarios: int = Field(10000, ge=100, description="Quantidade de cenários simulados")
+    semente: Optional[int] = Field(None, description="Semente do gerador (resultados reprodutíveis)")
+
+
 class PropostaRequest(BaseModel):
     """Request para geração de proposta - estrutura plana"""
     nome: str = Field(..., description="Nome do cliente")
@@ -28,15 +194,129 @@ class PropostaRequest(BaseModel):
     especificacoes_inversores: str = Field(..., description="Ex: SOFAR 20kW AFCI")
     investimento_kit_fotovoltaico: float = Field(..., ge=0, description="Valor do kit")
     investimento_mao_de_obra: float = Field(..., ge=0, description="Valor da mão de obra")
-    producao_mensal: List[ProducaoMensalModel]
-    retorno_investimento: List[RetornoInvestimentoModel]
+    # Aceitam lista de objetos ou colunas; após a validação são sempre colunas
+    producao_mensal: Union[ProducaoMensalColunas, List[ProducaoMensalModel]]
+    retorno_investimento: Optional[Union[RetornoInvestimentoColunas, List[RetornoInvestimentoModel]]] = Field(
+        None, description="Série de retorno calculada pelo cliente; omita para usar parametros_financeiros"
+    )
+    parametros_financeiros: Optional[ParametrosFinanceiros] = None
+    # Inclui no PDF o gráfico em leque da análise de sensibilidade
+    analise_sensibilidade: Optional[AnaliseSensibilidade] = None
+    
+    @field_validator("producao_mensal", mode="after")
+    @classmethod
+    def _producao_em_colunas(cls, valor):
+        if isinstance(valor, list):
+            return ProducaoMensalColunas.de_linhas(valor)
+        return valor
+    
+    @field_validator("retorno_investimento", mode="after")
+    @classmethod
+    def _retorno_em_colunas(cls, valor):
+        if isinstance(valor, list):
+            return RetornoInvestimentoColunas.de_linhas(valor)
+        return valor
+    
+    @model_validator(mode="after")
+    def _exigir_retorno(self) -> "PropostaRequest":
+        if self.retorno_investimento is None and self.parametros_financeiros is None:
+            raise ValueError("Informe retorno_investimento ou parametros_financeiros")
+        if self.analise_sensibilidade is not None and self.parametros_financeiros is None:
+            raise ValueError("analise_sensibilidade exige parametros_financeiros")
+        return self
+
+
+class ProjecaoRequest(BaseModel):
+    """
+    Projeção do fluxo de caixa para uma ou várias variantes.
+
+    Cada campo aceita um número ou uma lista; listas de mesmo tamanho (ou
+    números, que valem para todas) descrevem as variantes avaliadas de uma vez.
+    """
+    investimento: Union[NaoNegativo, List[NaoNegativo]] = Field(..., description="Investimento total (R$)")
+    geracao_mensal: Union[NaoNegativo, List[NaoNegativo]] = Field(..., description="Geração média mensal (kWh)")
+    tarifa_kwh: Union[
+        Annotated[float, Field(gt=0)], List[Annotated[float, Field(gt=0)]]
+    ] = Field(..., description="Tarifa no primeiro ano (R$/kWh)")
+    inflacao_tarifa: Union[Reajuste, List[Reajuste]] = 0.0
+    degradacao_anual: Union[
+        Annotated[float, Field(ge=0, lt=1)], List[Annotated[float, Field(ge=0, lt=1)]]
+    ] = 0.0
+    custo_om_anual: Union[NaoNegativo, List[NaoNegativo]] = 0.0
+    reajuste_om: Union[Reajuste, List[Reajuste]] = 0.0
+    anos: int = Field(25, ge=1, le=25)
+
+
+class SimulacaoRequest(AnaliseSensibilidade):
+    """Premissas fixas da proposta e distribuições das incertas"""
+    investimento: float = Field(..., gt=0, description="Investimento total (R$)")
+    geracao_mensal: float = Field(..., ge=0, description="Geração média mensal estimada (kWh)")
+    tarifa_kwh: float = Field(..., gt=0, description="Tarifa no primeiro ano (R$/kWh)")
+    custo_om_anual: NaoNegativo = Field(0.0, description="Custo anual de O&M (R$)")
+    reajuste_om: Reajuste = Field(0.0, description="Reajuste anual do custo de O&M")
+    anos: int = Field(25, ge=1, le=25)
+
+
+class AnaliseRequest(BaseModel):
+    """
+    Indicadores financeiros (VPL, TIR, paybacks) de várias propostas.
+
+    Cada linha de economia_anual é a série de uma proposta; investimento e
+    taxa_desconto aceitam um número (vale para todas) ou um valor por linha.
+    """
+    investimento: Union[
+        Annotated[float, Field(gt=0)], List[Annotated[float, Field(gt=0)]]
+    ] = Field(..., description="Investimento total (R$)")
+    # Séries de até 25 anos, o horizonte das projeções
+    economia_anual: List[Annotated[List[float], Field(max_length=25)]] = Field(
+        ..., min_length=1, description="Economia por ano de cada proposta"
+    )
+    taxa_desconto: Optional[Union[TaxaDesconto, List[TaxaDesconto]]] = Field(
+        None, description="Taxa anual para VPL e payback descontado"
+    )
+
+    @model_validator(mode="after")
+    def _validar_formato(self) -> "AnaliseRequest":
+        anos = len(self.economia_anual[0])
+        if anos == 0 or any(len(linha) != anos for linha in self.economia_anual):
+            raise ValueError("As linhas de economia_anual devem ter o mesmo número (não nulo) de anos")
+        propostas = len(self.economia_anual)
+        for nome in ("investimento", "taxa_desconto"):
+            valor = getattr(self, nome)
+            if isinstance(valor, list) and len(valor) not in (1, propostas):
+                raise ValueError(f"{nome} deve ter um valor ou {propostas} valores")
+        return self
 
 
 class PropostaResponse(BaseModel):
     """Response da geração de proposta"""
     success: bool
     message: str
+    proposta_id: Optional[str] = Field(
+        None, description="Id para revisões em /api/v1/proposta/{proposta_id}/revisao (apenas com o PDF salvo)"
+    )
     pdf_filename: Optional[str] = None
     pdf_url: Optional[str] = None
     pdf_base64: Optional[str] = None
     dados_calculados: Optional[Dict[str, Any]] = None
+    perfil: Optional[Dict[str, Any]] = Field(
+        None, description="Resumo do perfilamento e links dos artefatos (apenas com X-Perfil)"
+    )
+    revisao: Optional[Dict[str, Any]] = Field(
+        None, description="Proposta revisada e seções renderizadas ou reaproveitadas (apenas em revisões)"
+    )
+
+
+class JobResponse(BaseModel):
+    """Estado de um job assíncrono de geração de proposta"""
+    job_id: str
+    status: str = Field(..., description="pendente, processando, concluido ou erro")
+    status_url: str
+    posicao_fila: Optional[int] = None
+    criado_em: str
+    concluido_em: Optional[str] = None
+    erro: Optional[str] = None
+    proposta_id: Optional[str] = None
+    pdf_filename: Optional[str] = None
+    pdf_url: Optional[str] = None
+    dados_calculados: Optional[Dict[str, Any]] = None
@@ -1,9 +1,21 @@
-from app.services.graficos import GraficoService
+from typing import TYPE_CHECKING
+
 from app.services.calculos import CalculoService
 from app.services.pdf_generator import PDFGenerator
 
+if TYPE_CHECKING:
+    from app.services.graficos import GraficoService
+
 __all__ = [
     "GraficoService",
     "CalculoService",
     "PDFGenerator"
 ]
+
+
+def __getattr__(nome):
+    # GraficoService importa matplotlib; carregado apenas quando usado
+    if nome == "GraficoService":
+        from app.services.graficos import GraficoService
+        return GraficoService
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
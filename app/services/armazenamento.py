@@ -0,0 +1,256 @@
+"""
+Armazenamento de Propostas
+Diretório gerenciado dos PDFs disponíveis para download.
+
+Os arquivos ficam em subdiretórios (shards) derivados do nome, e um índice
+em memória registra o que existe, com tamanho e último acesso. Consultas e
+downloads não tocam o sistema de arquivos além do próprio arquivo, e uma
+tarefa em segundo plano remove os PDFs expirados (TTL desde o último
+download) e os menos baixados recentemente quando o total passa do limite.
+
+Os artefatos de perfilamento (ver app.services.perfil) e os estados de
+revisão (ver app.services.revisao) ficam ao lado dos PDFs e seguem as mesmas
+regras.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.services.download import calcular_etag
+
+# Arquivos reconhecidos ao reconstruir o índice (PDFs, artefatos de
+# perfilamento e estados de revisão)
+EXTENSOES = (".pdf", ".pstats", ".speedscope.json", ".revisao.json")
+
+
+def nome_valido(nome: str) -> bool:
+    """Nome de arquivo sem separadores de caminho nem `..` (não sai do shard)"""
+    if not nome or nome.startswith(".") or ".." in nome:
+        return False
+    return "/" not in nome and "\\" not in nome
+
+
+def caminho_arquivo(raiz: str, nome: str) -> str:
+    """
+    Caminho do PDF dentro do armazenamento.
+
+    Função pura para que os workers de renderização gravem no mesmo lugar
+    que o índice do processo principal espera encontrar.
+
+    Raises:
+        ValueError: Se o nome não é válido (ver nome_valido)
+    """
+    if not nome_valido(nome):
+        raise ValueError(f"Nome de arquivo inválido: {nome!r}")
+    shard = hashlib.sha1(nome.encode("utf-8")).hexdigest()[:2]
+    return os.path.join(raiz, shard, nome)
+
+
+@dataclass
+class _Entrada:
+    caminho: str
+    tamanho: int
+    ultimo_acesso: float
+    # Calculada no primeiro download (ver obter_etag)
+    etag: Optional[str] = None
+
+
+class ArmazenamentoPropostas:
+    """Índice LRU dos PDFs gravados, com limite de tamanho e TTL"""
+
+    def __init__(
+        self,
+        raiz: str,
+        max_bytes: int,
+        ttl_segundos: int,
+        intervalo_limpeza: int = 60
+    ):
+        """
+        Args:
+            raiz: Diretório base (OUTPUT_DIR)
+            max_bytes: Tamanho máximo somado dos PDFs (0 = sem limite)
+            ttl_segundos: Tempo sem downloads até o PDF expirar (0 = sem TTL)
+            intervalo_limpeza: Segundos entre execuções da limpeza
+        """
+        self.raiz = raiz
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self.intervalo_limpeza = intervalo_limpeza
+        # Ordenado do acesso mais antigo para o mais recente
+        self._indice: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._bytes = 0
+        self._removidos = 0
+        self._tarefa: Optional[asyncio.Task] = None
+        self._acordar: Optional[asyncio.Event] = None
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def carregar(self):
+        """
+        Reconstrói o índice a partir do disco (executado uma vez na inicialização).
+
+        PDFs antigos gravados direto na raiz também entram no índice, de modo
+        que links já distribuídos continuam válidos até expirarem.
+        """
+        os.makedirs(self.raiz, exist_ok=True)
+        encontrados: List[Tuple[float, str, str, int]] = []
+        for diretorio in [self.raiz] + [
+            entrada.path for entrada in os.scandir(self.raiz) if entrada.is_dir()
+        ]:
+            with os.scandir(diretorio) as entradas:
+                for entrada in entradas:
+                    if not entrada.is_file() or not entrada.name.endswith(EXTENSOES):
+                        continue
+                    info = entrada.stat()
+                    encontrados.append((info.st_mtime, entrada.name, entrada.path, info.st_size))
+
+        encontrados.sort()
+        self._indice.clear()
+        self._bytes = 0
+        for mtime, nome, caminho, tamanho in encontrados:
+            self._indice[nome] = _Entrada(caminho, tamanho, mtime)
+            self._bytes += tamanho
+
+    def iniciar(self):
+        """Carrega o índice e agenda a limpeza periódica"""
+        self.carregar()
+        self._acordar = asyncio.Event()
+        if self._tarefa is None:
+            self._tarefa = asyncio.ensure_future(self._limpar_periodicamente())
+
+    async def encerrar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    def registrar(self, nome: str):
+        """Adiciona ao índice um PDF recém-gravado pelo worker"""
+        caminho = caminho_arquivo(self.raiz, nome)
+        try:
+            tamanho = os.path.getsize(caminho)
+        except FileNotFoundError:
+            return
+        self._inserir(nome, _Entrada(caminho, tamanho, time.time()))
+        if self.max_bytes and self._bytes > self.max_bytes and self._acordar is not None:
+            self._acordar.set()
+
+    def existe(self, nome: str) -> bool:
+        return self._localizar(nome) is not None
+
+    def abrir_para_download(self, nome: str) -> Optional[str]:
+        """Caminho do PDF para download, renovando o último acesso (None se não existe)"""
+        entrada = self._localizar(nome)
+        if entrada is None:
+            return None
+        entrada.ultimo_acesso = time.time()
+        self._indice.move_to_end(nome)
+        return entrada.caminho
+
+    async def obter_etag(self, nome: str) -> Optional[str]:
+        """
+        ETag forte do arquivo (hash do conteúdo), calculada fora do event loop
+        no primeiro download e mantida no índice (None se não existe).
+        """
+        entrada = self._localizar(nome)
+        if entrada is None:
+            return None
+        if entrada.etag is None:
+            try:
+                entrada.etag = await asyncio.to_thread(calcular_etag, entrada.caminho)
+            except FileNotFoundError:
+                return None
+        return entrada.etag
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {
+            "arquivos": len(self._indice),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_segundos": self.ttl_segundos,
+            "removidos": self._removidos
+        }
+
+    def _localizar(self, nome: str) -> Optional[_Entrada]:
+        entrada = self._indice.get(nome)
+        if entrada is not None:
+            return entrada
+        # Gravado por outro processo da API depois da carga do índice
+        if not nome_valido(nome):
+            return None
+        caminho = caminho_arquivo(self.raiz, nome)
+        try:
+            tamanho = os.path.getsize(caminho)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        entrada = _Entrada(caminho, tamanho, time.time())
+        self._inserir(nome, entrada)
+        return entrada
+
+    def _inserir(self, nome: str, entrada: _Entrada):
+        anterior = self._indice.pop(nome, None)
+        if anterior is not None:
+            self._bytes -= anterior.tamanho
+        self._indice[nome] = entrada
+        self._bytes += entrada.tamanho
+
+    def _selecionar_remocao(self) -> List[str]:
+        """
+        Retira do índice os PDFs a remover e retorna seus caminhos.
+
+        Percorre apenas a cabeça do LRU: para no primeiro PDF que não está
+        expirado quando o total já cabe no limite.
+        """
+        limite_ttl = time.time() - self.ttl_segundos if self.ttl_segundos else None
+        caminhos = []
+        while self._indice:
+            nome, entrada = next(iter(self._indice.items()))
+            expirado = limite_ttl is not None and entrada.ultimo_acesso < limite_ttl
+            excedente = bool(self.max_bytes) and self._bytes > self.max_bytes
+            if not (expirado or excedente):
+                break
+            self._indice.popitem(last=False)
+            self._bytes -= entrada.tamanho
+            caminhos.append(entrada.caminho)
+        return caminhos
+
+    def limpar(self) -> int:
+        """Remove os PDFs expirados ou excedentes; retorna quantos foram removidos"""
+        caminhos = self._selecionar_remocao()
+        _remover_arquivos(caminhos)
+        self._removidos += len(caminhos)
+        return len(caminhos)
+
+    async def _limpar_periodicamente(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._acordar.wait(), self.intervalo_limpeza)
+            except asyncio.TimeoutError:
+                pass
+            self._acordar.clear()
+            caminhos = self._selecionar_remocao()
+            if caminhos:
+                # remoção fora do event loop; o índice já foi atualizado
+                await asyncio.to_thread(_remover_arquivos, caminhos)
+                self._removidos += len(caminhos)
+
+
+def _remover_arquivos(caminhos: List[str]):
+    for caminho in caminhos:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
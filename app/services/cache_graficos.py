@@ -0,0 +1,126 @@
+"""
+Cache de Gráficos
+Guarda os PNGs já renderizados em memória (LRU) e, opcionalmente, em disco.
+
+O diretório em disco é compartilhado entre os workers do pool, de modo que
+um gráfico renderizado por um processo é reaproveitado pelos demais.
+"""
+
+import os
+import uuid
+from typing import Dict, Optional
+
+from app.utils.cache import CacheLRU
+
+
+class CacheGraficos:
+    """Cache de PNGs indexado por uma chave de conteúdo (hash hexadecimal)"""
+
+    # A cada quantas gravações o diretório em disco é podado
+    INTERVALO_PODA = 32
+
+    def __init__(
+        self,
+        max_itens: int = 64,
+        diretorio: Optional[str] = None,
+        max_bytes_disco: int = 256 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_itens: PNGs mantidos em memória (0 = sem cache em memória)
+            diretorio: Diretório para spill em disco (None desativa)
+            max_bytes_disco: Tamanho máximo do diretório em disco
+        """
+        self._memoria = CacheLRU(max_itens=max_itens) if max_itens > 0 else None
+        self.diretorio = diretorio
+        self.max_bytes_disco = max_bytes_disco
+        self._gravacoes = 0
+        self.hits = 0
+        self.misses = 0
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    def obter(self, chave: str) -> Optional[bytes]:
+        """Retorna o PNG armazenado (memória, depois disco) ou None"""
+        if self._memoria is not None:
+            png = self._memoria.obter(chave)
+            if png is not None:
+                self.hits += 1
+                return png
+
+        png = self._ler_disco(chave)
+        if png is not None:
+            self.hits += 1
+            if self._memoria is not None:
+                self._memoria.inserir(chave, png, len(png))
+            return png
+
+        self.misses += 1
+        return None
+
+    def inserir(self, chave: str, png: bytes):
+        if self._memoria is not None:
+            self._memoria.inserir(chave, png, len(png))
+        self._gravar_disco(chave, png)
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "itens_memoria": len(self._memoria) if self._memoria is not None else 0,
+            "bytes_memoria": self._memoria.bytes if self._memoria is not None else 0
+        }
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.png")
+
+    def _ler_disco(self, chave: str) -> Optional[bytes]:
+        if not self.diretorio:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "rb") as f:
+                png = f.read()
+            # mtime serve de "último uso" para a poda
+            os.utime(caminho)
+            return png
+        except FileNotFoundError:
+            return None
+
+    def _gravar_disco(self, chave: str, png: bytes):
+        if not self.diretorio:
+            return
+        # Grava em arquivo temporário e renomeia: outros workers nunca leem um PNG parcial
+        temporario = os.path.join(self.diretorio, f".{chave}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(temporario, "wb") as f:
+            f.write(png)
+        os.replace(temporario, self._caminho(chave))
+
+        self._gravacoes += 1
+        if self._gravacoes % self.INTERVALO_PODA == 0:
+            self._podar_disco()
+
+    def _podar_disco(self):
+        """Remove os PNGs usados há mais tempo até caber em max_bytes_disco"""
+        arquivos = []
+        total = 0
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith(".png"):
+                    continue
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((info.st_mtime, info.st_size, entrada.path))
+                total += info.st_size
+
+        arquivos.sort()
+        for _, tamanho, caminho in arquivos:
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
@@ -0,0 +1,104 @@
+"""
+Cache de Resultados
+Reaproveita propostas já geradas para payloads idênticos (retries do CRM,
+cliques repetidos em "gerar") e coalesce requisições concorrentes iguais.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.utils.cache import CacheLRU
+
+
+def chave_requisicao(
+    request: BaseModel,
+    opcoes: Optional[Any] = None,
+    extras: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Gera a chave canônica (SHA-256) de uma requisição validada.
+
+    O JSON é serializado com chaves ordenadas e sem espaços, de modo que
+    payloads equivalentes (ordem de campos, 1 vs 1.0 após validação) geram
+    a mesma chave. As opções de renderização entram na chave porque alteram
+    o resultado, assim como `extras` (ex.: a versão do template).
+    """
+    conteudo: Dict[str, Any] = {"request": request.model_dump(mode="json")}
+    if opcoes is not None:
+        conteudo["opcoes"] = dataclasses.asdict(opcoes)
+    if extras:
+        conteudo["extras"] = extras
+    serializado = json.dumps(conteudo, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+class CacheResultados:
+    """
+    Cache LRU de respostas com coalescência (single-flight).
+
+    Enquanto uma chave está sendo renderizada, requisições idênticas aguardam
+    a mesma tarefa em vez de disparar outra renderização.
+    """
+
+    def __init__(
+        self,
+        max_itens: int = 256,
+        max_bytes: int = 256 * 1024 * 1024,
+        tamanho: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        Args:
+            max_itens: Quantidade máxima de respostas (0 desativa o cache)
+            max_bytes: Tamanho máximo somado das respostas
+            tamanho: Função que estima o tamanho em bytes de uma resposta
+        """
+        self.ativo = max_itens > 0
+        self._lru = CacheLRU(max_itens=max_itens, max_bytes=max_bytes)
+        self._tamanho = tamanho or (lambda valor: 0)
+        self._em_voo: Dict[str, asyncio.Future] = {}
+        self.coalescidos = 0
+
+    async def obter_ou_gerar(self, chave: str, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Retorna a resposta armazenada para `chave` ou a gera com `fabrica`.
+
+        Erros não são armazenados; todas as requisições coalescidas recebem
+        a mesma exceção.
+        """
+        if not self.ativo:
+            return await fabrica()
+
+        valor = self._lru.obter(chave)
+        if valor is not None:
+            return valor
+
+        tarefa = self._em_voo.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(self._gerar(chave, fabrica))
+            self._em_voo[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._em_voo.pop(chave, None))
+        else:
+            self.coalescidos += 1
+
+        # shield: o cancelamento de um cliente não interrompe a renderização
+        # compartilhada com os demais
+        return await asyncio.shield(tarefa)
+
+    def invalidar(self, chave: str):
+        self._lru.remover(chave)
+
+    def estatisticas(self) -> Dict[str, int]:
+        estatisticas = self._lru.estatisticas()
+        estatisticas["coalescidos"] = self.coalescidos
+        estatisticas["em_voo"] = len(self._em_voo)
+        return estatisticas
+
+    async def _gerar(self, chave: str, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        valor = await fabrica()
+        self._lru.inserir(chave, valor, self._tamanho(valor))
+        return valor
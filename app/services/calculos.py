@@ -3,8 +3,158 @@ Serviço de Cálculos
 Funções auxiliares para cálculos da proposta solar
 """
 
-from typing import List, Tuple, Optional
-from app.models.proposta import RetornoInvestimentoModel
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from app.models.proposta import (
+    AnaliseSensibilidade,
+    Distribuicao,
+    ParametrosFinanceiros,
+    ProducaoMensalColunas,
+    RetornoInvestimentoColunas,
+)
+
+# Percentis reportados pela simulação de Monte Carlo
+PERCENTIS = (5, 10, 25, 50, 75, 90, 95)
+
+# Maior saldo (R$, em módulo) que a simulação resume
+LIMITE_SALDO = 1e15
+
+
+@dataclass
+class ProjecaoFluxoCaixa:
+    """
+    Séries anuais projetadas. Com parâmetros vetoriais, cada array tem
+    formato (variantes, anos); com escalares, (anos,).
+    """
+    ano: np.ndarray
+    economia_anual: np.ndarray
+    economia_mensal: np.ndarray
+    saldo: np.ndarray
+
+    def colunas(self, indice: Optional[int] = None) -> RetornoInvestimentoColunas:
+        """Série de uma variante no formato de retorno_investimento"""
+        selecionar = (lambda serie: serie) if indice is None else (lambda serie: serie[indice])
+        return RetornoInvestimentoColunas.model_construct(
+            ano=self.ano,
+            saldo=selecionar(self.saldo),
+            economia_mensal=selecionar(self.economia_mensal),
+            economia_anual=selecionar(self.economia_anual)
+        )
+
+
+@dataclass
+class SimulacaoMonteCarlo:
+    """Resultado de CalculoService.simular_monte_carlo"""
+    ano: np.ndarray
+    # Primeiro ano com saldo positivo por cenário (0 = não se paga no horizonte)
+    anos_payback: np.ndarray
+    economia_total: np.ndarray
+    # Percentis (PERCENTIS) do saldo em cada ano: formato (len(PERCENTIS), anos)
+    faixas_saldo: np.ndarray
+
+    @property
+    def calculavel(self) -> bool:
+        """
+        Se os saldos são finitos e pequenos o bastante para o resumo: perto
+        do limite do float64 a largura do histograma estoura.
+        """
+        with np.errstate(invalid="ignore"):
+            return all(
+                np.isfinite(serie).all() and np.abs(serie).max(initial=0.0) < LIMITE_SALDO
+                for serie in (self.economia_total, self.faixas_saldo)
+            )
+
+    def resumo(self, faixas_histograma: int = 20) -> Dict[str, Any]:
+        """Estatísticas da simulação prontas para serializar em JSON"""
+        cenarios = len(self.anos_payback)
+        pagos = self.anos_payback > 0
+        # Cenários sem payback contam como "depois do horizonte" nos percentis
+        payback = np.where(pagos, self.anos_payback, np.inf)
+        percentis_payback = np.percentile(payback, PERCENTIS, method="inverted_cdf")
+        contagem_anos = np.bincount(self.anos_payback[pagos], minlength=len(self.ano) + 1)[1:]
+
+        frequencias, limites = np.histogram(self.economia_total, bins=faixas_histograma)
+        return {
+            "cenarios": cenarios,
+            "payback": {
+                "probabilidade_no_horizonte": round(float(pagos.mean()), 4),
+                "percentis": {
+                    f"p{p}": (int(valor) if np.isfinite(valor) else None)
+                    for p, valor in zip(PERCENTIS, percentis_payback)
+                },
+                "probabilidade_por_ano": {
+                    int(ano): round(float(quantidade / cenarios), 4)
+                    for ano, quantidade in zip(self.ano, contagem_anos) if quantidade
+                }
+            },
+            "economia_total": {
+                "media": round(float(self.economia_total.mean()), 2),
+                "desvio": round(float(self.economia_total.std()), 2),
+                "percentis": {
+                    f"p{p}": round(float(valor), 2)
+                    for p, valor in zip(PERCENTIS, np.percentile(self.economia_total, PERCENTIS))
+                },
+                "histograma": {
+                    "limites": np.round(limites, 2).tolist(),
+                    "frequencias": frequencias.tolist()
+                }
+            },
+            "faixas_saldo": {
+                "ano": self.ano.tolist(),
+                **{f"p{p}": np.round(faixa, 2).tolist() for p, faixa in zip(PERCENTIS, self.faixas_saldo)}
+            }
+        }
+
+
+@dataclass
+class AnaliseFinanceira:
+    """
+    Indicadores por proposta (arrays de formato (propostas,)); NaN onde o
+    indicador não existe (ex.: investimento que não se paga no horizonte).
+    """
+    vpl: np.ndarray
+    tir: np.ndarray
+    # Mesma convenção de encontrar_ano_payback: primeiro ano com saldo positivo (0 = nunca)
+    ano_payback: np.ndarray
+    # Anos desde a instalação até a economia acumulada superar o investimento
+    # (nulo junto com ano_payback; ver _payback_fracionado)
+    payback_fracionado: np.ndarray
+    payback_descontado: np.ndarray
+
+    @property
+    def calculavel(self) -> bool:
+        """Se nenhum indicador estourou o float64 (NaN marca indicador inexistente)"""
+        return bool(np.isfinite(self.vpl).all()) and not any(
+            np.isinf(indicador).any()
+            for indicador in (self.tir, self.payback_fracionado, self.payback_descontado)
+        )
+
+    def como_dict(self, indice: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Indicadores em formato JSON, com None no lugar de NaN (e de ano 0).
+
+        Args:
+            indice: Proposta a extrair; None retorna listas com todas
+        """
+        selecao = slice(None) if indice is None else slice(indice, indice + 1)
+
+        def _valores(valores: np.ndarray, casas: int):
+            # + 0.0 normaliza -0.0 (ex.: TIR que converge para zero pela esquerda)
+            lista = [None if np.isnan(valor) else round(float(valor), casas) + 0.0 for valor in valores[selecao]]
+            return lista if indice is None else lista[0]
+
+        anos = [int(ano) if ano else None for ano in self.ano_payback[selecao]]
+        return {
+            "vpl": _valores(self.vpl, 2),
+            "tir": _valores(self.tir, 6),
+            "ano_payback": anos if indice is None else anos[0],
+            "payback_fracionado": _valores(self.payback_fracionado, 2),
+            "payback_descontado": _valores(self.payback_descontado, 2)
+        }
 
 
 class CalculoService:
@@ -29,38 +179,324 @@ class CalculoService:
     
     def encontrar_ano_payback(
         self,
-        dados_retorno: List[RetornoInvestimentoModel]
+        dados_retorno: RetornoInvestimentoColunas
     ) -> Tuple[Optional[int], Optional[float]]:
         """
         Encontra o primeiro ano em que o saldo se torna positivo.
         
         Args:
-            dados_retorno: Lista com dados de retorno por ano
+            dados_retorno: Colunas com dados de retorno por ano
             
         Returns:
             Tupla (ano_payback, valor_saldo) ou (None, None) se não encontrado
         """
-        for item in dados_retorno:
-            if item.saldo > 0:
-                return item.ano, item.saldo
-        return None, None
+        indice, encontrado = _primeiro_verdadeiro(dados_retorno.saldo > 0)
+        if not encontrado:
+            return None, None
+        return int(dados_retorno.ano[indice]), float(dados_retorno.saldo[indice])
     
     def calcular_economia_total(
         self,
-        dados_retorno: List[RetornoInvestimentoModel]
+        dados_retorno: RetornoInvestimentoColunas
     ) -> float:
         """
         Retorna a economia acumulada no último ano (25 anos).
         
         Args:
-            dados_retorno: Lista com dados de retorno por ano
+            dados_retorno: Colunas com dados de retorno por ano
             
         Returns:
             Economia acumulada em 25 anos
         """
-        if not dados_retorno:
+        if len(dados_retorno) == 0:
             return 0.0
-        return dados_retorno[-1].saldo
+        return float(dados_retorno.saldo[-1])
+    
+    def projetar_fluxo_caixa(
+        self,
+        investimento: ArrayLike,
+        geracao_mensal: ArrayLike,
+        tarifa_kwh: ArrayLike,
+        inflacao_tarifa: ArrayLike = 0.0,
+        degradacao_anual: ArrayLike = 0.0,
+        custo_om_anual: ArrayLike = 0.0,
+        reajuste_om: ArrayLike = 0.0,
+        anos: int = 25
+    ) -> ProjecaoFluxoCaixa:
+        """
+        Projeta economia e saldo ano a ano.
+        
+        Todos os parâmetros aceitam escalares ou arrays (broadcasting do
+        NumPy): várias variantes são avaliadas numa única chamada.
+        
+        Segue a convenção da série enviada pelos clientes: o saldo do ano N
+        é o investimento negativo somado à economia dos anos anteriores a N
+        (no ano 1, saldo = -investimento).
+        
+        Args:
+            investimento: Investimento total (R$)
+            geracao_mensal: Geração média mensal no primeiro ano (kWh)
+            tarifa_kwh: Tarifa no primeiro ano (R$/kWh)
+            inflacao_tarifa: Reajuste anual da tarifa (fração)
+            degradacao_anual: Perda anual de geração (fração)
+            custo_om_anual: Custo anual de O&M no primeiro ano (R$)
+            reajuste_om: Reajuste anual do custo de O&M (fração)
+            anos: Horizonte da projeção
+            
+        Returns:
+            ProjecaoFluxoCaixa com as séries de cada variante
+        """
+        # Sem broadcast_arrays: premissas escalares continuam escalares e as
+        # potências são calculadas só sobre os anos (formato (anos,))
+        (investimento, geracao_mensal, tarifa_kwh, inflacao_tarifa,
+         degradacao_anual, custo_om_anual, reajuste_om) = [
+            np.asarray(valor, dtype=np.float64)[..., np.newaxis] for valor in (
+                investimento, geracao_mensal, tarifa_kwh, inflacao_tarifa,
+                degradacao_anual, custo_om_anual, reajuste_om
+            )
+        ]
+        
+        expoente = np.arange(anos, dtype=np.float64)
+        # Degradação e reajuste da tarifa combinados numa única potência
+        crescimento = ((1 - degradacao_anual) * (1 + inflacao_tarifa)) ** expoente
+        economia_anual = 12 * geracao_mensal * tarifa_kwh * crescimento
+        economia_anual = economia_anual - custo_om_anual * (1 + reajuste_om) ** expoente
+        
+        formato = np.broadcast_shapes(economia_anual.shape, investimento.shape)
+        saldo = np.empty(formato)
+        saldo[..., 0] = 0.0
+        np.cumsum(np.broadcast_to(economia_anual, formato)[..., :-1], axis=-1, out=saldo[..., 1:])
+        saldo -= investimento
+        economia_anual = np.broadcast_to(economia_anual, formato)
+        
+        return ProjecaoFluxoCaixa(
+            ano=np.arange(1, anos + 1),
+            economia_anual=economia_anual,
+            economia_mensal=economia_anual / 12,
+            saldo=saldo
+        )
+    
+    def encontrar_anos_payback(self, projecao: ProjecaoFluxoCaixa) -> np.ndarray:
+        """
+        Primeiro ano com saldo positivo de cada variante.
+        
+        Args:
+            projecao: Resultado de projetar_fluxo_caixa
+            
+        Returns:
+            Array de anos (0 onde o saldo nunca fica positivo)
+        """
+        indice, encontrado = _primeiro_verdadeiro(projecao.saldo > 0)
+        return np.where(encontrado, projecao.ano[indice], 0)
+    
+    def analisar_fluxos(
+        self,
+        investimento: ArrayLike,
+        economia_anual: ArrayLike,
+        taxa_desconto: ArrayLike = np.nan
+    ) -> AnaliseFinanceira:
+        """
+        VPL, TIR e paybacks (simples, fracionado e descontado) de várias
+        propostas de uma vez.
+        
+        O fluxo de cada proposta é -investimento no instante 0 seguido da
+        economia de cada ano. Todos os cálculos operam sobre a matriz
+        (propostas x anos), sem laços em Python por proposta.
+        
+        Args:
+            investimento: Investimento de cada proposta, formato (propostas,)
+            economia_anual: Economia por ano, formato (propostas, anos)
+            taxa_desconto: Taxa anual para VPL e payback descontado (escalar ou
+                por proposta); NaN deixa esses indicadores como NaN
+            
+        Returns:
+            AnaliseFinanceira com os indicadores de cada proposta
+        """
+        economia = np.atleast_2d(np.asarray(economia_anual, dtype=np.float64))
+        propostas, anos = economia.shape
+        investimento = np.broadcast_to(np.asarray(investimento, dtype=np.float64), (propostas,))
+        taxa = np.broadcast_to(np.asarray(taxa_desconto, dtype=np.float64), (propostas,))
+        
+        acumulado = np.cumsum(economia, axis=1)
+        
+        # Saldo no início de cada ano, como na série de retorno_investimento
+        saldo = np.empty_like(economia)
+        saldo[:, :1] = 0.0
+        saldo[:, 1:] = acumulado[:, :-1]
+        saldo -= investimento[:, np.newaxis]
+        indice, encontrado = _primeiro_verdadeiro(saldo > 0)
+        ano_payback = np.where(encontrado, indice + 1, 0)
+        
+        fator = (1 + taxa[:, np.newaxis]) ** -np.arange(1, anos + 1, dtype=np.float64)
+        descontado = economia * fator
+        vpl = descontado.sum(axis=1) - investimento
+        
+        return AnaliseFinanceira(
+            vpl=vpl,
+            tir=_tir(investimento, economia),
+            ano_payback=ano_payback,
+            payback_fracionado=_payback_fracionado(investimento, economia, acumulado),
+            payback_descontado=_payback_fracionado(investimento, descontado, np.cumsum(descontado, axis=1))
+        )
+    
+    def analisar_proposta(
+        self,
+        investimento_total: float,
+        dados_retorno: RetornoInvestimentoColunas,
+        taxa_desconto: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Indicadores de uma proposta, calculados por analisar_fluxos sobre uma
+        matriz de uma linha para coincidir com a análise em lote.
+        
+        Args:
+            investimento_total: Investimento total
+            dados_retorno: Série de retorno (usa economia_anual)
+            taxa_desconto: Taxa para VPL e payback descontado (opcional)
+            
+        Returns:
+            Dicionário com vpl, tir, ano_payback, payback_fracionado e payback_descontado
+        """
+        analise = self.analisar_fluxos(
+            investimento_total,
+            dados_retorno.economia_anual[np.newaxis, :],
+            np.nan if taxa_desconto is None else taxa_desconto
+        )
+        return analise.como_dict(0)
+    
+    def simular_monte_carlo(
+        self,
+        investimento: float,
+        geracao_mensal: float,
+        tarifa_kwh: float,
+        sensibilidade: AnaliseSensibilidade,
+        custo_om_anual: float = 0.0,
+        reajuste_om: float = 0.0,
+        anos: int = 25
+    ) -> SimulacaoMonteCarlo:
+        """
+        Simula cenários de inflação da tarifa, degradação e variação da geração.
+        
+        Cada cenário sorteia as premissas incertas uma vez e é projetado por
+        projetar_fluxo_caixa; todos os cenários são avaliados numa única
+        chamada vetorizada.
+        
+        Args:
+            investimento: Investimento total (R$)
+            geracao_mensal: Geração média mensal estimada (kWh)
+            tarifa_kwh: Tarifa no primeiro ano (R$/kWh)
+            sensibilidade: Distribuições, quantidade de cenários e semente
+            custo_om_anual: Custo anual de O&M (R$)
+            reajuste_om: Reajuste anual do custo de O&M
+            anos: Horizonte da projeção
+            
+        Returns:
+            SimulacaoMonteCarlo com payback, economia total e faixas de saldo
+        """
+        rng = np.random.default_rng(sensibilidade.semente)
+        cenarios = sensibilidade.cenarios
+        
+        inflacao = _amostrar(sensibilidade.inflacao_tarifa, rng, cenarios)
+        degradacao = np.clip(_amostrar(sensibilidade.degradacao_anual, rng, cenarios), 0.0, 0.99)
+        fator_geracao = np.clip(_amostrar(sensibilidade.variacao_geracao, rng, cenarios), 0.0, None)
+        
+        projecao = self.projetar_fluxo_caixa(
+            investimento=investimento,
+            geracao_mensal=geracao_mensal * fator_geracao,
+            tarifa_kwh=tarifa_kwh,
+            inflacao_tarifa=inflacao,
+            degradacao_anual=degradacao,
+            custo_om_anual=custo_om_anual,
+            reajuste_om=reajuste_om,
+            anos=anos
+        )
+        
+        return SimulacaoMonteCarlo(
+            ano=projecao.ano,
+            anos_payback=self.encontrar_anos_payback(projecao),
+            economia_total=projecao.saldo[:, -1].copy(),
+            faixas_saldo=_percentis_colunas(projecao.saldo, PERCENTIS)
+        )
+    
+    def simular_proposta(
+        self,
+        investimento_total: float,
+        producao: ProducaoMensalColunas,
+        parametros: ParametrosFinanceiros,
+        sensibilidade: AnaliseSensibilidade
+    ) -> SimulacaoMonteCarlo:
+        """Monte Carlo com as premissas fixas de uma proposta (ver projetar_retorno)"""
+        geracao = parametros.geracao_mensal
+        if geracao is None:
+            geracao = self.calcular_geracao_media_mensal(producao)
+        return self.simular_monte_carlo(
+            investimento=investimento_total,
+            geracao_mensal=geracao,
+            tarifa_kwh=parametros.tarifa_kwh,
+            sensibilidade=sensibilidade,
+            custo_om_anual=parametros.custo_om_anual,
+            reajuste_om=parametros.reajuste_om,
+            anos=parametros.anos
+        )
+    
+    def projetar_retorno(
+        self,
+        investimento_total: float,
+        producao: ProducaoMensalColunas,
+        parametros: ParametrosFinanceiros
+    ) -> RetornoInvestimentoColunas:
+        """
+        Série de retorno de uma proposta a partir das premissas financeiras.
+        
+        Args:
+            investimento_total: Investimento total (R$)
+            producao: Produção mensal, usada quando a geração não é informada
+            parametros: Premissas financeiras da proposta
+            
+        Returns:
+            Colunas no mesmo formato de retorno_investimento
+        """
+        geracao = parametros.geracao_mensal
+        if geracao is None:
+            geracao = self.calcular_geracao_media_mensal(producao)
+        
+        projecao = self.projetar_fluxo_caixa(
+            investimento=investimento_total,
+            geracao_mensal=geracao,
+            tarifa_kwh=parametros.tarifa_kwh,
+            inflacao_tarifa=parametros.inflacao_tarifa,
+            degradacao_anual=parametros.degradacao_anual,
+            custo_om_anual=parametros.custo_om_anual,
+            reajuste_om=parametros.reajuste_om,
+            anos=parametros.anos
+        )
+        # Centavos, como nas séries enviadas pelos clientes (economia_anual
+        # pode ser uma view somente leitura de broadcast_to: sem arredondar no lugar)
+        return replace(
+            projecao,
+            saldo=np.round(projecao.saldo, 2),
+            economia_mensal=np.round(projecao.economia_mensal, 2),
+            economia_anual=np.round(projecao.economia_anual, 2)
+        ).colunas()
+    
+    def calcular_geracao_media_mensal(self, producao: ProducaoMensalColunas) -> float:
+        """
+        Geração média mensal: a linha 'média' quando enviada, senão a média dos meses.
+        
+        Args:
+            producao: Produção mensal em colunas
+            
+        Returns:
+            Geração média mensal em kWh
+        """
+        meses = []
+        for indice, mes in enumerate(producao.mes):
+            if not isinstance(mes, int):
+                return float(producao.geracao_total[indice])
+            meses.append(indice)
+        if not meses:
+            return 0.0
+        return float(producao.geracao_total[meses].mean())
     
     def calcular_potencia_sistema(
         self,
@@ -97,3 +533,108 @@ class CalculoService:
         if quantidade_modulos == 0:
             return 0.0
         return geracao_total / quantidade_modulos
+
+
+def _amostrar(distribuicao: Distribuicao, rng: np.random.Generator, quantidade: int) -> np.ndarray:
+    """Sorteia `quantidade` valores da distribuição"""
+    if distribuicao.tipo == "fixa":
+        return np.full(quantidade, distribuicao.media)
+    if distribuicao.tipo == "normal":
+        amostras = rng.normal(distribuicao.media, distribuicao.desvio, quantidade)
+        if distribuicao.minimo is not None or distribuicao.maximo is not None:
+            np.clip(amostras, distribuicao.minimo, distribuicao.maximo, out=amostras)
+        return amostras
+    if distribuicao.tipo == "uniforme":
+        return rng.uniform(distribuicao.minimo, distribuicao.maximo, quantidade)
+    if distribuicao.minimo == distribuicao.maximo:
+        return np.full(quantidade, distribuicao.minimo)
+    return rng.triangular(distribuicao.minimo, distribuicao.moda, distribuicao.maximo, quantidade)
+
+
+def _percentis_colunas(matriz: np.ndarray, percentis: Tuple[int, ...]) -> np.ndarray:
+    """
+    Percentis de cada coluna, com a mesma interpolação linear de np.percentile.
+
+    Ordenar as colunas uma vez é bem mais rápido que np.percentile com
+    vários percentis sobre matrizes de muitas linhas.
+    """
+    ordenada = np.sort(matriz, axis=0)
+    posicoes = np.asarray(percentis, dtype=np.float64) / 100 * (len(ordenada) - 1)
+    abaixo = np.floor(posicoes).astype(np.int64)
+    acima = np.minimum(abaixo + 1, len(ordenada) - 1)
+    fracao = (posicoes - abaixo)[:, np.newaxis]
+    return ordenada[abaixo] * (1 - fracao) + ordenada[acima] * fracao
+
+
+def _primeiro_verdadeiro(mascara: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Índice do primeiro True no último eixo e se algum foi encontrado"""
+    if mascara.shape[-1] == 0:
+        # argmax não aceita sequências vazias: nenhum encontrado
+        vazio = np.zeros(mascara.shape[:-1], dtype=np.intp)
+        return vazio, vazio.astype(bool)
+    return mascara.argmax(axis=-1), mascara.any(axis=-1)
+
+
+def _payback_fracionado(investimento: np.ndarray, fluxos: np.ndarray, acumulado: np.ndarray) -> np.ndarray:
+    """
+    Tempo (em anos) até o acumulado superar o investimento, interpolando
+    linearmente dentro do ano em que isso acontece.
+
+    Mesma convenção do ano_payback: só conta se algum ano da série começa
+    com saldo positivo, ou seja, se o acumulado supera o investimento antes
+    do último ano. Assim os dois são nulos juntos e, quando existem,
+    ano_payback = floor(payback) + 2.
+    """
+    indice, encontrado = _primeiro_verdadeiro(acumulado[:, :-1] > investimento[:, np.newaxis])
+    if fluxos.shape[-1] == 0:
+        return np.full(len(fluxos), np.nan)
+    linhas = np.arange(len(fluxos))
+    anterior = np.where(indice > 0, acumulado[linhas, indice - 1], 0.0)
+    fluxo = fluxos[linhas, indice]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fracao = np.where(fluxo > 0, (investimento - anterior) / fluxo, 0.0)
+    return np.where(encontrado, indice + np.clip(fracao, 0.0, 1.0), np.nan)
+
+
+def _tir(investimento: np.ndarray, economia: np.ndarray, iteracoes: int = 60, tolerancia: float = 1e-10) -> np.ndarray:
+    """
+    TIR de cada linha por Newton protegido por bisseção, vetorizado.
+
+    Com investimento positivo e economias não negativas o VPL decresce com a
+    taxa, então existe no máximo uma raiz em (-1, +inf). O intervalo
+    [minimo, maximo] sempre contém a raiz; passos de Newton que saem dele são
+    trocados pelo ponto médio.
+    """
+    anos = economia.shape[1]
+    expoentes = np.arange(1, anos + 1, dtype=np.float64)
+
+    def _vpl_derivada(taxa: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        desconto = (1 + taxa[:, np.newaxis]) ** -expoentes
+        vpl = (economia * desconto).sum(axis=1) - investimento
+        derivada = -(economia * expoentes * desconto / (1 + taxa[:, np.newaxis])).sum(axis=1)
+        return vpl, derivada
+
+    minimo = np.full(len(economia), -0.99)
+    maximo = np.full(len(economia), 10.0)
+    vpl_minimo, _ = _vpl_derivada(minimo)
+    vpl_maximo, _ = _vpl_derivada(maximo)
+    # Sem troca de sinal no intervalo não há TIR (ex.: economia nula)
+    existe = (vpl_minimo > 0) & (vpl_maximo < 0)
+
+    taxa = np.full(len(economia), 0.1)
+    ativo = existe.copy()
+    for _ in range(iteracoes):
+        if not ativo.any():
+            break
+        vpl, derivada = _vpl_derivada(taxa)
+        # VPL decrescente: positivo => raiz à direita
+        minimo = np.where(ativo & (vpl > 0), taxa, minimo)
+        maximo = np.where(ativo & (vpl <= 0), taxa, maximo)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = taxa - vpl / derivada
+        fora = ~((newton > minimo) & (newton < maximo))
+        proxima = np.where(fora, (minimo + maximo) / 2, newton)
+        ativo &= np.abs(proxima - taxa) > tolerancia
+        taxa = np.where(existe, proxima, taxa)
+
+    return np.where(existe, taxa, np.nan)
@@ -0,0 +1,156 @@
+"""
+Download Condicional
+Cabeçalhos de cache, requisições condicionais e intervalos de bytes para os
+arquivos do armazenamento.
+
+Um arquivo nunca muda depois de gravado (o nome leva um sufixo aleatório),
+então a ETag forte derivada do conteúdo vale enquanto o arquivo existir e
+clientes e proxies podem guardá-lo por muito tempo:
+
+- If-None-Match / If-Modified-Since: 304 sem corpo quando a cópia do
+  cliente está atualizada
+- Range (um único intervalo, com If-Range opcional): 206 com o trecho, para
+  visualizadores de PDF que carregam o arquivo aos poucos; intervalos
+  múltiplos são atendidos com o arquivo inteiro
+"""
+
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+
+class IntervaloInvalido(Exception):
+    """Range fora do tamanho do arquivo (HTTP 416)"""
+
+
+def calcular_etag(caminho: str) -> str:
+    """ETag forte: prefixo do SHA-256 do conteúdo, entre aspas"""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            resumo.update(bloco)
+    return f'"{resumo.hexdigest()[:32]}"'
+
+
+def cabecalhos_cache(etag: str, modificado_em: float, max_age: int) -> Dict[str, str]:
+    """
+    Cabeçalhos comuns às respostas 200, 206 e 304.
+
+    Args:
+        etag: ETag do arquivo
+        modificado_em: mtime do arquivo
+        max_age: Segundos que clientes e proxies podem reutilizar a cópia
+            sem revalidar (0 exige revalidação a cada uso)
+    """
+    if max_age > 0:
+        cache_control = f"public, max-age={max_age}, immutable"
+    else:
+        cache_control = "no-cache"
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(modificado_em, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes"
+    }
+
+
+def nao_modificado(cabecalhos: Mapping[str, str], etag: str, modificado_em: float) -> bool:
+    """
+    Indica se a resposta pode ser 304.
+
+    If-None-Match tem precedência; If-Modified-Since só é avaliado sem ele.
+    """
+    if_none_match = cabecalhos.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_na_lista(if_none_match, etag)
+
+    data = _data_http(cabecalhos.get("if-modified-since"))
+    return data is not None and int(modificado_em) <= data
+
+
+def intervalo_solicitado(
+    cabecalhos: Mapping[str, str],
+    tamanho: int,
+    etag: str,
+    modificado_em: float
+) -> Optional[Tuple[int, int]]:
+    """
+    Intervalo pedido pelo header Range.
+
+    Returns:
+        (início, fim inclusivo) ou None para enviar o arquivo inteiro (sem
+        Range, Range malformado ou com vários intervalos, If-Range que não
+        corresponde ao arquivo)
+
+    Raises:
+        IntervaloInvalido: Se o intervalo começa depois do fim do arquivo
+    """
+    valor = cabecalhos.get("range")
+    if not valor:
+        return None
+
+    if_range = cabecalhos.get("if-range")
+    if if_range is not None:
+        if if_range.strip().startswith(("\"", "W/")):
+            # If-Range exige comparação forte
+            if if_range.strip() != etag:
+                return None
+        else:
+            data = _data_http(if_range)
+            if data is None or int(modificado_em) != data:
+                return None
+
+    unidade, _, especificacao = valor.partition("=")
+    if unidade.strip().lower() != "bytes" or "," in especificacao:
+        return None
+    inicio_texto, separador, fim_texto = especificacao.strip().partition("-")
+    if not separador:
+        return None
+
+    try:
+        if inicio_texto == "":
+            # Sufixo: os últimos N bytes
+            sufixo = int(fim_texto)
+            if sufixo <= 0 or tamanho == 0:
+                raise IntervaloInvalido(f"Intervalo vazio: {valor}")
+            return max(tamanho - sufixo, 0), tamanho - 1
+        inicio = int(inicio_texto)
+        fim = int(fim_texto) if fim_texto else None
+    except ValueError:
+        return None
+
+    if inicio < 0 or (fim is not None and fim < inicio):
+        return None
+    if inicio >= tamanho:
+        raise IntervaloInvalido(f"Intervalo fora do arquivo: {valor}")
+    return inicio, tamanho - 1 if fim is None else min(fim, tamanho - 1)
+
+
+def ler_intervalo(caminho: str, inicio: int, fim: int) -> bytes:
+    """Bytes de inicio a fim (inclusivo) do arquivo"""
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        return f.read(fim - inicio + 1)
+
+
+def _etag_na_lista(lista: str, etag: str) -> bool:
+    """Comparação fraca (If-None-Match): ignora o prefixo W/"""
+    if lista.strip() == "*":
+        return True
+    for candidata in lista.split(","):
+        candidata = candidata.strip()
+        if candidata.startswith("W/"):
+            candidata = candidata[2:]
+        if candidata == etag:
+            return True
+    return False
+
+
+def _data_http(valor: Optional[str]) -> Optional[int]:
+    """Timestamp de uma data HTTP (None se ausente ou inválida)"""
+    if not valor:
+        return None
+    try:
+        return int(parsedate_to_datetime(valor).timestamp())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
@@ -0,0 +1,104 @@
+"""
+Executor de Renderização
+Tira o trabalho CPU-bound (matplotlib/reportlab) do event loop do uvicorn
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+
+from app.services.renderizacao import inicializar_worker
+
+
+class ExecutorRenderizacao:
+    """
+    Pool limitado de workers para renderização de propostas.
+
+    Modos:
+        processo: ProcessPoolExecutor; escala com os núcleos da máquina
+        thread: ThreadPoolExecutor; libera o event loop, mas divide o GIL
+        inline: executa no próprio event loop (útil para depuração)
+    """
+
+    MODOS = ("processo", "thread", "inline")
+
+    def __init__(
+        self,
+        modo: str = "processo",
+        workers: int = 1,
+        max_pendentes: int = 4,
+        mp_start: str = "spawn"
+    ):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de executor inválido: {modo}")
+        self.modo = modo
+        self.workers = max(1, workers)
+        self.max_pendentes = max(self.workers, max_pendentes)
+        self.mp_start = mp_start
+        self._pool: Optional[Executor] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._em_andamento = 0
+
+    @property
+    def em_andamento(self) -> int:
+        """Quantidade de renderizações submetidas e ainda não concluídas"""
+        return self._em_andamento
+
+    def iniciar(self):
+        """Cria o pool de workers; cada worker executa inicializar_worker uma vez"""
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_pendentes)
+        if self._pool is not None:
+            return
+        if self.modo == "processo":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.mp_start),
+                initializer=inicializar_worker
+            )
+        elif self.modo == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="render",
+                initializer=inicializar_worker
+            )
+        else:
+            inicializar_worker()
+
+    def encerrar(self):
+        """Encerra o pool aguardando as renderizações em andamento"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def executar(self, funcao: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa `funcao` em um worker e aguarda o resultado.
+
+        No máximo `max_pendentes` chamadas ficam submetidas ao pool ao mesmo
+        tempo; as demais aguardam sem bloquear o event loop.
+        """
+        if self._semaforo is None:
+            self.iniciar()
+
+        async with self._semaforo:
+            self._em_andamento += 1
+            try:
+                if self.modo == "inline":
+                    return funcao(*args, **kwargs)
+                loop = asyncio.get_running_loop()
+                pool = self._pool
+                try:
+                    return await loop.run_in_executor(pool, partial(funcao, *args, **kwargs))
+                except BrokenProcessPool:
+                    # Um worker morreu (ex.: OOM); recria o pool para as próximas chamadas
+                    if self._pool is pool:
+                        pool.shutdown(wait=False)
+                        self._pool = None
+                        self.iniciar()
+                    raise
+            finally:
+                self._em_andamento -= 1
@@ -9,12 +9,27 @@ matplotlib.use('Agg')  # Backend não-interativo
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
-from typing import List
+from io import BytesIO
+from typing import Dict, List, Optional, Union
+import hashlib
+import json
 import os
 import uuid
 
-from app.models.proposta import ProducaoMensalModel, RetornoInvestimentoModel
-from app.utils.formatters import formatar_moeda_br, formatar_numero_br
+from app.models.proposta import ProducaoMensalColunas, RetornoInvestimentoColunas
+from app.services.cache_graficos import CacheGraficos
+from app.services.perfis_saida import PERFIS_SAIDA, PerfilSaida, codificar_imagem
+from app.utils.formatters import formatar_moeda_br, formatar_numero_br, formatar_saldo_br
+
+
+class _ModeloGraficoProducao:
+    """Figura do gráfico de produção e os artistas alterados a cada requisição"""
+    
+    def __init__(self, fig, ax, barras, rotulos):
+        self.fig = fig
+        self.ax = ax
+        self.barras = barras
+        self.rotulos = rotulos
 
 
 class GraficoService:
@@ -27,40 +42,91 @@ class GraficoService:
     COR_CINZA = '#7F8C8D'
     COR_FUNDO = '#FFFFFF'
     
+    # Dimensões do gráfico de produção
+    TAMANHO_GRAFICO_PRODUCAO = (12, 6)
+    DPI = 150
+    
+    def __init__(self, cache: Optional[CacheGraficos] = None, figura_reutilizavel: bool = True):
+        """
+        Args:
+            cache: Cache opcional para o gráfico de produção, que depende apenas
+                da produção mensal e da quantidade de módulos
+            figura_reutilizavel: Mantém a figura do gráfico de produção montada
+                entre chamadas e atualiza apenas os dados (não thread-safe)
+        """
+        self.cache = cache
+        self.figura_reutilizavel = figura_reutilizavel
+        self._modelos_producao: Dict[int, _ModeloGraficoProducao] = {}
+    
     def gerar_grafico_producao(
         self,
-        dados_producao: List[ProducaoMensalModel],
+        dados_producao: ProducaoMensalColunas,
         quantidade_modulos: int,
-        output_dir: str
-    ) -> str:
+        output_dir: Optional[str] = None,
+        perfil_saida: Optional[PerfilSaida] = None
+    ) -> Union[str, BytesIO]:
         """
         Gera o gráfico de barras de produção de energia mensal.
         
         Args:
-            dados_producao: Lista com dados de produção mensal
+            dados_producao: Colunas com dados de produção mensal
             quantidade_modulos: Quantidade de módulos para calcular geração por placa
-            output_dir: Diretório para salvar o gráfico
+            output_dir: Diretório para salvar o gráfico; se omitido, o PNG
+                é gerado apenas em memória
+            perfil_saida: Resolução e codificação da imagem (padrão: "padrao")
             
         Returns:
-            Caminho do arquivo PNG gerado
+            Caminho do arquivo gerado, ou BytesIO com a imagem quando
+            output_dir não é informado
         """
+        perfil_saida = perfil_saida or PERFIS_SAIDA["padrao"]
+        chave = None
+        if self.cache is not None:
+            chave = self._chave_grafico_producao(dados_producao, quantidade_modulos, perfil_saida)
+            png = self.cache.obter(chave)
+            if png is not None:
+                return self._gravar_png(png, "grafico_producao", output_dir, perfil_saida.extensao)
+        
         # Preparar dados
-        meses = []
-        geracao_total = []
-        geracao_por_placa = []
-        
-        for item in dados_producao:
-            # Converter mês para label
-            if isinstance(item.mes, int):
-                meses.append(str(item.mes))
-            else:
-                meses.append('MÉDIA')
-            
-            geracao_total.append(item.geracao_total)
-            geracao_por_placa.append(round(item.geracao_total / quantidade_modulos, 0))
+        meses = dados_producao.rotulos()
+        geracao_total = dados_producao.geracao_total.tolist()
+        geracao_por_placa = np.round(dados_producao.geracao_total / quantidade_modulos, 0).tolist()
+        
+        if self.figura_reutilizavel:
+            modelo = self._obter_modelo_producao(len(meses))
+            self._atualizar_modelo_producao(modelo, meses, geracao_por_placa, geracao_total)
+            fig = modelo.fig
+        else:
+            fig = self._criar_figura_producao(meses, geracao_por_placa, geracao_total).fig
         
+        # Ajustar layout (depende da largura dos rótulos do eixo Y)
+        fig.tight_layout()
+        
+        # Salvar (com cache ou recodificação, sempre em memória para poder tratar os bytes)
+        em_memoria = chave or perfil_saida.formato_imagem != "png"
+        destino = BytesIO() if em_memoria else self._destino_png("grafico_producao", output_dir)
+        fig.savefig(destino, dpi=perfil_saida.dpi, bbox_inches='tight', 
+                   facecolor=self.COR_FUNDO, edgecolor='none')
+        if not self.figura_reutilizavel:
+            plt.close(fig)
+        
+        if em_memoria:
+            png = codificar_imagem(destino.getvalue(), perfil_saida)
+            if chave:
+                self.cache.inserir(chave, png)
+            return self._gravar_png(png, "grafico_producao", output_dir, perfil_saida.extensao)
+        
+        return self._finalizar_png(destino)
+    
+    def _criar_figura_producao(
+        self,
+        meses: List[str],
+        geracao_por_placa: List[float],
+        geracao_total: List[float]
+    ) -> "_ModeloGraficoProducao":
+        """Monta e estiliza a figura do gráfico de produção"""
         # Configurar figura
-        fig, ax = plt.subplots(figsize=(12, 6), dpi=150)
+        fig, ax = plt.subplots(figsize=self.TAMANHO_GRAFICO_PRODUCAO, dpi=self.DPI)
         fig.patch.set_facecolor(self.COR_FUNDO)
         ax.set_facecolor(self.COR_FUNDO)
         
@@ -78,18 +144,20 @@ class GraficoService:
         
         # Adicionar rótulos nas barras
         def add_labels(bars, fontsize=7):
+            rotulos = []
             for bar in bars:
                 height = bar.get_height()
-                ax.annotate(f'{int(height)}',
+                rotulos.append(ax.annotate(f'{int(height)}',
                            xy=(bar.get_x() + bar.get_width() / 2, height),
                            xytext=(0, 3),
                            textcoords="offset points",
                            ha='center', va='bottom',
                            fontsize=fontsize, fontweight='bold',
-                           color=self.COR_AZUL_ESCURO)
+                           color=self.COR_AZUL_ESCURO))
+            return rotulos
         
-        add_labels(bars1, fontsize=7)
-        add_labels(bars2, fontsize=7)
+        rotulos1 = add_labels(bars1, fontsize=7)
+        rotulos2 = add_labels(bars2, fontsize=7)
         
         # Configurar eixos
         ax.set_xlabel('MÊS', fontsize=10, fontweight='bold', color=self.COR_AZUL_ESCURO)
@@ -116,47 +184,96 @@ class GraficoService:
         ax.spines['left'].set_color(self.COR_CINZA)
         ax.spines['bottom'].set_color(self.COR_CINZA)
         
-        # Ajustar layout
-        plt.tight_layout()
-        
-        # Salvar
-        filename = f"grafico_producao_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(output_dir, filename)
-        plt.savefig(filepath, dpi=150, bbox_inches='tight', 
-                   facecolor=self.COR_FUNDO, edgecolor='none')
-        plt.close(fig)
+        return _ModeloGraficoProducao(fig, ax, list(bars1) + list(bars2), rotulos1 + rotulos2)
+    
+    def _obter_modelo_producao(self, quantidade_barras: int) -> "_ModeloGraficoProducao":
+        """Figura pré-montada para a quantidade de meses, criada no primeiro uso"""
+        modelo = self._modelos_producao.get(quantidade_barras)
+        if modelo is None:
+            zeros = [0.0] * quantidade_barras
+            meses = [''] * quantidade_barras
+            modelo = self._criar_figura_producao(meses, zeros, zeros)
+            # Fora do pyplot: a figura vive enquanto o worker existir
+            plt.close(modelo.fig)
+            self._modelos_producao[quantidade_barras] = modelo
+        return modelo
+    
+    def _atualizar_modelo_producao(
+        self,
+        modelo: "_ModeloGraficoProducao",
+        meses: List[str],
+        geracao_por_placa: List[float],
+        geracao_total: List[float]
+    ):
+        """Troca alturas das barras, rótulos e meses de uma figura pré-montada"""
+        for barra, rotulo, altura in zip(modelo.barras, modelo.rotulos, geracao_por_placa + geracao_total):
+            barra.set_height(altura)
+            rotulo.xy = (rotulo.xy[0], altura)
+            rotulo.set_text(f'{int(altura)}')
         
-        return filepath
+        modelo.ax.set_xticklabels(meses, fontsize=9)
+        # Mesma escala do autoscale do matplotlib para barras (base fixa em 0, margem de 5%)
+        maximo = max(geracao_por_placa + geracao_total, default=0)
+        modelo.ax.set_ylim(0, maximo * (1 + modelo.ax.margins()[1]) if maximo > 0 else 1)
     
-    def gerar_tabela_retorno(
+    def _chave_grafico_producao(
         self,
-        dados_retorno: List[RetornoInvestimentoModel],
-        output_dir: str
+        dados_producao: ProducaoMensalColunas,
+        quantidade_modulos: int,
+        perfil_saida: PerfilSaida
     ) -> str:
+        """Hash das entradas do gráfico, das constantes de estilo e do perfil que afetam a imagem"""
+        conteudo = {
+            "producao": [dados_producao.mes, dados_producao.geracao_total.tolist()],
+            "modulos": quantidade_modulos,
+            "estilo": [
+                self.COR_AZUL_ESCURO, self.COR_TEAL, self.COR_CINZA, self.COR_FUNDO,
+                self.TAMANHO_GRAFICO_PRODUCAO, self.DPI, matplotlib.__version__
+            ]
+        }
+        if perfil_saida != PERFIS_SAIDA["padrao"]:
+            # Mantém as chaves já gravadas no cache em disco para o perfil padrão
+            conteudo["perfil"] = [
+                perfil_saida.dpi, perfil_saida.formato_imagem,
+                perfil_saida.cores_paleta, perfil_saida.qualidade_jpeg
+            ]
+        serializado = json.dumps(conteudo, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+    
+    def gerar_tabela_retorno(
+        self,
+        dados_retorno: RetornoInvestimentoColunas,
+        output_dir: Optional[str] = None,
+        perfil_saida: Optional[PerfilSaida] = None
+    ) -> Union[str, BytesIO]:
         """
         Gera a tabela de retorno do investimento como imagem.
         
         Args:
-            dados_retorno: Lista com dados de retorno por ano
-            output_dir: Diretório para salvar a imagem
+            dados_retorno: Colunas com dados de retorno por ano
+            output_dir: Diretório para salvar a imagem; se omitido, o PNG
+                é gerado apenas em memória
+            perfil_saida: Resolução e codificação da imagem (padrão: "padrao")
             
         Returns:
-            Caminho do arquivo PNG gerado
+            Caminho do arquivo gerado, ou BytesIO com a imagem quando
+            output_dir não é informado
         """
+        perfil_saida = perfil_saida or PERFIS_SAIDA["padrao"]
         # Preparar dados para a tabela
         dados_tabela = []
-        for item in dados_retorno:
-            # Formatar saldo com sinal
-            if item.saldo < 0:
-                saldo_str = f"-R$  {formatar_numero_br(abs(item.saldo))}"
-            else:
-                saldo_str = f"R$  {formatar_numero_br(item.saldo)}"
-            
+        colunas = zip(
+            dados_retorno.ano.tolist(),
+            dados_retorno.saldo.tolist(),
+            dados_retorno.economia_mensal.tolist(),
+            dados_retorno.economia_anual.tolist()
+        )
+        for ano, saldo, economia_mensal, economia_anual in colunas:
             dados_tabela.append([
-                str(item.ano),
-                saldo_str,
-                f"R$  {formatar_numero_br(item.economia_mensal)}",
-                f"R$  {formatar_numero_br(item.economia_anual)}"
+                str(ano),
+                formatar_saldo_br(saldo),
+                f"R$  {formatar_numero_br(economia_mensal)}",
+                f"R$  {formatar_numero_br(economia_anual)}"
             ])
         
         # Configurar figura
@@ -218,11 +335,43 @@ class GraficoService:
         table.auto_set_column_width([0, 1, 2, 3])
         
         # Salvar
-        filename = f"tabela_retorno_{uuid.uuid4().hex[:8]}.png"
-        filepath = os.path.join(output_dir, filename)
-        plt.savefig(filepath, dpi=150, bbox_inches='tight',
+        recodificar = perfil_saida.formato_imagem != "png"
+        destino = BytesIO() if recodificar else self._destino_png("tabela_retorno", output_dir)
+        plt.savefig(destino, dpi=perfil_saida.dpi, bbox_inches='tight',
                    facecolor=self.COR_FUNDO, edgecolor='none',
                    pad_inches=0.1)
         plt.close(fig)
         
-        return filepath
+        if recodificar:
+            imagem = codificar_imagem(destino.getvalue(), perfil_saida)
+            return self._gravar_png(imagem, "tabela_retorno", output_dir, perfil_saida.extensao)
+        return self._finalizar_png(destino)
+    
+    def _destino_png(self, prefixo: str, output_dir: Optional[str], extensao: str = ".png") -> Union[str, BytesIO]:
+        """Caminho único em output_dir ou, sem diretório, um buffer em memória"""
+        if output_dir is None:
+            return BytesIO()
+        filename = f"{prefixo}_{uuid.uuid4().hex[:8]}{extensao}"
+        return os.path.join(output_dir, filename)
+    
+    def _gravar_png(
+        self,
+        png: bytes,
+        prefixo: str,
+        output_dir: Optional[str],
+        extensao: str = ".png"
+    ) -> Union[str, BytesIO]:
+        """Entrega uma imagem já renderizada no mesmo formato de retorno dos geradores"""
+        destino = self._destino_png(prefixo, output_dir, extensao)
+        if isinstance(destino, BytesIO):
+            destino.write(png)
+        else:
+            with open(destino, "wb") as f:
+                f.write(png)
+        return self._finalizar_png(destino)
+    
+    def _finalizar_png(self, destino: Union[str, BytesIO]) -> Union[str, BytesIO]:
+        """Rebobina buffers para que possam ser lidos diretamente pelo reportlab"""
+        if isinstance(destino, BytesIO):
+            destino.seek(0)
+        return destino
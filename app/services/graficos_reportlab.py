@@ -0,0 +1,244 @@
+"""
+Backend de Gráficos reportlab
+Desenha o gráfico de produção como vetor (reportlab.graphics), sem matplotlib.
+
+O Drawing retornado é um Flowable e entra diretamente no story do PDF.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing, Group, Line, Polygon, String
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import cm
+
+from app.models.proposta import ProducaoMensalColunas
+
+
+class GraficoReportlabService:
+    """Gráficos vetoriais da proposta com o mesmo visual do GraficoService"""
+
+    # Cores padrão Level5
+    COR_AZUL_ESCURO = HexColor('#2C3E50')
+    COR_TEAL = HexColor('#16A085')
+    COR_CINZA = HexColor('#7F8C8D')
+    COR_FAIXA_EXTERNA = HexColor('#D0ECE7')
+    COR_FAIXA_INTERNA = HexColor('#73C6B6')
+
+    # Mesma área que o PNG ocupa no PDF
+    LARGURA = 16*cm
+    ALTURA = 8*cm
+
+    def gerar_grafico_producao(
+        self,
+        dados_producao: ProducaoMensalColunas,
+        quantidade_modulos: int
+    ) -> Drawing:
+        """
+        Gera o gráfico de barras de produção de energia mensal.
+
+        Args:
+            dados_producao: Colunas com dados de produção mensal
+            quantidade_modulos: Quantidade de módulos para calcular geração por placa
+
+        Returns:
+            Drawing do reportlab pronto para ser adicionado ao PDF
+        """
+        # Preparar dados
+        meses = dados_producao.rotulos()
+        geracao_total = dados_producao.geracao_total.tolist()
+        geracao_por_placa = np.round(dados_producao.geracao_total / quantidade_modulos, 0).tolist()
+
+        desenho = Drawing(self.LARGURA, self.ALTURA)
+
+        # Título
+        desenho.add(String(
+            self.LARGURA / 2, self.ALTURA - 14, 'PRODUÇÃO DE ENERGIA',
+            fontName='Helvetica-Bold', fontSize=11,
+            fillColor=self.COR_AZUL_ESCURO, textAnchor='middle'
+        ))
+
+        grafico = VerticalBarChart()
+        grafico.x = 40
+        grafico.y = 30
+        grafico.width = self.LARGURA - 55
+        grafico.height = self.ALTURA - 65
+        grafico.data = [geracao_por_placa, geracao_total]
+        grafico.groupSpacing = 6
+        grafico.barSpacing = 0
+
+        grafico.bars.strokeColor = HexColor('#FFFFFF')
+        grafico.bars.strokeWidth = 0.5
+        grafico.bars[0].fillColor = self.COR_AZUL_ESCURO
+        grafico.bars[1].fillColor = self.COR_TEAL
+
+        # Rótulos nas barras
+        grafico.barLabelFormat = '%d'
+        grafico.barLabels.nudge = 4
+        grafico.barLabels.fontName = 'Helvetica-Bold'
+        grafico.barLabels.fontSize = 4.5
+        grafico.barLabels.fillColor = self.COR_AZUL_ESCURO
+
+        # Eixos
+        grafico.categoryAxis.categoryNames = meses
+        grafico.categoryAxis.labels.fontName = 'Helvetica'
+        grafico.categoryAxis.labels.fontSize = 7
+        grafico.categoryAxis.strokeColor = self.COR_CINZA
+        grafico.categoryAxis.tickDown = 0
+
+        grafico.valueAxis.valueMin = 0
+        grafico.valueAxis.labels.fontName = 'Helvetica'
+        grafico.valueAxis.labels.fontSize = 7
+        grafico.valueAxis.strokeColor = self.COR_CINZA
+
+        # Grid suave
+        grafico.valueAxis.visibleGrid = 1
+        grafico.valueAxis.gridStrokeColor = self.COR_CINZA
+        grafico.valueAxis.gridStrokeWidth = 0.25
+        grafico.valueAxis.gridStrokeDashArray = (2, 2)
+
+        if geracao_total:
+            desenho.add(grafico)
+        else:
+            # VerticalBarChart não aceita séries vazias: apenas os eixos, como
+            # o gráfico vazio do matplotlib
+            for x2, y2 in ((grafico.x + grafico.width, grafico.y), (grafico.x, grafico.y + grafico.height)):
+                desenho.add(Line(grafico.x, grafico.y, x2, y2, strokeColor=self.COR_CINZA))
+
+        desenho.add(String(
+            grafico.x + grafico.width / 2, 8, 'MÊS',
+            fontName='Helvetica-Bold', fontSize=8,
+            fillColor=self.COR_AZUL_ESCURO, textAnchor='middle'
+        ))
+        rotulo_y = Group(String(
+            0, 0, 'GERAÇÃO',
+            fontName='Helvetica-Bold', fontSize=8,
+            fillColor=self.COR_AZUL_ESCURO, textAnchor='middle'
+        ))
+        rotulo_y.translate(10, grafico.y + grafico.height / 2)
+        rotulo_y.rotate(90)
+        desenho.add(rotulo_y)
+
+        # Legenda (acima da área das barras, alinhada à direita)
+        legenda = Legend()
+        legenda.x = self.LARGURA - 95
+        legenda.y = self.ALTURA - 4
+        legenda.alignment = 'right'
+        legenda.fontName = 'Helvetica'
+        legenda.fontSize = 6
+        legenda.dx = 6
+        legenda.dy = 6
+        legenda.deltay = 8
+        legenda.strokeWidth = 0
+        legenda.boxAnchor = 'nw'
+        legenda.colorNamePairs = [
+            (self.COR_AZUL_ESCURO, 'geração por placa'),
+            (self.COR_TEAL, 'geração total estimada')
+        ]
+        desenho.add(legenda)
+
+        return desenho
+
+    def gerar_grafico_sensibilidade(self, faixas_saldo: Dict[str, List[float]]) -> Drawing:
+        """
+        Gera o gráfico em leque do saldo acumulado na análise de sensibilidade.
+
+        Args:
+            faixas_saldo: Percentis do saldo por ano, como em
+                SimulacaoMonteCarlo.resumo()["faixas_saldo"] (chaves ano, p5...p95)
+
+        Returns:
+            Drawing do reportlab pronto para ser adicionado ao PDF
+        """
+        anos = faixas_saldo["ano"]
+        desenho = Drawing(self.LARGURA, self.ALTURA)
+
+        desenho.add(String(
+            self.LARGURA / 2, self.ALTURA - 14, 'SALDO ACUMULADO - CENÁRIOS SIMULADOS',
+            fontName='Helvetica-Bold', fontSize=11,
+            fillColor=self.COR_AZUL_ESCURO, textAnchor='middle'
+        ))
+
+        grafico = LinePlot()
+        grafico.x = 55
+        grafico.y = 30
+        grafico.width = self.LARGURA - 70
+        grafico.height = self.ALTURA - 65
+        # Extremos entram como linhas invisíveis para a escala cobrir todo o leque
+        grafico.data = [
+            list(zip(anos, faixas_saldo["p5"])),
+            list(zip(anos, faixas_saldo["p95"])),
+            list(zip(anos, faixas_saldo["p50"]))
+        ]
+        grafico.lines[0].strokeColor = None
+        grafico.lines[1].strokeColor = None
+        grafico.lines[2].strokeColor = self.COR_AZUL_ESCURO
+        grafico.lines[2].strokeWidth = 1.5
+
+        grafico.xValueAxis.valueMin = anos[0]
+        grafico.xValueAxis.valueMax = anos[-1]
+        grafico.xValueAxis.valueStep = 2
+        grafico.xValueAxis.labels.fontName = 'Helvetica'
+        grafico.xValueAxis.labels.fontSize = 7
+        grafico.xValueAxis.strokeColor = self.COR_CINZA
+        grafico.yValueAxis.labels.fontName = 'Helvetica'
+        grafico.yValueAxis.labels.fontSize = 7
+        grafico.yValueAxis.labelTextFormat = lambda valor: f'{valor / 1000:,.0f} mil'.replace(',', '.')
+        grafico.yValueAxis.strokeColor = self.COR_CINZA
+        grafico.yValueAxis.visibleGrid = 1
+        grafico.yValueAxis.gridStrokeColor = self.COR_CINZA
+        grafico.yValueAxis.gridStrokeWidth = 0.25
+        grafico.yValueAxis.gridStrokeDashArray = (2, 2)
+
+        # draw() configura os eixos para as faixas usarem as mesmas escalas. O
+        # grupo retornado é descartado: seus rótulos referenciam o LinePlot por
+        # weakref, então o próprio gráfico entra no desenho (e é desenhado de novo)
+        grafico.draw()
+        escala_x = grafico.xValueAxis.scale
+        escala_y = grafico.yValueAxis.scale
+
+        for inferior, superior, cor in (("p5", "p95", self.COR_FAIXA_EXTERNA),
+                                         ("p25", "p75", self.COR_FAIXA_INTERNA)):
+            pontos = []
+            for ano, valor in zip(anos, faixas_saldo[superior]):
+                pontos.extend((escala_x(ano), escala_y(valor)))
+            for ano, valor in zip(reversed(anos), reversed(faixas_saldo[inferior])):
+                pontos.extend((escala_x(ano), escala_y(valor)))
+            desenho.add(Polygon(pontos, fillColor=cor, strokeColor=None))
+
+        minimo = min(faixas_saldo["p5"])
+        maximo = max(faixas_saldo["p95"])
+        if minimo < 0 < maximo:
+            y_zero = escala_y(0)
+            desenho.add(Line(grafico.x, y_zero, grafico.x + grafico.width, y_zero,
+                             strokeColor=self.COR_CINZA, strokeWidth=0.75))
+        desenho.add(grafico)
+
+        desenho.add(String(
+            grafico.x + grafico.width / 2, 8, 'ANO',
+            fontName='Helvetica-Bold', fontSize=8,
+            fillColor=self.COR_AZUL_ESCURO, textAnchor='middle'
+        ))
+
+        legenda = Legend()
+        legenda.x = grafico.x + 6
+        legenda.y = self.ALTURA - 26
+        legenda.alignment = 'right'
+        legenda.fontName = 'Helvetica'
+        legenda.fontSize = 6
+        legenda.dx = 6
+        legenda.dy = 6
+        legenda.deltay = 8
+        legenda.strokeWidth = 0
+        legenda.boxAnchor = 'nw'
+        legenda.colorNamePairs = [
+            (self.COR_AZUL_ESCURO, 'mediana'),
+            (self.COR_FAIXA_INTERNA, '50% dos cenários'),
+            (self.COR_FAIXA_EXTERNA, '90% dos cenários')
+        ]
+        desenho.add(legenda)
+
+        return desenho
@@ -0,0 +1,213 @@
+"""
+Jobs de Renderização
+Modo assíncrono da geração de propostas: a requisição recebe um id na hora e
+o PDF é produzido em segundo plano.
+
+Uma fila limitada, dentro do próprio processo, alimenta um número fixo de
+consumidores. Fila cheia é sinalizada ao chamador (HTTP 429) em vez de
+acumular requisições até estourar o timeout dos clientes. Não há broker
+externo; a interface FilaJobs permite trocar a implementação em memória.
+"""
+
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class FilaCheia(Exception):
+    """A fila de jobs atingiu a capacidade máxima"""
+
+
+@dataclass
+class Job:
+    """Estado de um job de renderização"""
+    id: str
+    dados: Any
+    status: str = "pendente"  # pendente | processando | concluido | erro
+    criado_em: float = field(default_factory=time.time)
+    iniciado_em: Optional[float] = None
+    concluido_em: Optional[float] = None
+    resultado: Any = None
+    erro: Optional[str] = None
+    _evento: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in ("concluido", "erro")
+
+
+class FilaJobs(ABC):
+    """Interface da fila que liga a API aos consumidores"""
+
+    @abstractmethod
+    def enfileirar(self, job: Job):
+        """Adiciona o job sem bloquear; levanta FilaCheia se não houver espaço"""
+
+    @abstractmethod
+    async def retirar(self) -> Job:
+        """Aguarda e retorna o próximo job"""
+
+    @abstractmethod
+    def tamanho(self) -> int:
+        """Jobs aguardando um consumidor"""
+
+    @property
+    @abstractmethod
+    def capacidade(self) -> int:
+        """Máximo de jobs aguardando"""
+
+
+class FilaMemoria(FilaJobs):
+    """FilaJobs sobre asyncio.Queue, restrita ao processo"""
+
+    def __init__(self, capacidade: int):
+        self._capacidade = max(1, capacidade)
+        self._fila: "asyncio.Queue[Job]" = asyncio.Queue(maxsize=self._capacidade)
+
+    def enfileirar(self, job: Job):
+        try:
+            self._fila.put_nowait(job)
+        except asyncio.QueueFull:
+            raise FilaCheia(f"Fila de jobs cheia ({self._capacidade})")
+
+    async def retirar(self) -> Job:
+        return await self._fila.get()
+
+    def tamanho(self) -> int:
+        return self._fila.qsize()
+
+    @property
+    def capacidade(self) -> int:
+        return self._capacidade
+
+
+class GerenciadorJobs:
+    """
+    Registra os jobs, distribui-os aos consumidores e guarda os resultados
+    por um tempo limitado para consulta.
+    """
+
+    def __init__(
+        self,
+        fila: FilaJobs,
+        processar: Callable[[Any], Awaitable[Any]],
+        consumidores: int = 1,
+        retencao_segundos: int = 600
+    ):
+        """
+        Args:
+            fila: Fila entre a API e os consumidores
+            processar: Corrotina que executa o trabalho de um job
+            consumidores: Jobs processados ao mesmo tempo
+            retencao_segundos: Tempo que um job finalizado permanece consultável
+        """
+        self.fila = fila
+        self.processar = processar
+        self.consumidores = max(1, consumidores)
+        self.retencao_segundos = retencao_segundos
+        self._jobs: Dict[str, Job] = {}
+        self._tarefas: List[asyncio.Task] = []
+        self._em_processamento = 0
+        # Média móvel da duração de um job, usada para estimar o Retry-After
+        self._duracao_media = 1.0
+
+    def iniciar(self):
+        if self._tarefas:
+            return
+        self._tarefas = [
+            asyncio.ensure_future(self._consumir())
+            for _ in range(self.consumidores)
+        ]
+
+    async def encerrar(self):
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+
+    def submeter(self, dados: Any) -> Job:
+        """
+        Cria e enfileira um job.
+
+        Raises:
+            FilaCheia: Sem espaço na fila; tente novamente após retry_after()
+        """
+        self._expirar()
+        job = Job(id=uuid.uuid4().hex, dados=dados)
+        self.fila.enfileirar(job)
+        self._jobs[job.id] = job
+        return job
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def aguardar(self, job: Job, timeout: float) -> Job:
+        """Espera o job finalizar por até `timeout` segundos (long-poll)"""
+        if timeout > 0 and not job.finalizado:
+            try:
+                await asyncio.wait_for(asyncio.shield(job._evento.wait()), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def posicao(self, job: Job) -> Optional[int]:
+        """Estimativa de jobs à frente deste na fila (None se já saiu da fila)"""
+        if job.status != "pendente":
+            return None
+        return sum(
+            1 for outro in self._jobs.values()
+            if outro.status == "pendente" and outro.criado_em < job.criado_em
+        )
+
+    def retry_after(self) -> int:
+        """Segundos estimados até a fila liberar espaço"""
+        ciclos = (self.fila.tamanho() + self._em_processamento) / self.consumidores
+        return max(1, int(ciclos * self._duracao_media + 0.999))
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "fila": self.fila.tamanho(),
+            "capacidade": self.fila.capacidade,
+            "processando": self._em_processamento,
+            "consumidores": self.consumidores,
+            "jobs_registrados": len(self._jobs),
+            "duracao_media_segundos": round(self._duracao_media, 3)
+        }
+
+    async def _consumir(self):
+        while True:
+            job = await self.fila.retirar()
+            job.status = "processando"
+            job.iniciado_em = time.time()
+            self._em_processamento += 1
+            try:
+                job.resultado = await self.processar(job.dados)
+                job.status = "concluido"
+            except asyncio.CancelledError:
+                job.status = "erro"
+                job.erro = "Servidor encerrado antes da conclusão"
+                raise
+            except Exception as e:
+                job.status = "erro"
+                job.erro = str(e)
+            finally:
+                self._em_processamento -= 1
+                job.concluido_em = time.time()
+                # os dados de entrada não são mais necessários
+                job.dados = None
+                duracao = job.concluido_em - job.iniciado_em
+                self._duracao_media = 0.8 * self._duracao_media + 0.2 * duracao
+                job._evento.set()
+
+    def _expirar(self):
+        """Remove os jobs finalizados há mais de retencao_segundos"""
+        limite = time.time() - self.retencao_segundos
+        expirados = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finalizado and job.concluido_em < limite
+        ]
+        for job_id in expirados:
+            del self._jobs[job_id]
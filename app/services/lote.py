@@ -0,0 +1,137 @@
+"""
+Geração em Lote
+Renderiza listas de propostas em paralelo e as devolve como um ZIP em
+streaming: cada PDF entra no arquivo assim que fica pronto.
+
+A memória fica limitada pela janela de concorrência (no máximo
+`concorrencia` PDFs aguardando para entrar no ZIP), independente do
+tamanho do lote.
+"""
+
+import asyncio
+import json
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+from pydantic import ValidationError
+
+from app.models.proposta import PropostaRequest
+from app.services.renderizacao import ResultadoRenderizacao
+from app.utils.formatters import slug
+
+
+class _SaidaStreaming:
+    """
+    Destino não posicionável para o zipfile.
+
+    Sem seek/tell o zipfile grava os tamanhos em data descriptors após cada
+    arquivo, o que permite enviar o ZIP em pedaços.
+    """
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+
+    def write(self, dados: bytes) -> int:
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def retirar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def _nome_arquivo(indice: int, nome_cliente: str) -> str:
+    return f"{indice + 1:04d}_{slug(nome_cliente, 'cliente')[:60]}.pdf"
+
+
+def _descrever_erro(erro: Exception) -> Any:
+    if isinstance(erro, ValidationError):
+        # via JSON: o contexto dos erros pode conter exceções não serializáveis
+        return json.loads(erro.json(include_url=False))
+    return str(erro)
+
+
+async def gerar_lote_zip(
+    itens: List[Dict[str, Any]],
+    renderizar: Callable[[PropostaRequest], Awaitable[ResultadoRenderizacao]],
+    concorrencia: int
+) -> AsyncIterator[bytes]:
+    """
+    Gera o ZIP de um lote de propostas.
+
+    Cada item é validado individualmente: um payload inválido ou uma falha de
+    renderização vira uma entrada com erro no manifest.json, sem interromper
+    o restante do lote.
+
+    Args:
+        itens: Payloads das propostas (ainda não validados)
+        renderizar: Corrotina que gera o PDF (em bytes) de uma proposta
+        concorrencia: Máximo de propostas renderizando ao mesmo tempo
+
+    Yields:
+        Pedaços do arquivo ZIP
+    """
+    saida = _SaidaStreaming()
+    manifesto: List[Dict[str, Any]] = []
+    pendentes: Dict[asyncio.Task, int] = {}
+    proximo = 0
+
+    async def _processar(indice: int) -> Dict[str, Any]:
+        request = PropostaRequest.model_validate(itens[indice])
+        resultado = await renderizar(request)
+        return {"request": request, "resultado": resultado}
+
+    with zipfile.ZipFile(saida, mode="w", compression=zipfile.ZIP_STORED) as arquivo_zip:
+        try:
+            while proximo < len(itens) or pendentes:
+                while proximo < len(itens) and len(pendentes) < concorrencia:
+                    pendentes[asyncio.ensure_future(_processar(proximo))] = proximo
+                    proximo += 1
+
+                concluidas, _ = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in concluidas:
+                    indice = pendentes.pop(tarefa)
+                    try:
+                        saida_item = tarefa.result()
+                    except Exception as e:
+                        manifesto.append({"indice": indice, "sucesso": False, "erro": _descrever_erro(e)})
+                        continue
+
+                    request = saida_item["request"]
+                    resultado = saida_item["resultado"]
+                    nome = _nome_arquivo(indice, request.nome)
+                    # PDFs já são comprimidos; ZIP_STORED evita gastar CPU à toa
+                    arquivo_zip.writestr(nome, resultado.pdf_bytes)
+                    manifesto.append({
+                        "indice": indice,
+                        "sucesso": True,
+                        "nome": request.nome,
+                        "arquivo": nome,
+                        "dados_calculados": resultado.dados_calculados
+                    })
+
+                pedaco = saida.retirar()
+                if pedaco:
+                    yield pedaco
+        finally:
+            # Cliente desconectou ou erro inesperado: não deixa renderizações órfãs
+            for tarefa in pendentes:
+                tarefa.cancel()
+
+        manifesto.sort(key=lambda entrada: entrada["indice"])
+        arquivo_zip.writestr(
+            "manifest.json",
+            json.dumps({
+                "total": len(itens),
+                "sucesso": sum(1 for entrada in manifesto if entrada["sucesso"]),
+                "falhas": sum(1 for entrada in manifesto if not entrada["sucesso"]),
+                "itens": manifesto
+            }, ensure_ascii=False, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED
+        )
+
+    yield saida.retirar()
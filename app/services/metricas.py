@@ -0,0 +1,263 @@
+"""
+Métricas
+Contadores, histogramas e gauges em memória, exportados no formato texto do
+Prometheus por /api/v1/metrics, sem dependências nem serviço externo.
+
+Registrar uma observação custa um acesso a dicionário e uma busca binária
+nos limites do histograma, o suficiente para ficar sempre ligado. Gauges
+que refletem o estado de outros componentes (caches, fila, executor) são
+calculados apenas quando as métricas são lidas.
+
+Os tempos medidos dentro dos workers de renderização voltam no resultado
+(Cronometro.tempos) e são registrados pelo processo principal, como os
+contadores do cache de gráficos.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Limites (segundos) para latências, de 1 ms a 1 minuto
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Limites (bytes) para o tamanho dos PDFs, de 16 KiB a 16 MiB
+LIMITES_BYTES = tuple(16384 * 2 ** i for i in range(11))
+
+Rotulos = Tuple[str, ...]
+
+
+class _Familia:
+    """Métrica com nome, descrição e séries identificadas pelos valores dos rótulos"""
+    tipo = "untyped"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._amostras())
+        return linhas
+
+    def _amostras(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def _rotulos_texto(self, valores: Rotulos, extra: str = "") -> str:
+        pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(self.rotulos, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Contador(_Familia):
+    """Valor que só cresce (requisições, erros...)"""
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: Dict[Rotulos, float] = {}
+
+    def incrementar(self, *valores_rotulos: str, valor: float = 1.0):
+        self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0.0) + valor
+
+    def valor(self, *valores_rotulos: str) -> float:
+        return self._valores.get(valores_rotulos, 0.0)
+
+    def _amostras(self) -> Iterable[str]:
+        for rotulos, valor in sorted(self._valores.items()):
+            yield f"{self.nome}{self._rotulos_texto(rotulos)} {_numero(valor)}"
+
+
+class Gauge(_Familia):
+    """
+    Valor instantâneo. Pode ser atualizado diretamente (ajustar) ou
+    lido de uma função no momento da exportação.
+    """
+    tipo = "gauge"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        coletar: Optional[Callable[[], Dict[Rotulos, float]]] = None
+    ):
+        """
+        Args:
+            coletar: Função que devolve {valores dos rótulos: valor}; sem
+                rótulos, use a chave ()
+        """
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: Dict[Rotulos, float] = {}
+        self._coletar = coletar
+
+    def ajustar(self, delta: float, *valores_rotulos: str):
+        self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0.0) + delta
+
+    def _amostras(self) -> Iterable[str]:
+        valores = self._coletar() if self._coletar is not None else self._valores
+        for rotulos, valor in sorted(valores.items()):
+            yield f"{self.nome}{self._rotulos_texto(rotulos)} {_numero(valor)}"
+
+
+class Histograma(_Familia):
+    """Distribuição em faixas cumulativas (latências, tamanhos)"""
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        limites: Sequence[float] = LIMITES_SEGUNDOS
+    ):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(sorted(limites))
+        # Por série: [contagem por faixa (não cumulativa) + excedente, soma]
+        self._series: Dict[Rotulos, Tuple[List[int], List[float]]] = {}
+
+    def observar(self, valor: float, *valores_rotulos: str):
+        serie = self._series.get(valores_rotulos)
+        if serie is None:
+            serie = self._series[valores_rotulos] = ([0] * (len(self.limites) + 1), [0.0])
+        serie[0][bisect_left(self.limites, valor)] += 1
+        serie[1][0] += valor
+
+    def contagem(self, *valores_rotulos: str) -> int:
+        serie = self._series.get(valores_rotulos)
+        return sum(serie[0]) if serie else 0
+
+    def _amostras(self) -> Iterable[str]:
+        for rotulos, (contagens, soma) in sorted(self._series.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (float("inf"),), contagens):
+                acumulado += contagem
+                le = 'le="' + _numero(limite) + '"'
+                yield f"{self.nome}_bucket{self._rotulos_texto(rotulos, le)} {acumulado}"
+            yield f"{self.nome}_sum{self._rotulos_texto(rotulos)} {_numero(soma[0])}"
+            yield f"{self.nome}_count{self._rotulos_texto(rotulos)} {acumulado}"
+
+
+class RegistroMetricas:
+    """Conjunto de métricas exportado em um único texto"""
+
+    def __init__(self):
+        self._familias: Dict[str, _Familia] = {}
+
+    def registrar(self, familia: _Familia) -> _Familia:
+        if familia.nome in self._familias:
+            raise ValueError(f"Métrica já registrada: {familia.nome}")
+        self._familias[familia.nome] = familia
+        return familia
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        return self.registrar(Contador(nome, ajuda, rotulos))
+
+    def gauge(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        coletar: Optional[Callable[[], Dict[Rotulos, float]]] = None
+    ) -> Gauge:
+        return self.registrar(Gauge(nome, ajuda, rotulos, coletar))
+
+    def histograma(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        limites: Sequence[float] = LIMITES_SEGUNDOS
+    ) -> Histograma:
+        return self.registrar(Histograma(nome, ajuda, rotulos, limites))
+
+    def exportar(self) -> str:
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        linhas: List[str] = []
+        for familia in self._familias.values():
+            linhas.extend(familia.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+class Cronometro:
+    """
+    Duração de estágios consecutivos, em segundos.
+
+    Cada marcar() atribui ao estágio o tempo desde a marcação anterior; o
+    dicionário `tempos` é serializável e volta do worker no resultado.
+    """
+
+    def __init__(self):
+        self.tempos: Dict[str, float] = {}
+        self._anterior = time.perf_counter()
+
+    def marcar(self, estagio: str):
+        agora = time.perf_counter()
+        self.tempos[estagio] = self.tempos.get(estagio, 0.0) + agora - self._anterior
+        self._anterior = agora
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI: requisições por rota e status, latência por rota e
+    requisições em andamento.
+
+    A rota é o template do path (ex.: /api/v1/jobs/{job_id}), não o path
+    recebido, para limitar a quantidade de séries; paths sem rota contam
+    como "desconhecida". O instante de chegada fica em scope["state"]
+    ("inicio_requisicao") para que os endpoints meçam a validação do corpo.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requisicoes: Contador,
+        duracao: Histograma,
+        em_andamento: Gauge
+    ):
+        self.app = app
+        self.requisicoes = requisicoes
+        self.duracao = duracao
+        self.em_andamento = em_andamento
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        scope.setdefault("state", {})["inicio_requisicao"] = inicio
+        status = 500
+
+        async def enviar(mensagem: Message):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        self.em_andamento.ajustar(1)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            self.em_andamento.ajustar(-1)
+            rota = getattr(scope.get("route"), "path", "desconhecida")
+            self.requisicoes.incrementar(scope["method"], rota, str(status))
+            self.duracao.observar(time.perf_counter() - inicio, rota)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    if math.isnan(valor):
+        return "NaN"
+    if valor == int(valor) and abs(valor) < 1e15:
+        return str(int(valor))
+    return repr(float(valor))
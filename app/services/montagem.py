@@ -0,0 +1,176 @@
+"""
+Montagem de Páginas
+Renderiza uma única vez os trechos estáticos da proposta (os fragmentos do
+template: capa, "quem somos", garantia, formas de pagamento) e, a cada
+requisição, os mescla com pypdf nas páginas geradas apenas com o conteúdo
+variável.
+
+No lugar de cada trecho estático o story recebe um EspacoReservado com a
+mesma altura. Enquanto o trecho cabe inteiro na página, a paginação é a do
+documento completo; se ele não couber no espaço restante (no documento
+completo seria dividido entre duas páginas), a proposta é diagramada
+diretamente, sem a montagem. Cada fragmento é mesclado na posição reservada
+com PageObject.merge_transformed_page.
+
+A mesclagem reinterpreta os content streams a cada requisição e, nas
+medições com benchmarks.payloads, não foi mais rápida que a diagramação
+direta; por isso fica desligada por padrão (MONTAGEM_PAGINAS).
+"""
+
+from io import BytesIO
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from pypdf import PageObject, PdfReader, PdfWriter, Transformation
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, Spacer
+
+from app.services.pdf_generator import PDFGenerator
+from app.services.templates import TemplateCompilado
+
+
+class EspacoReservado(Flowable):
+    """Flowable vazio que ocupa o lugar de um fragmento e registra onde foi desenhado"""
+
+    def __init__(self, nome: str, largura: float, altura: float, espaco_antes: float, espaco_depois: float):
+        super().__init__()
+        self.nome = nome
+        self.largura = largura
+        self.altura = altura
+        self.espaco_antes = espaco_antes
+        self.espaco_depois = espaco_depois
+        # (índice da página, x, y) de cada vez que foi desenhado
+        self.posicoes: List[Tuple[int, float, float]] = []
+        # Não coube no espaço restante de alguma página (ver split)
+        self.deslocado = False
+
+    def wrap(self, availWidth, availHeight):
+        return self.largura, self.altura
+
+    def split(self, availWidth, availHeight):
+        # O frame só pede a divisão quando o trecho não cabe; o documento
+        # completo o dividiria entre páginas, o espaço reservado não. O
+        # Spacer vazio deixa a diagramação terminar (ela é descartada)
+        self.deslocado = True
+        return [Spacer(self.largura, 0)]
+
+    def getSpaceBefore(self):
+        return self.espaco_antes
+
+    def getSpaceAfter(self):
+        return self.espaco_depois
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self.posicoes.append((canvas.getPageNumber() - 1, x, y))
+
+    def draw(self):
+        pass
+
+
+class FragmentoRenderizado:
+    """Página de um fragmento estático e as medidas do seu espaço no story"""
+
+    def __init__(self, pagina: PageObject, altura: float, espaco_antes: float, espaco_depois: float):
+        self.pagina = pagina
+        self.altura = altura
+        self.espaco_antes = espaco_antes
+        self.espaco_depois = espaco_depois
+
+
+class MontagemPaginas:
+    """Gera propostas mesclando fragmentos estáticos pré-renderizados"""
+
+    # Folga ao redor do fragmento: títulos com borderPadding desenham fora da
+    # própria caixa
+    MARGEM = 20
+
+    def __init__(self, pdf_generator: PDFGenerator, template: Optional[TemplateCompilado] = None):
+        """
+        Args:
+            pdf_generator: Gerador usado para o conteúdo variável
+            template: Template cujos fragmentos são pré-renderizados
+                (padrão: o do pdf_generator)
+        """
+        self.pdf_generator = pdf_generator
+        self.template = template or pdf_generator.template
+        self.largura = self.template.largura_util
+        self.fragmentos: Dict[str, FragmentoRenderizado] = {
+            nome: self._renderizar_fragmento(self.template.criar_fragmento(nome))
+            for nome in self.template.fragmentos_estaticos
+        }
+
+    def gerar_proposta_plana(self, output_path: Union[str, BinaryIO], **dados):
+        """
+        Mesmo contrato (e retorno) de PDFGenerator.gerar_proposta_plana,
+        montando o documento a partir dos fragmentos pré-renderizados.
+        """
+        reservados = {
+            nome: EspacoReservado(nome, self.largura, fragmento.altura,
+                                  fragmento.espaco_antes, fragmento.espaco_depois)
+            for nome, fragmento in self.fragmentos.items()
+        }
+
+        variavel = BytesIO()
+        paginas = self.pdf_generator.gerar_proposta_plana(
+            output_path=variavel, fragmentos=reservados, template=self.template, **dados
+        )
+        if any(reservado.deslocado for reservado in reservados.values()):
+            return self.pdf_generator.gerar_proposta_plana(
+                output_path=output_path, template=self.template, **dados
+            )
+        variavel.seek(0)
+
+        escritor = PdfWriter(clone_from=PdfReader(variavel))
+        for nome, reservado in reservados.items():
+            fragmento = self.fragmentos[nome]
+            for indice, x, y in reservado.posicoes:
+                escritor.pages[indice].merge_transformed_page(
+                    fragmento.pagina,
+                    Transformation().translate(x - self.MARGEM, y - self.MARGEM)
+                )
+
+        if isinstance(output_path, str):
+            with open(output_path, "wb") as f:
+                escritor.write(f)
+        else:
+            escritor.write(output_path)
+        return paginas
+
+    def _renderizar_fragmento(self, flowables: List[Flowable]) -> FragmentoRenderizado:
+        """
+        Desenha os flowables em sequência numa página do tamanho exato do trecho.
+
+        Reproduz o espaçamento do Frame do reportlab: o spaceBefore de cada
+        flowable é descontado do spaceAfter do anterior (overlapAttachedSpace).
+        Os espaços externos do primeiro e do último ficam a cargo do
+        EspacoReservado no documento variável.
+        """
+        deslocamentos = []
+        altura = 0.0
+        espaco_anterior = 0.0
+        for i, flowable in enumerate(flowables):
+            _, h = flowable.wrap(self.largura, 100000)
+            if i > 0:
+                altura += espaco_anterior
+                altura += max(flowable.getSpaceBefore() - espaco_anterior, 0)
+            altura += h
+            deslocamentos.append(altura)
+            espaco_anterior = flowable.getSpaceAfter()
+
+        buffer = BytesIO()
+        canvas = Canvas(
+            buffer,
+            pagesize=(self.largura + 2 * self.MARGEM, altura + 2 * self.MARGEM),
+            invariant=1
+        )
+        for flowable, deslocamento in zip(flowables, deslocamentos):
+            flowable.drawOn(canvas, self.MARGEM, self.MARGEM + altura - deslocamento)
+        canvas.showPage()
+        canvas.save()
+
+        buffer.seek(0)
+        return FragmentoRenderizado(
+            pagina=PdfReader(buffer).pages[0],
+            altura=altura,
+            espaco_antes=flowables[0].getSpaceBefore(),
+            espaco_depois=flowables[-1].getSpaceAfter()
+        )
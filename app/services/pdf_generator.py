@@ -2,73 +2,40 @@
 Serviço de Geração de PDF
 """
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.lib.colors import HexColor, white, black
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Flowable
 
-import os
-from typing import Optional
+from typing import Any, BinaryIO, Collection, Dict, List, Optional, Tuple, Union
 
-from app.utils.formatters import formatar_moeda_br
+from app.models.proposta import RetornoInvestimentoColunas
+from app.services.templates import ContextoDocumento, MarcadorGrupo, TemplateCompilado, obter_template
+
+
+# Argumentos de gerar_proposta_plana disponíveis como placeholders nos templates
+CAMPOS_VALORES = (
+    "nome_cliente", "modulos_quantidade", "especificacoes_modulo", "inversores_quantidade",
+    "especificacoes_inversores", "investimento_kit", "investimento_mao_de_obra",
+    "investimento_total", "ano_payback", "valor_payback", "economia_25_anos"
+)
+
+
+def valores_documento(dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Valores dos placeholders a partir dos argumentos de gerar_proposta_plana"""
+    valores = {campo: dados[campo] for campo in CAMPOS_VALORES}
+    valores["plural_inversores"] = "es" if dados["inversores_quantidade"] > 1 else ""
+    return valores
 
 
 class PDFGenerator:
-    
-    COR_AZUL_ESCURO = HexColor('#2C3E50')
-    COR_TEAL = HexColor('#16A085')
-    COR_LARANJA = HexColor('#E67E22')
-    COR_CINZA = HexColor('#7F8C8D')
-    COR_CINZA_CLARO = HexColor('#ECF0F1')
-    
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._criar_estilos_customizados()
-    
-    def _criar_estilos_customizados(self):
-        self.styles.add(ParagraphStyle(
-            name='TituloPrincipal',
-            parent=self.styles['Heading1'],
-            fontSize=28,
-            textColor=self.COR_AZUL_ESCURO,
-            alignment=TA_CENTER,
-            spaceAfter=20,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Corpo',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=black,
-            alignment=TA_JUSTIFY,
-            spaceBefore=5,
-            spaceAfter=5,
-            leading=14
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Cliente',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=self.COR_AZUL_ESCURO,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Destaque',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            textColor=self.COR_TEAL,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold',
-            spaceBefore=10,
-            spaceAfter=5
-        ))
-    
+    """Diagrama a proposta a partir de um template compilado (ver app.services.templates)"""
+
+    def __init__(self, template: Optional[TemplateCompilado] = None):
+        """
+        Args:
+            template: Template usado quando a chamada não informa outro
+                (padrão: TEMPLATE_PADRAO)
+        """
+        self.template = template or obter_template()
+
     def gerar_proposta_plana(
         self,
         nome_cliente: str,
@@ -79,159 +46,84 @@ class PDFGenerator:
         investimento_kit: float,
         investimento_mao_de_obra: float,
         investimento_total: float,
-        grafico_producao_path: str,
-        tabela_retorno_path: str,
+        grafico_producao: Union[str, BinaryIO, Flowable],
+        tabela_retorno: Union[str, BinaryIO, None],
         ano_payback: Optional[int],
         valor_payback: Optional[float],
         economia_25_anos: float,
-        output_path: str
-    ):
+        output_path: Union[str, BinaryIO],
+        dados_retorno: Optional[RetornoInvestimentoColunas] = None,
+        fragmentos: Optional[Dict[str, Flowable]] = None,
+        sensibilidade: Optional[Dict[str, Any]] = None,
+        compressao_paginas: Optional[int] = None,
+        template: Optional[TemplateCompilado] = None,
+        grupos: Optional[Collection[int]] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Monta o PDF da proposta.
+
+        As imagens podem ser caminhos de arquivo ou buffers em memória (o
+        gráfico também pode ser um Flowable vetorial, ex.: Drawing), e
+        output_path pode ser um caminho ou um buffer gravável (ex.: BytesIO).
+        Sem imagem da tabela de retorno, `dados_retorno` é desenhado como
+        uma tabela vetorial nativa do reportlab.
+
+        `fragmentos` substitui trechos estáticos (ver
+        TemplateCompilado.fragmentos_estaticos) por outros flowables, ex.:
+        espaços reservados da MontagemPaginas.
+
+        `sensibilidade` ({"grafico": Flowable, "resumo": dict}) acrescenta a
+        seção de análise de sensibilidade (ver SimulacaoMonteCarlo.resumo).
+
+        `compressao_paginas` (0/1) define a compressão dos streams de página;
+        None mantém o padrão do reportlab (ver PerfilSaida).
+
+        `template` substitui o template do gerador nesta chamada.
+
+        `grupos` limita o documento a alguns grupos de páginas do template
+        (ver TemplateCompilado.story).
+
+        Returns:
+            Páginas (início, fim exclusivo; base 0) de cada grupo de páginas
+            do template no PDF gerado; grupos ausentes ficam vazios
+        """
+        template = template or self.template
+        contexto = ContextoDocumento(
+            valores=valores_documento(locals()),
+            grafico_producao=grafico_producao,
+            tabela_retorno=tabela_retorno,
+            dados_retorno=dados_retorno,
+            sensibilidade=sensibilidade,
+            fragmentos=fragmentos
+        )
+
         doc = SimpleDocTemplate(
             output_path,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
+            pagesize=template.tamanho_pagina,
+            rightMargin=template.margens["direita"],
+            leftMargin=template.margens["esquerda"],
+            topMargin=template.margens["superior"],
+            bottomMargin=template.margens["inferior"],
+            # Data e ID fixos: entradas idênticas geram bytes idênticos
+            invariant=1,
+            pageCompression=compressao_paginas
         )
-        
-        story = []
-        
-        # PÁGINA 1 - CAPA
-        story.append(Spacer(1, 3*cm))
-        story.append(Paragraph("LEVEL5", self.styles['TituloPrincipal']))
-        story.append(Paragraph("ENGENHARIA ELÉTRICA", ParagraphStyle(
-            name='Subtitulo2',
-            fontSize=12,
-            textColor=self.COR_LARANJA,
-            alignment=TA_CENTER,
-            spaceAfter=50
-        )))
-        story.append(Spacer(1, 2*cm))
-        story.append(Paragraph("PROPOSTA", self.styles['TituloPrincipal']))
-        story.append(Paragraph("COMERCIAL", self.styles['TituloPrincipal']))
-        story.append(Spacer(1, 3*cm))
-        story.append(Paragraph("CLIENTE:", self.styles['Cliente']))
-        story.append(Paragraph(nome_cliente.upper(), ParagraphStyle(
-            name='ClienteNome',
-            fontSize=14,
-            textColor=self.COR_TEAL,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold',
-            spaceBefore=5
-        )))
-        story.append(PageBreak())
-        
-        # PÁGINA 2 - QUEM SOMOS + DESCRIÇÃO
-        story.append(self._criar_titulo_secao("QUEM SOMOS?"))
-        story.append(Paragraph(
-            """Somos uma empresa especializada no segmento de engenharia elétrica, com foco no 
-            desenvolvimento de projetos elétricos e na instalação de sistemas fotovoltaicos. Desde 2019, 
-            temos trabalhado para oferecer soluções eficientes e sustentáveis, sempre com alto padrão de 
-            qualidade. Ao longo de nossa trajetória, já realizamos mais de 700 projetos fotovoltaicos, 
-            contribuindo para a geração de energia limpa e a redução de custos energéticos de nossos 
-            clientes.""",
-            self.styles['Corpo']
-        ))
-        story.append(Spacer(1, 0.5*cm))
-        
-        story.append(self._criar_titulo_secao("FUNCIONAMENTO DO SISTEMA FOTOVOLTAICO"))
-        story.append(Paragraph(
-            """O sistema fotovoltaico é composto principalmente por três componentes: painéis solares, inversor e 
-            medidor bidirecional. Os painéis captam a energia solar e a convertem em energia elétrica de 
-            corrente contínua (CC). Em seguida, o inversor transforma essa corrente contínua em corrente 
-            alternada (CA), que pode ser utilizada pelos equipamentos elétricos.""",
-            self.styles['Corpo']
-        ))
-        story.append(Spacer(1, 0.5*cm))
-        
-        story.append(self._criar_titulo_secao("DESCRIÇÃO DOS ITENS:"))
-        story.append(Paragraph(f"• {modulos_quantidade} {especificacoes_modulo}", self.styles['Corpo']))
-        story.append(Paragraph(f"• {inversores_quantidade:02d} inversor{'es' if inversores_quantidade > 1 else ''} {especificacoes_inversores}", self.styles['Corpo']))
-        story.append(Spacer(1, 0.5*cm))
-        
-        story.append(self._criar_titulo_secao("GARANTIA"))
-        story.append(Paragraph("A garantia do sistema fotovoltaico é composta por:", self.styles['Corpo']))
-        garantias = [
-            "<b>Módulos Fotovoltaicos:</b> Garantia de desempenho linear de 25 anos e garantia contra defeitos de fabricação de 15 anos.",
-            "<b>Inversor:</b> Garantia de 10 anos contra defeitos de fabricação.",
-            "<b>Estrutura de Fixação:</b> Garantia contra corrosão e defeitos de fabricação.",
-            "<b>Serviço de Instalação:</b> Garantia de 1 ano."
-        ]
-        for garantia in garantias:
-            story.append(Paragraph(f"• {garantia}", self.styles['Corpo']))
-        story.append(PageBreak())
-        
-        # PÁGINA 3 - INVESTIMENTO
-        story.append(self._criar_titulo_secao("INVESTIMENTO"))
-        dados_investimento = [
-            ['KIT FOTOVOLTAICO', formatar_moeda_br(investimento_kit)],
-            ['MÃO DE OBRA, PROJETO E PERIFÉRICOS', formatar_moeda_br(investimento_mao_de_obra)],
-            ['INVESTIMENTO TOTAL', formatar_moeda_br(investimento_total)]
-        ]
-        tabela_invest = Table(dados_investimento, colWidths=[10*cm, 5*cm])
-        tabela_invest.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), white),
-            ('TEXTCOLOR', (0, 0), (-1, -1), self.COR_AZUL_ESCURO),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 0.5, self.COR_CINZA),
-            ('LINEBELOW', (0, -1), (-1, -1), 2, self.COR_TEAL),
-        ]))
-        story.append(tabela_invest)
-        story.append(Spacer(1, 1*cm))
-        
-        story.append(self._criar_titulo_secao("FORMAS DE PAGAMENTO"))
-        story.append(Paragraph("Oferecemos diversas formas de pagamento:", self.styles['Corpo']))
-        pagamentos = [
-            "<b>Pagamento à Vista:</b> Desconto especial.",
-            "<b>Financiamento Bancário:</b> Até 120 meses.",
-            "<b>Pagamento Parcelado:</b> Direto no cartão."
-        ]
-        for pag in pagamentos:
-            story.append(Paragraph(f"• {pag}", self.styles['Corpo']))
-        story.append(PageBreak())
-        
-        # PÁGINA 4 - CUSTO X BENEFÍCIO
-        story.append(self._criar_titulo_secao("CUSTO X BENEFÍCIO"))
-        story.append(Paragraph("O gráfico abaixo ilustra a produção estimada de energia mês a mês.", self.styles['Corpo']))
-        if os.path.exists(grafico_producao_path):
-            story.append(Image(grafico_producao_path, width=16*cm, height=8*cm))
-        story.append(Spacer(1, 0.5*cm))
-        
-        story.append(self._criar_titulo_secao("RETORNO DO INVESTIMENTO"))
-        if ano_payback and valor_payback:
-            story.append(Paragraph(
-                f"• <b>Lucro a partir do {ano_payback}º ano:</b> Retorno acumulado de <b>{formatar_moeda_br(valor_payback)}</b>",
-                self.styles['Destaque']
-            ))
-        story.append(Paragraph(
-            f"• <b>Retorno em 25 anos:</b> Economia acumulada de <b>{formatar_moeda_br(economia_25_anos)}</b>",
-            self.styles['Destaque']
-        ))
-        story.append(Spacer(1, 0.3*cm))
-        if os.path.exists(tabela_retorno_path):
-            story.append(Image(tabela_retorno_path, width=16*cm, height=18*cm))
-        
+        story = template.story(contexto, grupos)
+        # build() consome a lista do story
+        marcadores = [flowable for flowable in story if isinstance(flowable, MarcadorGrupo)]
         doc.build(story)
-    
-    def _criar_titulo_secao(self, titulo: str) -> Paragraph:
-        return Paragraph(
-            f'<font color="{self.COR_TEAL}">{titulo}</font>',
-            ParagraphStyle(
-                name='SecaoTitulo',
-                fontSize=14,
-                textColor=self.COR_AZUL_ESCURO,
-                alignment=TA_LEFT,
-                spaceBefore=15,
-                spaceAfter=10,
-                fontName='Helvetica-Bold',
-                backColor=self.COR_CINZA_CLARO,
-                borderPadding=8
-            )
-        )
+        return _paginas_grupos(marcadores, len(template.grupos), doc.page)
+
+
+def _paginas_grupos(marcadores: List[MarcadorGrupo], quantidade: int, total_paginas: int) -> List[Tuple[int, int]]:
+    """Intervalos de páginas de cada grupo a partir dos marcadores desenhados"""
+    inicios = {marcador.indice: marcador.pagina for marcador in marcadores if marcador.pagina is not None}
+    paginas = []
+    fim = total_paginas
+    for indice in reversed(range(quantidade)):
+        if indice in inicios:
+            paginas.append((inicios[indice], fim))
+            fim = inicios[indice]
+        else:
+            paginas.append((fim, fim))
+    return paginas[::-1]
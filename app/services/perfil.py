@@ -0,0 +1,290 @@
+"""
+Perfilamento de Requisições
+Executa uma renderização sob um profiler, sob demanda de um administrador,
+para investigar payloads específicos que ficam lentos.
+
+Dois modos:
+
+- deterministico: cProfile; gera um arquivo .pstats (snakeviz, pstats) com
+  contagem de chamadas e tempo de cada função
+- amostragem: uma thread lê a pilha da renderização a cada intervalo e gera
+  um perfil no formato do speedscope (https://www.speedscope.app); distorce
+  menos os tempos de funções curtas e muito chamadas
+
+Em ambos o tracemalloc registra o pico de memória e os maiores pontos de
+alocação (o rastreamento de memória deixa a execução mais lenta; compare os
+tempos entre si, não com a produção). O resumo agrupa o tempo por biblioteca
+(matplotlib, reportlab, numpy...) e lista as funções mais caras.
+
+Perfis simultâneos no mesmo processo são executados um de cada vez.
+Nada deste módulo é executado em requisições sem perfil.
+"""
+
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+MODOS_PERFIL = ("deterministico", "amostragem")
+
+# Pacotes reconhecidos no agrupamento por biblioteca
+BIBLIOTECAS = ("matplotlib", "reportlab", "numpy", "PIL", "pypdf", "pydantic", "fastapi", "starlette")
+
+_DIR_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Um perfil por vez no processo (ver perfilar)
+_trava = threading.Lock()
+
+
+@dataclass
+class Perfil:
+    """Artefatos e resumo de uma execução perfilada"""
+    modo: str
+    # Extensão do arquivo (ex.: ".pstats") -> conteúdo
+    artefatos: Dict[str, bytes] = field(default_factory=dict)
+    resumo: Dict[str, Any] = field(default_factory=dict)
+
+
+def perfilar(
+    funcao: Callable[..., Any],
+    *args,
+    modo: str = "deterministico",
+    intervalo_ms: float = 1.0,
+    **kwargs
+) -> Tuple[Any, Perfil]:
+    """
+    Executa `funcao` sob o profiler escolhido e o tracemalloc.
+
+    Args:
+        funcao: Função a perfilar (executada na thread atual)
+        modo: "deterministico" (cProfile) ou "amostragem" (speedscope)
+        intervalo_ms: Intervalo entre amostras no modo amostragem
+
+    Returns:
+        Tupla (retorno de funcao, Perfil)
+    """
+    if modo not in MODOS_PERFIL:
+        raise ValueError(f"Modo de perfil inválido: {modo}")
+
+    # tracemalloc e o switch interval valem para o processo todo: perfis
+    # simultâneos (executor em threads) se atrapalhariam
+    with _trava:
+        rastreando_memoria = not tracemalloc.is_tracing()
+        if rastreando_memoria:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        perfil = Perfil(modo=modo)
+        inicio = time.perf_counter()
+        try:
+            if modo == "deterministico":
+                profiler = cProfile.Profile()
+                retorno = profiler.runcall(funcao, *args, **kwargs)
+                duracao = time.perf_counter() - inicio
+                _resumir_cprofile(profiler, perfil)
+            else:
+                # A thread só amostra quando o GIL troca de dono; o intervalo padrão
+                # (5 ms) limitaria a resolução
+                intervalo_troca = sys.getswitchinterval()
+                sys.setswitchinterval(min(intervalo_troca, intervalo_ms / 1000))
+                amostrador = _Amostrador(threading.get_ident(), intervalo_ms / 1000)
+                amostrador.start()
+                try:
+                    retorno = funcao(*args, **kwargs)
+                finally:
+                    amostrador.parar()
+                    sys.setswitchinterval(intervalo_troca)
+                duracao = time.perf_counter() - inicio
+                _resumir_amostras(amostrador, perfil, getattr(funcao, "__name__", "renderizacao"))
+
+            _, pico = tracemalloc.get_traced_memory()
+            perfil.resumo["duracao_segundos"] = round(duracao, 4)
+            perfil.resumo["memoria"] = {
+                "pico_kib": round(pico / 1024, 1),
+                # Alocações ainda vivas ao final (inclui caches criados pela renderização)
+                "alocacoes_retidas": [
+                    {"origem": f"{_caminho_curto(estatistica.traceback[0].filename)}:{estatistica.traceback[0].lineno}",
+                     "kib": round(estatistica.size / 1024, 1),
+                     "blocos": estatistica.count}
+                    for estatistica in tracemalloc.take_snapshot().statistics("lineno")[:15]
+                ]
+            }
+        finally:
+            if rastreando_memoria:
+                tracemalloc.stop()
+
+    return retorno, perfil
+
+
+def biblioteca(arquivo: str) -> str:
+    """Biblioteca a que pertence o arquivo de uma função ("app", "python" ou um de BIBLIOTECAS)"""
+    if arquivo.startswith("~") or arquivo.startswith("<"):
+        return "python"
+    if os.path.abspath(arquivo).startswith(_DIR_APP + os.sep):
+        return "app"
+    partes = arquivo.replace("\\", "/").split("/")
+    for nome in BIBLIOTECAS:
+        if nome in partes:
+            return nome
+    return "python"
+
+
+def _resumir_cprofile(profiler: cProfile.Profile, perfil: Perfil):
+    estatisticas = pstats.Stats(profiler)
+    perfil.artefatos[".pstats"] = _serializar_pstats(estatisticas)
+
+    proprio: Dict[str, float] = {}
+    inclusivo: Dict[str, float] = {}
+    funcoes = []
+    for (arquivo, linha, nome), (_, chamadas, tt, ct, chamadores) in estatisticas.stats.items():
+        lib = biblioteca(arquivo)
+        proprio[lib] = proprio.get(lib, 0.0) + tt
+        if lib != "app":
+            for chamador, (_, _, _, ct_chamada) in chamadores.items():
+                if biblioteca(chamador[0]) == "app":
+                    inclusivo[lib] = inclusivo.get(lib, 0.0) + ct_chamada
+        funcoes.append((ct, tt, chamadas, f"{_caminho_curto(arquivo)}:{linha}({nome})"))
+
+    funcoes.sort(reverse=True)
+    inclusivo["app"] = estatisticas.total_tt
+    perfil.resumo["por_biblioteca"] = _tabela_bibliotecas(proprio, inclusivo)
+    perfil.resumo["funcoes"] = [
+        {"funcao": descricao, "chamadas": chamadas,
+         "inclusivo_segundos": round(ct, 4), "proprio_segundos": round(tt, 4)}
+        for ct, tt, chamadas, descricao in funcoes[:30]
+    ]
+
+
+def _serializar_pstats(estatisticas: pstats.Stats) -> bytes:
+    """Conteúdo de Stats.dump_stats sem passar por um arquivo"""
+    return marshal.dumps(estatisticas.stats)
+
+
+class _Amostrador(threading.Thread):
+    """Lê periodicamente a pilha de outra thread (sys._current_frames)"""
+
+    def __init__(self, alvo: int, intervalo: float):
+        super().__init__(name="perfil-amostrador", daemon=True)
+        self.alvo = alvo
+        self.intervalo = intervalo
+        self.quadros: List[Tuple[str, str, int]] = []
+        self.amostras: List[List[int]] = []
+        self.pesos: List[float] = []
+        self._indices: Dict[Tuple[str, str, int], int] = {}
+        self._parar = threading.Event()
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def run(self):
+        anterior = time.perf_counter()
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.alvo)
+            agora = time.perf_counter()
+            if quadro is None:
+                continue
+            pilha = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                chave = (codigo.co_name, codigo.co_filename, codigo.co_firstlineno)
+                indice = self._indices.get(chave)
+                if indice is None:
+                    indice = self._indices[chave] = len(self.quadros)
+                    self.quadros.append(chave)
+                pilha.append(indice)
+                quadro = quadro.f_back
+            pilha.reverse()
+            self.amostras.append(pilha)
+            self.pesos.append(agora - anterior)
+            anterior = agora
+
+
+def _resumir_amostras(amostrador: _Amostrador, perfil: Perfil, nome: str):
+    total = sum(amostrador.pesos)
+    speedscope = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": nome,
+        "exporter": "proposta-solar-api",
+        "shared": {
+            "frames": [
+                {"name": funcao, "file": arquivo, "line": linha}
+                for funcao, arquivo, linha in amostrador.quadros
+            ]
+        },
+        "profiles": [{
+            "type": "sampled",
+            "name": nome,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": total,
+            "samples": amostrador.amostras,
+            "weights": amostrador.pesos
+        }]
+    }
+    perfil.artefatos[".speedscope.json"] = json.dumps(speedscope).encode("utf-8")
+
+    bibliotecas_quadro = [biblioteca(arquivo) for _, arquivo, _ in amostrador.quadros]
+    proprio: Dict[str, float] = {}
+    inclusivo: Dict[str, float] = {"app": total}
+    por_funcao: Dict[int, List[float]] = {}
+    for pilha, peso in zip(amostrador.amostras, amostrador.pesos):
+        if not pilha:
+            continue
+        folha = bibliotecas_quadro[pilha[-1]]
+        proprio[folha] = proprio.get(folha, 0.0) + peso
+        # Bibliotecas chamadas diretamente por código da aplicação nesta pilha
+        chamadas_app = {
+            bibliotecas_quadro[chamado]
+            for chamador, chamado in zip(pilha, pilha[1:])
+            if bibliotecas_quadro[chamador] == "app" and bibliotecas_quadro[chamado] != "app"
+        }
+        for lib in chamadas_app:
+            inclusivo[lib] = inclusivo.get(lib, 0.0) + peso
+        for indice in set(pilha):
+            por_funcao.setdefault(indice, [0.0, 0.0])[0] += peso
+        por_funcao.setdefault(pilha[-1], [0.0, 0.0])[1] += peso
+
+    funcoes = sorted(por_funcao.items(), key=lambda item: item[1], reverse=True)
+    perfil.resumo["amostras"] = len(amostrador.amostras)
+    perfil.resumo["por_biblioteca"] = _tabela_bibliotecas(proprio, inclusivo)
+    perfil.resumo["funcoes"] = [
+        {"funcao": f"{_caminho_curto(amostrador.quadros[indice][1])}:{amostrador.quadros[indice][2]}"
+                   f"({amostrador.quadros[indice][0]})",
+         "inclusivo_segundos": round(inclusivo_funcao, 4), "proprio_segundos": round(proprio_funcao, 4)}
+        for indice, (inclusivo_funcao, proprio_funcao) in funcoes[:30]
+    ]
+
+
+def _tabela_bibliotecas(proprio: Dict[str, float], inclusivo: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    """
+    Tempo por biblioteca: próprio (dentro das funções dela) e inclusivo (das
+    chamadas que o código da aplicação faz a ela, com tudo o que ela chama;
+    para "app", a renderização inteira)
+    """
+    return {
+        lib: {
+            "proprio_segundos": round(proprio.get(lib, 0.0), 4),
+            "inclusivo_segundos": round(inclusivo.get(lib, 0.0), 4)
+        }
+        for lib in sorted(set(proprio) | set(inclusivo), key=lambda lib: -proprio.get(lib, 0.0))
+    }
+
+
+def _caminho_curto(arquivo: str) -> str:
+    """Caminho a partir do pacote (site-packages/... ou app/...)"""
+    normalizado = arquivo.replace("\\", "/")
+    for marcador in ("site-packages/", "dist-packages/"):
+        if marcador in normalizado:
+            return normalizado.split(marcador, 1)[1]
+    raiz = os.path.dirname(_DIR_APP).replace("\\", "/") + "/"
+    if normalizado.startswith(raiz):
+        return normalizado[len(raiz):]
+    return normalizado
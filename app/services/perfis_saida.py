@@ -0,0 +1,97 @@
+"""
+Perfis de Saída
+Presets nomeados que trocam qualidade das imagens por tamanho do PDF.
+
+Cada perfil controla a resolução dos gráficos rasterizados (matplotlib), a
+codificação das imagens embutidas e a compressão dos streams de página do
+reportlab:
+
+- padrao: comportamento original (150 dpi, PNG RGBA do matplotlib)
+- email: 100 dpi e PNG com paleta de 64 cores; os gráficos usam poucas
+  cores chapadas, então a quantização quase não é visível e o PDF fica
+  bem menor e mais rápido de montar
+- impressao: 300 dpi, PNG RGB sem perdas
+- arquivo: 200 dpi, PNG RGB sem perdas
+
+O gráfico e a tabela vetoriais (backend reportlab) não dependem do perfil;
+nesses casos apenas a compressão de página se aplica.
+"""
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Optional
+
+from PIL import Image
+
+# Codificações das imagens rasterizadas
+FORMATOS_IMAGEM = ("png", "png_rgb", "png_paleta", "jpeg")
+
+
+@dataclass(frozen=True)
+class PerfilSaida:
+    """Resolução, codificação das imagens e compressão de página de um perfil"""
+    nome: str
+    dpi: int = 150
+    # "png" (RGBA, como gerado pelo matplotlib), "png_rgb" (sem canal alfa),
+    # "png_paleta" (quantizado em `cores_paleta` cores) ou "jpeg"
+    formato_imagem: str = "png"
+    cores_paleta: int = 256
+    qualidade_jpeg: int = 85
+    # pageCompression do reportlab; None mantém o padrão (rl_config)
+    compressao_paginas: Optional[int] = None
+
+    @property
+    def extensao(self) -> str:
+        return ".jpg" if self.formato_imagem == "jpeg" else ".png"
+
+
+PERFIS_SAIDA: Dict[str, PerfilSaida] = {
+    "padrao": PerfilSaida("padrao"),
+    "email": PerfilSaida("email", dpi=100, formato_imagem="png_paleta", cores_paleta=64, compressao_paginas=1),
+    "impressao": PerfilSaida("impressao", dpi=300, formato_imagem="png_rgb", compressao_paginas=1),
+    "arquivo": PerfilSaida("arquivo", dpi=200, formato_imagem="png_rgb", compressao_paginas=1),
+}
+
+
+def obter_perfil_saida(nome: str) -> PerfilSaida:
+    """
+    Perfil pelo nome.
+
+    Raises:
+        ValueError: Se o perfil não existir
+    """
+    try:
+        return PERFIS_SAIDA[nome]
+    except KeyError:
+        raise ValueError(f"Perfil de saída inválido: {nome}") from None
+
+
+def codificar_imagem(png: bytes, perfil: PerfilSaida) -> bytes:
+    """
+    Recodifica um PNG gerado pelo matplotlib conforme o perfil.
+
+    Args:
+        png: PNG RGBA original
+        perfil: Perfil de saída
+
+    Returns:
+        Bytes da imagem no formato do perfil (o próprio PNG para "png")
+    """
+    if perfil.formato_imagem == "png":
+        return png
+    if perfil.formato_imagem not in FORMATOS_IMAGEM:
+        raise ValueError(f"Formato de imagem inválido: {perfil.formato_imagem}")
+
+    # Os gráficos têm fundo opaco; o canal alfa só aumenta o arquivo
+    imagem = Image.open(BytesIO(png)).convert("RGB")
+    saida = BytesIO()
+    if perfil.formato_imagem == "png_paleta":
+        # Median cut preserva o branco puro do fundo (o octree o desloca para
+        # um cinza claro, visível como uma moldura na página)
+        imagem = imagem.quantize(perfil.cores_paleta, method=Image.Quantize.MEDIANCUT)
+        imagem.save(saida, format="PNG", compress_level=6)
+    elif perfil.formato_imagem == "jpeg":
+        imagem.save(saida, format="JPEG", quality=perfil.qualidade_jpeg, subsampling=0)
+    else:
+        imagem.save(saida, format="PNG", compress_level=6)
+    return saida.getvalue()
@@ -0,0 +1,528 @@
+"""
+Pipeline de Renderização
+Executa o trabalho pesado (gráficos matplotlib + PDF reportlab) de uma proposta.
+
+As funções deste módulo rodam dentro dos workers do ExecutorRenderizacao e
+por isso recebem e devolvem apenas objetos serializáveis (picklable).
+"""
+
+import base64
+import os
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from app import config
+from app.models.proposta import PropostaRequest
+from app.services.armazenamento import caminho_arquivo
+from app.services.cache_graficos import CacheGraficos
+from app.services.calculos import CalculoService
+from app.services.graficos_reportlab import GraficoReportlabService
+from app.services.metricas import Cronometro
+from app.services.montagem import MontagemPaginas
+from app.services.pdf_generator import PDFGenerator, valores_documento
+from app.services.perfis_saida import obter_perfil_saida
+from app.services.revisao import (
+    RevisaoIndisponivel,
+    criar_estado,
+    entradas_documento,
+    gravar_estado,
+    grupos_reaproveitaveis,
+    impressoes_grupos,
+    montar_revisao,
+    nome_estado,
+    proposta_id,
+)
+from app.services.templates import TemplateCompilado, listar_templates, obter_template
+from app.utils.formatters import slug
+
+if TYPE_CHECKING:
+    from app.services.graficos import GraficoService
+
+
+@dataclass(frozen=True)
+class OpcoesRenderizacao:
+    """Opções que controlam como uma proposta é renderizada"""
+    output_dir: str
+    # Gráficos e PDF gerados em buffers, sem arquivos temporários em disco
+    em_memoria: bool = True
+    # Grava uma cópia do PDF em output_dir para o endpoint de download
+    salvar_arquivo: bool = True
+    # Tabela de retorno: "vetorial" (Table do reportlab) ou "imagem" (matplotlib)
+    modo_tabela: str = "vetorial"
+    # Backend do gráfico de produção (ver BACKENDS_GRAFICO)
+    backend_grafico: str = "reportlab"
+    # Mescla trechos estáticos pré-renderizados em vez de diagramar o documento inteiro
+    montagem_paginas: bool = False
+    # PDF devolvido em base64 (resposta JSON) ou como bytes (ZIP, application/pdf)
+    codificar_base64: bool = True
+    # Modo de perfilamento (ver app.services.perfil.MODOS_PERFIL); None desativa
+    perfil: Optional[str] = None
+    # Resolução/codificação das imagens e compressão do PDF (ver PERFIS_SAIDA)
+    perfil_saida: str = "padrao"
+    # Template do documento (ver app/templates); None usa TEMPLATE_PADRAO
+    template: Optional[str] = None
+
+
+@dataclass
+class ResultadoRenderizacao:
+    """Resultado de uma proposta renderizada"""
+    pdf_filename: Optional[str]
+    pdf_base64: Optional[str] = None
+    pdf_bytes: Optional[bytes] = None
+    dados_calculados: Dict[str, Any] = field(default_factory=dict)
+    # Hits/misses do cache de gráficos nesta renderização, somados pelo processo principal
+    cache_graficos: Dict[str, int] = field(default_factory=dict)
+    # Segundos gastos em cada estágio dentro do worker (ver Cronometro)
+    tempos: Dict[str, float] = field(default_factory=dict)
+    # Resumo do perfilamento e nomes dos artefatos gravados (apenas com opcoes.perfil)
+    perfil: Optional[Dict[str, Any]] = None
+    # Proposta revisada e seções renderizadas/reaproveitadas (apenas em revisar_proposta)
+    revisao: Optional[Dict[str, Any]] = None
+
+
+# Backends disponíveis para o gráfico de produção
+BACKENDS_GRAFICO = ("reportlab", "matplotlib")
+
+# Serviços criados uma única vez por processo (ver inicializar_worker).
+# O GraficoService (matplotlib) só é criado quando algum pedido precisa dele,
+# para que workers que usam apenas o backend reportlab não importem matplotlib.
+_grafico_service: Optional["GraficoService"] = None
+_grafico_reportlab: Optional[GraficoReportlabService] = None
+_pdf_generator: Optional[PDFGenerator] = None
+# Fragmentos pré-renderizados por template (nome, versão)
+_montagens: Dict[Tuple[str, str], MontagemPaginas] = {}
+_calculo_service: Optional[CalculoService] = None
+
+# pyplot mantém estado global (figura corrente); no executor de threads
+# os gráficos precisam ser gerados um de cada vez
+_lock_graficos = threading.Lock()
+
+
+def inicializar_worker():
+    """
+    Prepara o processo para renderizar propostas.
+
+    Cria os serviços e aquece os caches de fontes do reportlab e, se a
+    configuração padrão usa matplotlib, também do matplotlib, para que a
+    primeira requisição de cada worker não pague esse custo.
+    """
+    global _grafico_reportlab, _pdf_generator, _calculo_service
+
+    if _pdf_generator is not None:
+        return
+
+    _grafico_reportlab = GraficoReportlabService()
+    _pdf_generator = PDFGenerator()
+    _calculo_service = CalculoService()
+
+    if config.MONTAGEM_PAGINAS:
+        _obter_montagem(_pdf_generator.template)
+
+    if config.GRAFICO_BACKEND == "matplotlib" or config.TABELA_RETORNO_MODO == "imagem":
+        _obter_grafico_service()
+
+
+def precarregar():
+    """
+    Inicializa no processo atual tudo o que uma renderização usa, inclusive o
+    matplotlib, a tabela em imagem e todos os templates, independentemente
+    da configuração, e renderiza uma proposta de aquecimento para preencher os caches
+    preguiçosos (métricas de fontes, layout de texto, figura reutilizável).
+
+    Usado pelo servidor prefork antes de criar os workers, que herdam essa
+    memória já inicializada em vez de repetir o trabalho.
+    """
+    inicializar_worker()
+    _obter_grafico_service()
+    for nome in listar_templates():
+        obter_template(nome)
+
+    from PIL import Image
+    Image.init()
+
+    request = PropostaRequest(
+        nome="Aquecimento",
+        modulos_quantidade=10,
+        especificacoes_modulo="550W",
+        inversores_quantidade=1,
+        especificacoes_inversores="5kW",
+        investimento_kit_fotovoltaico=10000,
+        investimento_mao_de_obra=5000,
+        producao_mensal=[{"mes": mes, "geracao_total": 600} for mes in range(1, 13)],
+        parametros_financeiros={"tarifa_kwh": 1.0}
+    )
+    for backend, modo_tabela in (("reportlab", "vetorial"), ("matplotlib", "imagem")):
+        _renderizar(request, OpcoesRenderizacao(
+            output_dir=config.OUTPUT_DIR,
+            em_memoria=True,
+            salvar_arquivo=False,
+            modo_tabela=modo_tabela,
+            backend_grafico=backend,
+            codificar_base64=False
+        ))
+
+
+def _obter_grafico_service() -> "GraficoService":
+    """Importa o matplotlib e cria o GraficoService na primeira vez que é necessário"""
+    global _grafico_service
+
+    if _grafico_service is None:
+        from matplotlib import font_manager
+        from app.services.graficos import GraficoService
+
+        font_manager.findfont(font_manager.FontProperties(weight='bold'))
+
+        cache = None
+        if config.GRAFICO_CACHE_MAX_ITENS > 0 or config.GRAFICO_CACHE_DIR:
+            cache = CacheGraficos(
+                max_itens=config.GRAFICO_CACHE_MAX_ITENS,
+                diretorio=config.GRAFICO_CACHE_DIR or None,
+                max_bytes_disco=config.GRAFICO_CACHE_DISCO_MAX_MB * 1024 * 1024
+            )
+        _grafico_service = GraficoService(cache=cache, figura_reutilizavel=config.GRAFICO_FIGURA_REUTILIZAVEL)
+    return _grafico_service
+
+
+def _obter_montagem(template: TemplateCompilado) -> MontagemPaginas:
+    """Pré-renderiza os fragmentos estáticos do template na primeira vez que são necessários"""
+    chave = (template.nome, template.versao)
+    montagem = _montagens.get(chave)
+    if montagem is None:
+        montagem = _montagens[chave] = MontagemPaginas(_pdf_generator, template)
+    return montagem
+
+
+def renderizar_proposta(request: PropostaRequest, opcoes: OpcoesRenderizacao) -> ResultadoRenderizacao:
+    """
+    Gera gráficos, tabela e PDF de uma proposta.
+
+    Args:
+        request: Dados validados da proposta
+        opcoes: Opções de renderização (diretório de saída, modo em memória...)
+
+    Returns:
+        ResultadoRenderizacao com nome do arquivo, PDF (base64 ou bytes) e dados calculados
+    """
+    inicializar_worker()
+    if opcoes.perfil is None:
+        return _renderizar(request, opcoes)
+    return _renderizar_com_perfil(request, opcoes)
+
+
+def _renderizar_com_perfil(request: PropostaRequest, opcoes: OpcoesRenderizacao) -> ResultadoRenderizacao:
+    """
+    Renderiza sob o profiler e grava os artefatos no armazenamento, com o
+    mesmo nome base do PDF (ou um nome próprio quando o PDF não é salvo).
+    """
+    from app.services.perfil import perfilar
+
+    resultado, perfil = perfilar(
+        _renderizar, request, opcoes,
+        modo=opcoes.perfil,
+        intervalo_ms=config.PERFIL_INTERVALO_MS
+    )
+
+    base = resultado.pdf_filename[:-len(".pdf")] if resultado.pdf_filename else f"perfil_{uuid.uuid4().hex[:12]}"
+    arquivos = []
+    for extensao, conteudo in perfil.artefatos.items():
+        nome = f"{base}{extensao}"
+        with open(_preparar_caminho(opcoes.output_dir, nome), "wb") as f:
+            f.write(conteudo)
+        arquivos.append(nome)
+
+    resultado.perfil = {"modo": perfil.modo, "arquivos": arquivos, **perfil.resumo}
+    return resultado
+
+
+def revisar_proposta(
+    request: PropostaRequest,
+    opcoes: OpcoesRenderizacao,
+    estado: Dict[str, Any]
+) -> ResultadoRenderizacao:
+    """
+    Gera a revisão de uma proposta salva, renderizando apenas os grupos de
+    páginas afetados pelas alterações (ver app.services.revisao).
+
+    Args:
+        request: Requisição anterior com as alterações aplicadas
+        opcoes: Opções herdadas da proposta anterior
+        estado: Estado de revisão da proposta anterior
+
+    Raises:
+        RevisaoIndisponivel: Se o PDF anterior já foi removido
+    """
+    inicializar_worker()
+    return _renderizar(request, opcoes, estado)
+
+
+def _renderizar(
+    request: PropostaRequest,
+    opcoes: OpcoesRenderizacao,
+    revisao: Optional[Dict[str, Any]] = None
+) -> ResultadoRenderizacao:
+    cronometro = Cronometro()
+
+    investimento_total = _calculo_service.calcular_investimento_total(
+        request.investimento_kit_fotovoltaico,
+        request.investimento_mao_de_obra
+    )
+    dados_retorno = request.retorno_investimento
+    if dados_retorno is None:
+        dados_retorno = _calculo_service.projetar_retorno(
+            investimento_total, request.producao_mensal, request.parametros_financeiros
+        )
+    ano_payback, valor_payback = _calculo_service.encontrar_ano_payback(dados_retorno)
+    economia_25_anos = _calculo_service.calcular_economia_total(dados_retorno)
+    parametros = request.parametros_financeiros
+    indicadores = _calculo_service.analisar_proposta(
+        investimento_total, dados_retorno,
+        parametros.taxa_desconto if parametros is not None else None
+    )
+    cronometro.marcar("calculos")
+
+    if opcoes.backend_grafico not in BACKENDS_GRAFICO:
+        raise ValueError(f"Backend de gráfico inválido: {opcoes.backend_grafico}")
+    perfil_saida = obter_perfil_saida(opcoes.perfil_saida)
+    template = obter_template(opcoes.template)
+
+    nome_arquivo = None
+    if opcoes.salvar_arquivo:
+        nome_arquivo = f"proposta_{slug(request.nome, 'cliente')[:60]}_{uuid.uuid4().hex[:8]}.pdf"
+
+    dados_pdf = dict(
+        nome_cliente=request.nome,
+        modulos_quantidade=request.modulos_quantidade,
+        especificacoes_modulo=request.especificacoes_modulo,
+        inversores_quantidade=request.inversores_quantidade,
+        especificacoes_inversores=request.especificacoes_inversores,
+        investimento_kit=request.investimento_kit_fotovoltaico,
+        investimento_mao_de_obra=request.investimento_mao_de_obra,
+        investimento_total=investimento_total,
+        ano_payback=ano_payback,
+        valor_payback=valor_payback,
+        economia_25_anos=economia_25_anos,
+        dados_retorno=dados_retorno,
+        compressao_paginas=perfil_saida.compressao_paginas
+    )
+
+    # Impressões dos grupos de páginas: gravadas com o PDF salvo e, numa
+    # revisão, comparadas com as anteriores para escolher o que renderizar
+    entradas = None
+    impressoes = None
+    if nome_arquivo or revisao is not None:
+        entradas = entradas_documento(
+            request, valores_documento(dados_pdf), dados_retorno, investimento_total,
+            opcoes.backend_grafico, opcoes.modo_tabela, opcoes.perfil_saida
+        )
+        impressoes = impressoes_grupos(template, entradas, opcoes.perfil_saida)
+
+    grupos = list(range(len(template.grupos)))
+    reaproveitados: Set[int] = set()
+    if revisao is not None:
+        reaproveitados = grupos_reaproveitaveis(revisao, template, impressoes)
+        grupos = [indice for indice in grupos if indice not in reaproveitados]
+    dependencias = frozenset().union(*(template.dependencias_grupo(indice) for indice in grupos))
+
+    sensibilidade = None
+    resumo_sensibilidade = None
+    if request.analise_sensibilidade is not None:
+        anterior = revisao.get("sensibilidade") if revisao is not None else None
+        if (anterior and "sensibilidade" not in dependencias
+                and anterior["entrada"] == entradas["sensibilidade"]):
+            resumo_sensibilidade = anterior["dados_calculados"]
+        else:
+            simulacao = _calculo_service.simular_proposta(
+                investimento_total, request.producao_mensal,
+                request.parametros_financeiros, request.analise_sensibilidade
+            )
+            resumo = simulacao.resumo()
+            sensibilidade = {
+                "grafico": _grafico_reportlab.gerar_grafico_sensibilidade(resumo["faixas_saldo"]),
+                "resumo": resumo
+            }
+            resumo_sensibilidade = {
+                "payback": resumo["payback"],
+                "economia_total": resumo["economia_total"]["percentis"]
+            }
+            cronometro.marcar("sensibilidade")
+
+    # Sem output_dir os PNGs ficam apenas em memória (sempre, numa revisão)
+    dir_imagens = None if opcoes.em_memoria or revisao is not None else opcoes.output_dir
+
+    gerar_grafico = "grafico_producao" in dependencias
+    gerar_tabela = opcoes.modo_tabela == "imagem" and "tabela_retorno" in dependencias
+
+    cache_graficos = {"hits": 0, "misses": 0}
+    grafico_producao = None
+    tabela_retorno = None
+
+    if gerar_grafico and opcoes.backend_grafico == "reportlab":
+        grafico_producao = _grafico_reportlab.gerar_grafico_producao(
+            dados_producao=request.producao_mensal,
+            quantidade_modulos=request.modulos_quantidade
+        )
+        cronometro.marcar("grafico_producao")
+
+    if (gerar_grafico and opcoes.backend_grafico == "matplotlib") or gerar_tabela:
+        with _lock_graficos:
+            grafico_service = _obter_grafico_service()
+            cache = grafico_service.cache
+            hits_antes = cache.hits if cache else 0
+            misses_antes = cache.misses if cache else 0
+
+            if gerar_grafico and opcoes.backend_grafico == "matplotlib":
+                grafico_producao = grafico_service.gerar_grafico_producao(
+                    dados_producao=request.producao_mensal,
+                    quantidade_modulos=request.modulos_quantidade,
+                    output_dir=dir_imagens,
+                    perfil_saida=perfil_saida
+                )
+                cronometro.marcar("grafico_producao")
+
+            if gerar_tabela:
+                tabela_retorno = grafico_service.gerar_tabela_retorno(
+                    dados_retorno=dados_retorno,
+                    output_dir=dir_imagens,
+                    perfil_saida=perfil_saida
+                )
+                cronometro.marcar("tabela_retorno")
+
+            if cache:
+                cache_graficos = {
+                    "hits": cache.hits - hits_antes,
+                    "misses": cache.misses - misses_antes
+                }
+
+    dados_pdf.update(
+        grafico_producao=grafico_producao,
+        tabela_retorno=tabela_retorno,
+        sensibilidade=sensibilidade
+    )
+
+    if opcoes.montagem_paginas:
+        gerador = _obter_montagem(template)
+    else:
+        gerador = _pdf_generator
+        dados_pdf["template"] = template
+
+    if revisao is not None:
+        pdf_bytes, paginas = _gerar_revisao(gerador, dados_pdf, opcoes, revisao, grupos, reaproveitados)
+        cronometro.marcar("pdf")
+        if nome_arquivo:
+            with open(_preparar_caminho(opcoes.output_dir, nome_arquivo), "wb") as f:
+                f.write(pdf_bytes)
+            cronometro.marcar("gravacao")
+    elif opcoes.em_memoria:
+        buffer = BytesIO()
+        paginas = gerador.gerar_proposta_plana(**dados_pdf, output_path=buffer)
+        pdf_bytes = buffer.getvalue()
+        cronometro.marcar("pdf")
+        if nome_arquivo:
+            with open(_preparar_caminho(opcoes.output_dir, nome_arquivo), "wb") as f:
+                f.write(pdf_bytes)
+            cronometro.marcar("gravacao")
+    else:
+        if nome_arquivo:
+            pdf_path = _preparar_caminho(opcoes.output_dir, nome_arquivo)
+        else:
+            pdf_path = os.path.join(opcoes.output_dir, f"proposta_{uuid.uuid4().hex}.pdf")
+        try:
+            paginas = gerador.gerar_proposta_plana(**dados_pdf, output_path=pdf_path)
+            with open(pdf_path, "rb") as f:
+                pdf_bytes = f.read()
+            cronometro.marcar("pdf")
+        finally:
+            for caminho in (grafico_producao, tabela_retorno):
+                if isinstance(caminho, str) and os.path.exists(caminho):
+                    os.remove(caminho)
+            if not nome_arquivo and os.path.exists(pdf_path):
+                os.remove(pdf_path)
+        cronometro.marcar("limpeza")
+
+    if nome_arquivo:
+        estado = criar_estado(
+            nome_arquivo, request, asdict(opcoes), template, impressoes, paginas,
+            sensibilidade={
+                "entrada": entradas["sensibilidade"],
+                "dados_calculados": resumo_sensibilidade
+            } if resumo_sensibilidade else None,
+            revisao_de=proposta_id(revisao["pdf_filename"]) if revisao is not None else None
+        )
+        gravar_estado(_preparar_caminho(opcoes.output_dir, nome_estado(nome_arquivo)), estado)
+        cronometro.marcar("gravacao")
+
+    dados_calculados = {
+        "investimento_total": investimento_total,
+        "ano_payback": ano_payback,
+        "valor_payback": valor_payback,
+        "economia_25_anos": economia_25_anos,
+        "indicadores": indicadores
+    }
+    if resumo_sensibilidade:
+        dados_calculados["sensibilidade"] = resumo_sensibilidade
+
+    pdf_base64 = None
+    if opcoes.codificar_base64:
+        pdf_base64 = base64.b64encode(pdf_bytes).decode("utf-8")
+        cronometro.marcar("codificacao")
+
+    resumo_revisao = None
+    if revisao is not None:
+        secoes = template.grupos_paginas
+        resumo_revisao = {
+            "revisao_de": proposta_id(revisao["pdf_filename"]),
+            "secoes_renderizadas": [nome for indice in grupos for nome in secoes[indice]],
+            "secoes_reaproveitadas": [nome for indice in sorted(reaproveitados) for nome in secoes[indice]]
+        }
+
+    return ResultadoRenderizacao(
+        pdf_filename=nome_arquivo,
+        pdf_base64=pdf_base64,
+        pdf_bytes=None if opcoes.codificar_base64 else pdf_bytes,
+        dados_calculados=dados_calculados,
+        cache_graficos=cache_graficos,
+        tempos=cronometro.tempos,
+        revisao=resumo_revisao
+    )
+
+
+def _gerar_revisao(
+    gerador: Any,
+    dados_pdf: Dict[str, Any],
+    opcoes: OpcoesRenderizacao,
+    revisao: Dict[str, Any],
+    grupos: List[int],
+    reaproveitados: Set[int]
+) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Diagrama apenas os grupos alterados e junta as demais páginas do PDF anterior"""
+    pdf_parcial = None
+    paginas_parciais = None
+    if grupos:
+        buffer = BytesIO()
+        paginas_parciais = gerador.gerar_proposta_plana(**dados_pdf, grupos=grupos, output_path=buffer)
+        pdf_parcial = buffer.getvalue()
+
+    try:
+        return montar_revisao(
+            caminho_arquivo(opcoes.output_dir, revisao["pdf_filename"]),
+            [tuple(grupo["paginas"]) for grupo in revisao["grupos"]],
+            pdf_parcial,
+            paginas_parciais,
+            reaproveitados
+        )
+    except FileNotFoundError:
+        raise RevisaoIndisponivel("PDF da proposta anterior foi removido") from None
+
+
+def _preparar_caminho(output_dir: str, nome_arquivo: str) -> str:
+    """Caminho do PDF no armazenamento, criando o shard se necessário"""
+    caminho = caminho_arquivo(output_dir, nome_arquivo)
+    # Apenas o shard: OUTPUT_DIR já existe e o nome não contém separadores
+    try:
+        os.mkdir(os.path.dirname(caminho))
+    except FileExistsError:
+        pass
+    return caminho
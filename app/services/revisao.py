@@ -0,0 +1,227 @@
+"""
+Revisão de Propostas
+Regera uma proposta salva a partir de uma atualização parcial dos dados,
+renderizando apenas os grupos de páginas afetados.
+
+Ao salvar um PDF, a renderização grava ao lado dele um estado de revisão
+(`<id>.revisao.json`) com a requisição validada, as opções de renderização
+e, para cada grupo de páginas do template (ver TemplateCompilado.grupos), as
+páginas que ocupa no PDF e uma impressão digital das suas entradas: os
+valores dos placeholders e os dados do gráfico, da tabela de retorno e da
+análise de sensibilidade que as seções do grupo usam.
+
+Na revisão os cálculos (baratos) são refeitos com os dados atualizados e
+apenas os grupos cuja impressão mudou são diagramados, num PDF parcial; os
+gráficos e a simulação só são gerados se algum desses grupos os usa. As
+páginas dos demais grupos são copiadas do PDF anterior com pypdf. Como cada
+grupo começa numa página nova, o resultado tem a mesma paginação da
+renderização completa.
+"""
+
+import hashlib
+import json
+import os
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pypdf import PdfReader, PdfWriter
+
+from app.models.proposta import PropostaRequest, RetornoInvestimentoColunas
+from app.services.templates import TemplateCompilado
+
+# Sufixo do estado de revisão, gravado ao lado do PDF
+EXTENSAO_ESTADO = ".revisao.json"
+
+# Versão do formato do estado; estados de outra versão não são revisáveis
+VERSAO_ESTADO = 1
+
+# Opções de renderização herdadas pelas revisões
+OPCOES_HERDADAS = ("backend_grafico", "modo_tabela", "perfil_saida", "template", "montagem_paginas")
+
+
+class RevisaoIndisponivel(Exception):
+    """Proposta sem estado de revisão válido ou com o PDF já removido"""
+
+
+def proposta_id(pdf_filename: str) -> str:
+    """Id da proposta: nome do PDF sem a extensão"""
+    return pdf_filename[:-len(".pdf")]
+
+
+def nome_estado(pdf_filename: str) -> str:
+    return f"{proposta_id(pdf_filename)}{EXTENSAO_ESTADO}"
+
+
+def entradas_documento(
+    request: PropostaRequest,
+    valores: Dict[str, Any],
+    dados_retorno: RetornoInvestimentoColunas,
+    investimento_total: float,
+    backend_grafico: str,
+    modo_tabela: str,
+    perfil_saida: str
+) -> Dict[str, Any]:
+    """
+    Entradas de cada dependência das seções (ver SecaoCompilada.dependencias).
+
+    Placeholders entram pelo valor; gráfico, tabela e sensibilidade pelo
+    resumo (SHA-256) dos dados e opções que os geram.
+    """
+    producao = request.producao_mensal.model_dump(mode="json")
+    entradas = dict(valores)
+    entradas["grafico_producao"] = _resumo(
+        producao, request.modulos_quantidade, backend_grafico,
+        perfil_saida if backend_grafico == "matplotlib" else None
+    )
+    entradas["tabela_retorno"] = _resumo(
+        dados_retorno.ano.tolist(), dados_retorno.saldo.tolist(),
+        dados_retorno.economia_mensal.tolist(), dados_retorno.economia_anual.tolist(),
+        modo_tabela, perfil_saida if modo_tabela == "imagem" else None
+    )
+    entradas["sensibilidade"] = None
+    if request.analise_sensibilidade is not None:
+        entradas["sensibilidade"] = _resumo(
+            investimento_total, producao,
+            request.parametros_financeiros.model_dump(mode="json"),
+            request.analise_sensibilidade.model_dump(mode="json")
+        )
+    return entradas
+
+
+def impressoes_grupos(template: TemplateCompilado, entradas: Dict[str, Any], perfil_saida: str) -> List[str]:
+    """Impressão digital de cada grupo de páginas: muda quando alguma entrada do grupo muda"""
+    impressoes = []
+    for indice in range(len(template.grupos)):
+        dependencias = sorted(template.dependencias_grupo(indice))
+        impressoes.append(_resumo(
+            template.nome, template.versao, perfil_saida, indice,
+            {nome: entradas.get(nome) for nome in dependencias}
+        ))
+    return impressoes
+
+
+def grupos_reaproveitaveis(estado: Dict[str, Any], template: TemplateCompilado, impressoes: List[str]) -> Set[int]:
+    """Grupos cujas páginas podem ser copiadas do PDF anterior"""
+    if estado.get("template") != [template.nome, template.versao]:
+        return set()
+    grupos = estado["grupos"]
+    if len(grupos) != len(impressoes):
+        return set()
+    return {indice for indice, grupo in enumerate(grupos) if grupo["impressao"] == impressoes[indice]}
+
+
+def criar_estado(
+    pdf_filename: str,
+    request: PropostaRequest,
+    opcoes: Dict[str, Any],
+    template: TemplateCompilado,
+    impressoes: List[str],
+    paginas: List[Tuple[int, int]],
+    sensibilidade: Optional[Dict[str, Any]],
+    revisao_de: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Estado de revisão de um PDF salvo.
+
+    Args:
+        pdf_filename: Nome do PDF no armazenamento
+        request: Requisição validada que gerou o PDF
+        opcoes: Opções de renderização (apenas OPCOES_HERDADAS são guardadas)
+        template: Template usado
+        impressoes: Impressão de cada grupo (ver impressoes_grupos)
+        paginas: Páginas de cada grupo no PDF (início, fim exclusivo)
+        sensibilidade: Resumo da análise de sensibilidade em dados_calculados,
+            reaproveitado quando o grupo da sensibilidade não muda
+        revisao_de: Id da proposta revisada
+    """
+    return {
+        "versao": VERSAO_ESTADO,
+        "pdf_filename": pdf_filename,
+        "revisao_de": revisao_de,
+        "request": request.model_dump(mode="json"),
+        "opcoes": {nome: opcoes[nome] for nome in OPCOES_HERDADAS},
+        "template": [template.nome, template.versao],
+        "grupos": [
+            {"secoes": list(secoes), "impressao": impressao, "paginas": list(intervalo)}
+            for secoes, impressao, intervalo in zip(template.grupos_paginas, impressoes, paginas)
+        ],
+        "sensibilidade": sensibilidade
+    }
+
+
+def gravar_estado(caminho: str, estado: Dict[str, Any]):
+    """Grava o estado de forma atômica (outro processo pode lê-lo a qualquer momento)"""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, separators=(",", ":"), default=str)
+    os.replace(temporario, caminho)
+
+
+def carregar_estado(caminho: str) -> Dict[str, Any]:
+    """
+    Raises:
+        RevisaoIndisponivel: Se o estado não existe ou é de outra versão
+    """
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            estado = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        raise RevisaoIndisponivel("Proposta sem estado de revisão") from None
+    if estado.get("versao") != VERSAO_ESTADO:
+        raise RevisaoIndisponivel("Estado de revisão de outra versão")
+    return estado
+
+
+def aplicar_alteracoes(estado: Dict[str, Any], alteracoes: Dict[str, Any]) -> PropostaRequest:
+    """
+    Requisição da revisão: a requisição anterior com os campos alterados.
+
+    Raises:
+        ValueError: Se algum campo não existe em PropostaRequest
+        pydantic.ValidationError: Se o resultado não é uma proposta válida
+    """
+    desconhecidos = sorted(set(alteracoes) - set(PropostaRequest.model_fields))
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+    return PropostaRequest.model_validate({**estado["request"], **alteracoes})
+
+
+def montar_revisao(
+    pdf_anterior: str,
+    paginas_anteriores: List[Tuple[int, int]],
+    pdf_parcial: Optional[bytes],
+    paginas_parciais: Optional[List[Tuple[int, int]]],
+    reaproveitados: Set[int]
+) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Junta, na ordem do template, as páginas reaproveitadas do PDF anterior e
+    as do PDF parcial com os grupos renderizados novamente.
+
+    Returns:
+        (PDF montado, páginas de cada grupo no PDF montado)
+    """
+    anterior = PdfReader(pdf_anterior) if reaproveitados else None
+    parcial = PdfReader(BytesIO(pdf_parcial)) if pdf_parcial else None
+
+    # Os grupos seguem o template atual; sem PDF parcial, todos são reaproveitados
+    quantidade = len(paginas_parciais) if paginas_parciais is not None else len(paginas_anteriores)
+    escritor = PdfWriter()
+    paginas = []
+    for indice in range(quantidade):
+        if indice in reaproveitados:
+            leitor, (inicio, fim) = anterior, paginas_anteriores[indice]
+        else:
+            leitor, (inicio, fim) = parcial, paginas_parciais[indice]
+        inicio_montado = len(escritor.pages)
+        if fim > inicio:
+            escritor.append(leitor, pages=(inicio, fim), import_outline=False)
+        paginas.append((inicio_montado, len(escritor.pages)))
+
+    saida = BytesIO()
+    escritor.write(saida)
+    return saida.getvalue(), paginas
+
+
+def _resumo(*partes: Any) -> str:
+    serializado = json.dumps(partes, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
@@ -0,0 +1,685 @@
+"""
+Templates de Proposta
+Layout, textos e estilos do PDF definidos como dados (JSON em TEMPLATES_DIR)
+e compilados uma única vez por processo.
+
+Um template descreve a página, a paleta de cores, os estilos de parágrafo e
+as seções do documento, cada uma com uma lista de blocos:
+
+- paragrafo, titulo, lista: textos com placeholders no formato de
+  str.format ({investimento_total:moeda}; ver _Formatador)
+- espaco, quebra_pagina, tabela
+- grafico_producao, tabela_retorno, sensibilidade: conteúdo gerado a
+  partir dos dados da proposta
+- fragmento: grupo de blocos sem placeholders, que a MontagemPaginas
+  pré-renderiza uma vez
+
+A compilação resolve cores e cria os ParagraphStyle e TableStyle; cada bloco
+vira uma fábrica que só instancia os flowables da requisição. O resultado
+fica em cache por nome e versão: alterar o arquivo e a "versao" recompila o
+template na próxima requisição, sem reiniciar o processo.
+
+As seções são agrupadas em grupos de páginas separados por quebras de página
+incondicionais. Cada grupo começa numa página nova, então suas páginas não
+dependem dos demais grupos; a revisão de propostas (app.services.revisao)
+renderiza apenas os grupos cujas dependências mudaram.
+"""
+
+import json
+import os
+import re
+import string
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, Union
+
+from reportlab.lib import pagesizes
+from reportlab.lib.colors import Color, HexColor, black, white
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Flowable, Image, KeepTogether, PageBreak, Paragraph, Spacer, Table, TableStyle
+
+from app import config
+from app.models.proposta import RetornoInvestimentoColunas
+from app.utils.formatters import formatar_moeda_br, formatar_numero_br, formatar_saldo_br
+
+_ALINHAMENTOS = {"left": TA_LEFT, "center": TA_CENTER, "right": TA_RIGHT, "justify": TA_JUSTIFY}
+
+# Atributos de ParagraphStyle que recebem cores
+_ATRIBUTOS_COR = ("textColor", "backColor", "borderColor")
+
+# Dependências das seções além dos placeholders (ver SecaoCompilada.dependencias)
+DEPENDENCIAS_CONTEUDO = ("grafico_producao", "tabela_retorno", "sensibilidade")
+
+# Nomes de template aceitos (também são o nome do arquivo)
+_NOME_VALIDO = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# Estilos base do reportlab (Normal, Heading1...), criados uma vez por processo
+_estilos_base = getSampleStyleSheet()
+
+
+class TemplateInvalido(ValueError):
+    """Definição de template inexistente ou malformada"""
+
+
+@dataclass
+class ContextoDocumento:
+    """Dados de uma proposta consumidos pelas fábricas de blocos"""
+    # Valores dos placeholders (números crus; a formatação vem do template)
+    valores: Dict[str, Any]
+    grafico_producao: Any = None
+    tabela_retorno: Any = None
+    dados_retorno: Optional[RetornoInvestimentoColunas] = None
+    sensibilidade: Optional[Dict[str, Any]] = None
+    # Substitutos de fragmentos estáticos (ver MontagemPaginas)
+    fragmentos: Optional[Dict[str, Flowable]] = None
+
+
+Fabrica = Callable[[ContextoDocumento], List[Flowable]]
+
+
+class MarcadorGrupo(Flowable):
+    """
+    Flowable sem tamanho no início de um grupo de páginas; registra a página
+    em que foi desenhado. Não altera a diagramação: no topo do frame não
+    consome o spaceBefore do flowable seguinte (_ZEROSIZE) e repassa o
+    spaceAfter do anterior (_SPACETRANSFER).
+    """
+    _ZEROSIZE = 1
+    _SPACETRANSFER = True
+
+    def __init__(self, indice: int):
+        super().__init__()
+        self.indice = indice
+        # Índice (base 0) da página em que o grupo começa
+        self.pagina: Optional[int] = None
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        if self.pagina is None:
+            self.pagina = canvas.getPageNumber() - 1
+
+    def draw(self):
+        pass
+
+
+class _Formatador(string.Formatter):
+    """str.format com as especificações moeda, saldo e numero (formatação BR)"""
+
+    ESPECIFICACOES = {
+        "moeda": formatar_moeda_br,
+        "saldo": formatar_saldo_br,
+        "numero": formatar_numero_br,
+    }
+
+    def format_field(self, valor: Any, especificacao: str) -> str:
+        funcao = self.ESPECIFICACOES.get(especificacao)
+        if funcao is not None:
+            return funcao(valor)
+        return super().format_field(valor, especificacao)
+
+
+_formatador = _Formatador()
+
+
+class _Texto:
+    """Texto compilado: constante ou modelo com placeholders"""
+
+    def __init__(self, texto: str, maiusculas: bool = False):
+        self.campos = tuple(
+            campo.split(".")[0].split("[")[0]
+            for _, campo, _, _ in _formatador.parse(texto) if campo
+        )
+        self.modelo = texto
+        self.maiusculas = maiusculas
+        self.constante = None if self.campos else (texto.upper() if maiusculas else texto)
+
+    def render(self, valores: Dict[str, Any]) -> str:
+        if self.constante is not None:
+            return self.constante
+        texto = _formatador.vformat(self.modelo, (), valores)
+        return texto.upper() if self.maiusculas else texto
+
+
+@dataclass(frozen=True)
+class SecaoCompilada:
+    """Seção do documento: condição e fábricas dos seus blocos"""
+    nome: str
+    # Valores que precisam ser verdadeiros para a seção entrar no documento
+    condicao: Tuple[str, ...]
+    fabricas: Tuple[Fabrica, ...]
+    # Placeholders, condições e DEPENDENCIAS_CONTEUDO usados pelos blocos
+    dependencias: FrozenSet[str] = frozenset()
+    # Primeiro/último bloco é uma quebra de página incondicional
+    inicia_pagina: bool = False
+    termina_pagina: bool = False
+
+    def ativa(self, contexto: ContextoDocumento) -> bool:
+        return all(_valor_condicao(contexto, nome) for nome in self.condicao)
+
+    def flowables(self, contexto: ContextoDocumento) -> List[Flowable]:
+        story: List[Flowable] = []
+        if self.ativa(contexto):
+            for fabrica in self.fabricas:
+                story.extend(fabrica(contexto))
+        return story
+
+
+@dataclass
+class TemplateCompilado:
+    """Template pronto para gerar stories: estilos, cores e fábricas de blocos"""
+    nome: str
+    versao: str
+    tamanho_pagina: Tuple[float, float]
+    # Margens em pontos: esquerda, direita, superior, inferior
+    margens: Dict[str, float]
+    cores: Dict[str, Color]
+    estilos: Dict[str, ParagraphStyle]
+    secoes: Tuple[SecaoCompilada, ...] = ()
+    # Fragmentos estáticos (sem placeholders), na ordem do documento
+    fragmentos: Dict[str, Tuple[Fabrica, ...]] = field(default_factory=dict)
+    # Seções agrupadas pelas quebras de página (ver _agrupar_paginas)
+    grupos: Tuple[Tuple[SecaoCompilada, ...], ...] = ()
+
+    @property
+    def largura_util(self) -> float:
+        """Largura do frame: página menos as margens e o padding de 6 pt do Frame"""
+        return self.tamanho_pagina[0] - self.margens["esquerda"] - self.margens["direita"] - 12
+
+    @property
+    def fragmentos_estaticos(self) -> Tuple[str, ...]:
+        return tuple(self.fragmentos)
+
+    @property
+    def grupos_paginas(self) -> Tuple[Tuple[str, ...], ...]:
+        """Nomes das seções de cada grupo de páginas"""
+        return tuple(tuple(secao.nome for secao in grupo) for grupo in self.grupos)
+
+    def dependencias_grupo(self, indice: int) -> FrozenSet[str]:
+        return frozenset().union(*(secao.dependencias for secao in self.grupos[indice]))
+
+    def story(self, contexto: ContextoDocumento, grupos: Optional[Collection[int]] = None) -> List[Flowable]:
+        """
+        Flowables do documento para os dados de uma proposta.
+
+        Cada grupo de páginas com conteúdo começa com um MarcadorGrupo.
+
+        Args:
+            contexto: Dados da proposta
+            grupos: Índices dos grupos incluídos (padrão: todos); os demais
+                ficam fora do documento sem alterar a paginação dos incluídos
+        """
+        story: List[Flowable] = []
+        for indice, grupo in enumerate(self.grupos):
+            if grupos is not None and indice not in grupos:
+                continue
+            flowables: List[Flowable] = []
+            for secao in grupo:
+                flowables.extend(secao.flowables(contexto))
+            if not flowables:
+                continue
+            quebra = [flowables.pop(0)] if isinstance(flowables[0], PageBreak) else []
+            # No início do documento a quebra inicial geraria uma página em branco
+            story.extend(quebra if story else [])
+            story.append(MarcadorGrupo(indice))
+            story.extend(flowables)
+        while story and isinstance(story[-1], PageBreak):
+            story.pop()
+        return story
+
+    def criar_fragmento(self, nome: str) -> List[Flowable]:
+        """Flowables de um fragmento estático (ver MontagemPaginas)"""
+        if nome not in self.fragmentos:
+            raise ValueError(f"Fragmento desconhecido: {nome}")
+        contexto = ContextoDocumento(valores={})
+        flowables: List[Flowable] = []
+        for fabrica in self.fragmentos[nome]:
+            flowables.extend(fabrica(contexto))
+        return flowables
+
+
+def compilar_template(definicao: Dict[str, Any]) -> TemplateCompilado:
+    """
+    Compila a definição de um template (JSON já carregado).
+
+    Raises:
+        TemplateInvalido: Se a definição referencia estilos, cores ou tipos
+            de bloco inexistentes
+    """
+    try:
+        pagina = definicao.get("pagina", {})
+        margens_cm = pagina.get("margens_cm", {})
+        template = TemplateCompilado(
+            nome=definicao["nome"],
+            versao=str(definicao["versao"]),
+            tamanho_pagina=getattr(pagesizes, pagina.get("tamanho", "A4")),
+            margens={
+                lado: margens_cm.get(lado, 2) * cm
+                for lado in ("esquerda", "direita", "superior", "inferior")
+            },
+            cores={"black": black, "white": white},
+            estilos={}
+        )
+        for nome, valor in definicao.get("cores", {}).items():
+            template.cores[nome] = HexColor(valor)
+        for nome, atributos in definicao.get("estilos", {}).items():
+            template.estilos[nome] = _compilar_estilo(template, nome, atributos)
+
+        compilador = _CompiladorBlocos(template, definicao.get("titulo_secao", {}))
+        secoes = []
+        for secao in definicao["secoes"]:
+            condicao = _nomes(secao.get("se"))
+            compilador.dependencias = set(condicao)
+            fabricas = tuple(compilador.compilar(bloco) for bloco in secao["blocos"])
+            secoes.append(SecaoCompilada(
+                nome=secao["nome"],
+                condicao=condicao,
+                fabricas=fabricas,
+                dependencias=frozenset(compilador.dependencias),
+                inicia_pagina=_quebra_incondicional(secao["blocos"][0]) if secao["blocos"] else False,
+                termina_pagina=_quebra_incondicional(secao["blocos"][-1]) if secao["blocos"] else False
+            ))
+        template.secoes = tuple(secoes)
+        template.grupos = _agrupar_paginas(template.secoes)
+        template.fragmentos = compilador.fragmentos
+    except TemplateInvalido:
+        raise
+    except (KeyError, TypeError, AttributeError, ValueError) as e:
+        # ValueError: cores (HexColor) e atributos de estilo malformados
+        raise TemplateInvalido(f"Template {definicao.get('nome', '?')} inválido: {e!r}") from e
+    return template
+
+
+def _quebra_incondicional(bloco: Dict[str, Any]) -> bool:
+    return bloco.get("tipo") == "quebra_pagina" and not bloco.get("se")
+
+
+def _agrupar_paginas(secoes: Sequence[SecaoCompilada]) -> Tuple[Tuple[SecaoCompilada, ...], ...]:
+    """
+    Agrupa seções consecutivas que podem dividir páginas.
+
+    Um grupo novo começa depois de uma seção incondicional que termina com
+    quebra de página, ou numa seção que começa com quebra de página. Se essa
+    seção for condicional, ela só começa um grupo quando não há outras seções
+    depois dela no mesmo grupo: ausente, as seguintes continuariam na página
+    do grupo anterior.
+    """
+    inicios = [False] * len(secoes)
+    for i in reversed(range(len(secoes))):
+        secao = secoes[i]
+        if i == 0:
+            inicios[i] = True
+        elif secoes[i - 1].termina_pagina and not secoes[i - 1].condicao:
+            inicios[i] = True
+        elif secao.inicia_pagina:
+            ultima = i == len(secoes) - 1 or inicios[i + 1]
+            inicios[i] = not secao.condicao or ultima
+
+    grupos: List[List[SecaoCompilada]] = []
+    for secao, inicio in zip(secoes, inicios):
+        if inicio:
+            grupos.append([])
+        grupos[-1].append(secao)
+    return tuple(tuple(grupo) for grupo in grupos)
+
+
+def _compilar_estilo(template: TemplateCompilado, nome: str, atributos: Dict[str, Any]) -> ParagraphStyle:
+    atributos = dict(atributos)
+    pai = atributos.pop("pai", None)
+    if pai is not None:
+        atributos["parent"] = template.estilos.get(pai) or _estilos_base[pai]
+    if "alignment" in atributos:
+        atributos["alignment"] = _ALINHAMENTOS[atributos["alignment"]]
+    for atributo in _ATRIBUTOS_COR:
+        if atributo in atributos:
+            atributos[atributo] = _cor(template, atributos[atributo])
+    return ParagraphStyle(name=nome, **atributos)
+
+
+def _cor(template: TemplateCompilado, valor: str) -> Color:
+    if valor in template.cores:
+        return template.cores[valor]
+    if isinstance(valor, str) and valor.startswith("#"):
+        return HexColor(valor)
+    raise TemplateInvalido(f"Cor desconhecida no template {template.nome}: {valor}")
+
+
+def _nomes(valor: Union[str, Sequence[str], None]) -> Tuple[str, ...]:
+    if valor is None:
+        return ()
+    if isinstance(valor, str):
+        return (valor,)
+    return tuple(valor)
+
+
+def _valor_condicao(contexto: ContextoDocumento, nome: str) -> Any:
+    if nome in contexto.valores:
+        return contexto.valores[nome]
+    return getattr(contexto, nome, None)
+
+
+class _CompiladorBlocos:
+    """Converte blocos da definição em fábricas de flowables"""
+
+    def __init__(self, template: TemplateCompilado, titulo_secao: Dict[str, Any]):
+        self.template = template
+        self.estilo_titulo = self._estilo(titulo_secao.get("estilo", "SecaoTitulo"))
+        cor = titulo_secao.get("cor")
+        self.cor_titulo = _cor(template, cor) if cor else None
+        self.fragmentos: Dict[str, Tuple[Fabrica, ...]] = {}
+        # Dependências da seção em compilação
+        self.dependencias: Set[str] = set()
+        self._dentro_de_fragmento = False
+
+    def compilar(self, bloco: Dict[str, Any]) -> Fabrica:
+        metodo = getattr(self, f"_bloco_{bloco['tipo']}", None)
+        if metodo is None:
+            raise TemplateInvalido(f"Tipo de bloco desconhecido: {bloco['tipo']}")
+        fabrica = metodo(bloco)
+
+        condicao = _nomes(bloco.get("se"))
+        self.dependencias.update(condicao)
+        if not condicao:
+            return fabrica
+
+        def condicional(contexto: ContextoDocumento) -> List[Flowable]:
+            if all(_valor_condicao(contexto, nome) for nome in condicao):
+                return fabrica(contexto)
+            return []
+        return condicional
+
+    def _estilo(self, nome: str) -> ParagraphStyle:
+        estilo = self.template.estilos.get(nome)
+        if estilo is None:
+            raise TemplateInvalido(f"Estilo desconhecido no template {self.template.nome}: {nome}")
+        return estilo
+
+    def _texto(self, texto: str, maiusculas: bool = False) -> _Texto:
+        compilado = _Texto(texto, maiusculas)
+        if self._dentro_de_fragmento and compilado.campos:
+            raise TemplateInvalido(f"Fragmento estático com placeholder: {texto}")
+        self.dependencias.update(compilado.campos)
+        return compilado
+
+    def _bloco_fragmento(self, bloco: Dict[str, Any]) -> Fabrica:
+        nome = bloco["nome"]
+        self._dentro_de_fragmento = True
+        try:
+            fabricas = tuple(self.compilar(filho) for filho in bloco["blocos"])
+        finally:
+            self._dentro_de_fragmento = False
+        self.fragmentos[nome] = fabricas
+
+        def fragmento(contexto: ContextoDocumento) -> List[Flowable]:
+            if contexto.fragmentos and nome in contexto.fragmentos:
+                return [contexto.fragmentos[nome]]
+            flowables: List[Flowable] = []
+            for fabrica in fabricas:
+                flowables.extend(fabrica(contexto))
+            return flowables
+        return fragmento
+
+    def _bloco_espaco(self, bloco: Dict[str, Any]) -> Fabrica:
+        altura = bloco["altura_cm"] * cm
+        return lambda contexto: [Spacer(1, altura)]
+
+    def _bloco_quebra_pagina(self, bloco: Dict[str, Any]) -> Fabrica:
+        return lambda contexto: [PageBreak()]
+
+    def _bloco_paragrafo(self, bloco: Dict[str, Any]) -> Fabrica:
+        texto = self._texto(bloco["texto"], bloco.get("maiusculas", False))
+        estilo = self._estilo(bloco["estilo"])
+        return lambda contexto: [Paragraph(texto.render(contexto.valores), estilo)]
+
+    def _bloco_titulo(self, bloco: Dict[str, Any]) -> Fabrica:
+        texto = self._texto(bloco["texto"])
+        estilo = self._estilo(bloco["estilo"]) if "estilo" in bloco else self.estilo_titulo
+        cor = self.cor_titulo
+
+        def titulo(contexto: ContextoDocumento) -> List[Flowable]:
+            conteudo = texto.render(contexto.valores)
+            if cor is not None:
+                conteudo = f'<font color="{cor}">{conteudo}</font>'
+            return [Paragraph(conteudo, estilo)]
+        return titulo
+
+    def _bloco_lista(self, bloco: Dict[str, Any]) -> Fabrica:
+        marcador = bloco.get("marcador", "• ")
+        itens = [self._texto(marcador + item) for item in bloco["itens"]]
+        estilo = self._estilo(bloco["estilo"])
+        return lambda contexto: [Paragraph(item.render(contexto.valores), estilo) for item in itens]
+
+    def _bloco_tabela(self, bloco: Dict[str, Any]) -> Fabrica:
+        linhas = [[self._texto(celula) for celula in linha] for linha in bloco["linhas"]]
+        larguras = [largura * cm for largura in bloco["larguras_cm"]]
+        estilo = TableStyle([self._comando_tabela(comando) for comando in bloco.get("estilo", [])])
+
+        def tabela(contexto: ContextoDocumento) -> List[Flowable]:
+            dados = [[celula.render(contexto.valores) for celula in linha] for linha in linhas]
+            tabela = Table(dados, colWidths=larguras)
+            tabela.setStyle(estilo)
+            return [tabela]
+        return tabela
+
+    def _comando_tabela(self, comando: List[Any]) -> tuple:
+        """Comando de TableStyle com coordenadas em tupla e nomes de cor resolvidos"""
+        resolvido = [comando[0], tuple(comando[1]), tuple(comando[2])]
+        for valor in comando[3:]:
+            if isinstance(valor, str) and (valor in self.template.cores or valor.startswith("#")):
+                valor = _cor(self.template, valor)
+            resolvido.append(valor)
+        return tuple(resolvido)
+
+    def _bloco_grafico_producao(self, bloco: Dict[str, Any]) -> Fabrica:
+        largura = bloco["largura_cm"] * cm
+        altura = bloco["altura_cm"] * cm
+        self.dependencias.add("grafico_producao")
+
+        def grafico(contexto: ContextoDocumento) -> List[Flowable]:
+            origem = contexto.grafico_producao
+            if isinstance(origem, Flowable):
+                return [origem]
+            if _imagem_disponivel(origem):
+                return [Image(origem, width=largura, height=altura)]
+            return []
+        return grafico
+
+    def _bloco_tabela_retorno(self, bloco: Dict[str, Any]) -> Fabrica:
+        largura = bloco["largura_cm"] * cm
+        altura = bloco["altura_cm"] * cm
+        larguras = [valor * cm for valor in bloco["larguras_cm"]]
+        cabecalho = list(bloco["cabecalho"])
+        cores = self.template.cores
+        self.dependencias.add("tabela_retorno")
+        estilo_base = [
+            ('BACKGROUND', (0, 0), (-1, 0), cores["azul_escuro"]),
+            ('TEXTCOLOR', (0, 0), (-1, 0), white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+            ('GRID', (0, 0), (-1, -1), 0.5, cores["cinza"]),
+        ]
+
+        def tabela_retorno(contexto: ContextoDocumento) -> List[Flowable]:
+            if _imagem_disponivel(contexto.tabela_retorno):
+                return [Image(contexto.tabela_retorno, width=largura, height=altura)]
+            if not contexto.dados_retorno:
+                return []
+            # Como a imagem, a tabela não é quebrada entre páginas
+            return [KeepTogether(_criar_tabela_retorno(
+                contexto.dados_retorno, cabecalho, larguras, estilo_base, cores
+            ))]
+        return tabela_retorno
+
+    def _bloco_sensibilidade(self, bloco: Dict[str, Any]) -> Fabrica:
+        titulo = self._bloco_titulo({"texto": bloco["titulo"]})
+        estilo = self._estilo(bloco["estilo"])
+        estilo_destaque = self._estilo(bloco["estilo_destaque"])
+        self.dependencias.add("sensibilidade")
+
+        def sensibilidade(contexto: ContextoDocumento) -> List[Flowable]:
+            if not contexto.sensibilidade:
+                return []
+            return titulo(contexto) + _criar_secao_sensibilidade(
+                contexto.sensibilidade["grafico"], contexto.sensibilidade["resumo"], estilo, estilo_destaque
+            )
+        return sensibilidade
+
+
+def _imagem_disponivel(origem: Any) -> bool:
+    if origem is None:
+        return False
+    if isinstance(origem, str):
+        return os.path.exists(origem)
+    return True
+
+
+def _criar_tabela_retorno(
+    dados_retorno: RetornoInvestimentoColunas,
+    cabecalho: List[str],
+    larguras: List[float],
+    estilo_base: List[tuple],
+    cores: Dict[str, Color]
+) -> Table:
+    """
+    Tabela de retorno do investimento como Table do reportlab, com o mesmo
+    estilo da versão em imagem (GraficoService.gerar_tabela_retorno).
+    """
+    dados_tabela = [cabecalho]
+    estilo = list(estilo_base)
+
+    colunas = zip(
+        dados_retorno.ano.tolist(),
+        dados_retorno.saldo.tolist(),
+        dados_retorno.economia_mensal.tolist(),
+        dados_retorno.economia_anual.tolist()
+    )
+    for linha, (ano, saldo, economia_mensal, economia_anual) in enumerate(colunas, start=1):
+        dados_tabela.append([
+            str(ano),
+            formatar_saldo_br(saldo),
+            f"R$  {formatar_numero_br(economia_mensal)}",
+            f"R$  {formatar_numero_br(economia_anual)}"
+        ])
+        if linha % 2 == 0:
+            estilo.append(('BACKGROUND', (0, linha), (-1, linha), cores["linha_alternada"]))
+        # Destacar valores negativos/positivos na coluna SALDO
+        cor_saldo = cores["negativo"] if saldo < 0 else cores["teal"]
+        estilo.append(('TEXTCOLOR', (1, linha), (1, linha), cor_saldo))
+
+    tabela = Table(dados_tabela, colWidths=larguras, repeatRows=1)
+    tabela.setStyle(TableStyle(estilo))
+    return tabela
+
+
+def _criar_secao_sensibilidade(
+    grafico: Flowable,
+    resumo: Dict[str, Any],
+    estilo: ParagraphStyle,
+    estilo_destaque: ParagraphStyle
+) -> List[Flowable]:
+    """Resumo da simulação de Monte Carlo com o gráfico em leque"""
+    payback = resumo["payback"]["percentis"]
+    economia = resumo["economia_total"]["percentis"]
+    probabilidade = resumo["payback"]["probabilidade_no_horizonte"]
+    anos = len(resumo["faixas_saldo"]["ano"])
+
+    if payback["p95"] is not None:
+        texto_payback = (
+            f"• <b>Retorno:</b> em 90% dos cenários o investimento se paga "
+            f"entre o <b>{payback['p5']}º e o {payback['p95']}º ano</b>"
+        )
+    elif payback["p5"] is not None:
+        texto_payback = (
+            f"• <b>Retorno:</b> a partir do <b>{payback['p5']}º ano</b>; em "
+            f"{formatar_numero_br((1 - probabilidade) * 100, 1)}% dos cenários "
+            f"o investimento não se paga em {anos} anos"
+        )
+    else:
+        texto_payback = f"• <b>Retorno:</b> o investimento não se paga em {anos} anos na maioria dos cenários"
+
+    return [
+        Paragraph(
+            f"Simulação de {formatar_numero_br(resumo['cenarios'], 0)} cenários variando o reajuste "
+            "da tarifa de energia, a degradação dos módulos e a geração estimada.",
+            estilo
+        ),
+        Paragraph(texto_payback, estilo_destaque),
+        Paragraph(
+            f"• <b>Economia em {anos} anos:</b> entre <b>{formatar_moeda_br(economia['p5'])}</b> e "
+            f"<b>{formatar_moeda_br(economia['p95'])}</b> (mediana de {formatar_moeda_br(economia['p50'])})",
+            estilo_destaque
+        ),
+        Spacer(1, 0.3*cm),
+        grafico
+    ]
+
+
+# Cache dos templates compilados por (nome, versão) e do arquivo lido por nome
+_compilados: Dict[Tuple[str, str], TemplateCompilado] = {}
+_arquivos: Dict[str, Tuple[float, Tuple[str, str]]] = {}
+_lock = threading.Lock()
+
+
+def obter_template(nome: Optional[str] = None, diretorio: Optional[str] = None) -> TemplateCompilado:
+    """
+    Template compilado pelo nome, a partir do cache.
+
+    O arquivo só é relido quando muda (mtime) e só é recompilado quando a
+    versão declarada muda.
+
+    Args:
+        nome: Nome do template (padrão: TEMPLATE_PADRAO)
+        diretorio: Diretório dos arquivos .json (padrão: TEMPLATES_DIR)
+
+    Raises:
+        TemplateInvalido: Se o template não existe ou é inválido
+    """
+    nome = nome or config.TEMPLATE_PADRAO
+    caminho = _caminho_template(nome, diretorio)
+    try:
+        mtime = os.stat(caminho).st_mtime
+    except FileNotFoundError:
+        raise TemplateInvalido(f"Template não encontrado: {nome}") from None
+
+    arquivo = _arquivos.get(caminho)
+    if arquivo is not None and arquivo[0] == mtime:
+        return _compilados[arquivo[1]]
+
+    with _lock:
+        with open(caminho, encoding="utf-8") as f:
+            try:
+                definicao = json.load(f)
+            except json.JSONDecodeError as e:
+                raise TemplateInvalido(f"Template {nome} não é um JSON válido: {e}") from e
+        chave = (nome, str(definicao.get("versao")))
+        if chave not in _compilados:
+            _compilados[chave] = compilar_template(definicao)
+        _arquivos[caminho] = (mtime, chave)
+        return _compilados[chave]
+
+
+def listar_templates(diretorio: Optional[str] = None) -> List[str]:
+    """Nomes dos templates disponíveis em TEMPLATES_DIR"""
+    diretorio = diretorio or config.TEMPLATES_DIR
+    try:
+        arquivos = os.listdir(diretorio)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        arquivo[:-len(".json")] for arquivo in arquivos
+        if arquivo.endswith(".json") and _NOME_VALIDO.match(arquivo[:-len(".json")])
+    )
+
+
+def _caminho_template(nome: str, diretorio: Optional[str]) -> str:
+    if not _NOME_VALIDO.match(nome):
+        raise TemplateInvalido(f"Nome de template inválido: {nome}")
+    return os.path.join(diretorio or config.TEMPLATES_DIR, f"{nome}.json")
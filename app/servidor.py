@@ -0,0 +1,330 @@
+"""
+Servidor Multi-Worker (prefork)
+Sobe N processos uvicorn atendendo o mesmo socket, para usar todos os
+núcleos do container com um único comando.
+
+O processo pai importa a aplicação e executa renderizacao.precarregar()
+(matplotlib com backend Agg, caches de fontes, estilos do reportlab,
+fragmentos da montagem e uma renderização de aquecimento) antes de criar os
+workers com fork. Os workers herdam essa memória copy-on-write: as páginas
+só são duplicadas quando algum worker as altera, e gc.freeze() evita que o
+coletor de lixo as altere ao percorrer os objetos herdados.
+
+Cada worker renderiza no próprio processo (RENDER_EXECUTOR=thread com um
+worker, a menos que o ambiente diga outra coisa), em vez de abrir outro
+pool de processos por worker.
+
+Os workers são reciclados depois de SERVIDOR_MAX_REQUISICOES requisições
+(com variação de até 10% para não reiniciarem todos juntos) ou quando a
+memória própria (páginas privadas, sem as compartilhadas com o pai) passa
+de SERVIDOR_MAX_MEMORIA_MB; nesse caso o substituto é criado antes de o
+worker antigo terminar as requisições em andamento.
+
+Estado mantido em memória (jobs assíncronos, cache de respostas, métricas)
+é de cada worker. Os PDFs para download ficam no disco e são encontrados
+por qualquer worker.
+
+Uso:
+
+    python -m app.servidor --workers 4 --port 3493
+"""
+
+import argparse
+import gc
+import logging
+import logging.config
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import uvicorn
+
+# Padrões aplicados ao ambiente antes de importar app.config
+PADROES_AMBIENTE = {"RENDER_EXECUTOR": "thread", "RENDER_WORKERS": "1"}
+
+logger = logging.getLogger("uvicorn.error")
+
+
+@dataclass
+class _Worker:
+    pid: int
+    iniciado_em: float
+    # SIGTERM enviado por excesso de memória; o substituto já foi criado
+    reciclando: bool = False
+
+
+def memoria_privada(pid: int) -> Optional[int]:
+    """
+    Bytes de memória exclusivos do processo (páginas privadas), sem contar as
+    páginas ainda compartilhadas com o processo pai.
+
+    Returns:
+        Bytes ou None se o processo não existe ou /proc não está disponível
+    """
+    try:
+        total = 0
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for linha in f:
+                if linha.startswith(("Private_Clean:", "Private_Dirty:")):
+                    total += int(linha.split()[1]) * 1024
+        return total
+    except FileNotFoundError:
+        pass
+    except (ProcessLookupError, PermissionError):
+        return None
+
+    # Kernels sem smaps_rollup: residente menos compartilhada
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            campos = f.read().split()
+        return (int(campos[1]) - int(campos[2])) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class ServidorPrefork:
+    """Processo pai: abre o socket, cria os workers e os substitui quando terminam"""
+
+    # Segundos entre verificações dos workers (término e memória)
+    INTERVALO_VERIFICACAO = 1.0
+    # Worker que termina antes disso indica falha na inicialização; o próximo
+    # fork espera um pouco para não entrar em laço
+    VIDA_MINIMA = 5.0
+
+    def __init__(
+        self,
+        app: Any,
+        host: str,
+        porta: int,
+        workers: int,
+        max_requisicoes: int = 0,
+        max_memoria_bytes: int = 0,
+        timeout_encerramento: int = 30,
+        opcoes_uvicorn: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            app: Aplicação ASGI já importada (e pré-carregada) no processo pai
+            host: Endereço de escuta
+            porta: Porta de escuta
+            workers: Quantidade de processos HTTP
+            max_requisicoes: Requisições por worker antes da reciclagem (0 = sem limite)
+            max_memoria_bytes: Memória própria máxima por worker (0 = sem limite)
+            timeout_encerramento: Segundos para os workers concluírem as
+                requisições em andamento ao encerrar
+            opcoes_uvicorn: Demais argumentos de uvicorn.Config (log_level...)
+        """
+        self.app = app
+        self.host = host
+        self.porta = porta
+        self.workers = max(1, workers)
+        self.max_requisicoes = max_requisicoes
+        self.max_memoria_bytes = max_memoria_bytes
+        self.timeout_encerramento = timeout_encerramento
+        self.opcoes_uvicorn = opcoes_uvicorn or {}
+        self._socket: Optional[socket.socket] = None
+        self._workers: Dict[int, _Worker] = {}
+        self._encerrando = False
+        self._reciclar_todos = False
+
+    def executar(self) -> int:
+        """Atende até receber SIGTERM/SIGINT; retorna o código de saída do pai"""
+        self._socket = self._abrir_socket()
+
+        # Objetos criados no pré-carregamento vão para a geração permanente:
+        # o GC dos workers não escreve nos seus cabeçalhos (o que copiaria as páginas)
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._sinal_encerrar)
+        signal.signal(signal.SIGINT, self._sinal_encerrar)
+        signal.signal(signal.SIGHUP, self._sinal_reciclar)
+
+        logger.info(
+            "Servidor prefork em http://%s:%d (pid %d) com %d workers",
+            self.host, self.porta, os.getpid(), self.workers
+        )
+        for _ in range(self.workers):
+            self._criar_worker()
+
+        while not self._encerrando:
+            time.sleep(self.INTERVALO_VERIFICACAO)
+            self._coletar_finalizados()
+            if self._reciclar_todos:
+                self._reciclar_todos = False
+                for worker in list(self._workers.values()):
+                    self._reciclar(worker, "SIGHUP")
+            if self.max_memoria_bytes:
+                self._verificar_memoria()
+
+        self._encerrar_workers()
+        self._socket.close()
+        logger.info("Servidor prefork encerrado")
+        return 0
+
+    def _abrir_socket(self) -> socket.socket:
+        familia = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(familia, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.porta))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _criar_worker(self):
+        limite = None
+        if self.max_requisicoes:
+            limite = self.max_requisicoes + random.randint(0, self.max_requisicoes // 10)
+
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGHUP, signal.SIG_DFL)
+                self._executar_worker(limite)
+            except BaseException:
+                logger.exception("Worker %d falhou", os.getpid())
+                codigo = 1
+            finally:
+                os._exit(codigo)
+
+        self._workers[pid] = _Worker(pid=pid, iniciado_em=time.monotonic())
+
+    def _executar_worker(self, limite_requisicoes: Optional[int]):
+        """Executado no processo filho: uvicorn sobre o socket herdado"""
+        config = uvicorn.Config(
+            self.app,
+            limit_max_requests=limite_requisicoes,
+            timeout_graceful_shutdown=self.timeout_encerramento,
+            **self.opcoes_uvicorn
+        )
+        uvicorn.Server(config).run(sockets=[self._socket])
+
+    def _coletar_finalizados(self):
+        """Recolhe workers que terminaram e cria os substitutos"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self._workers.pop(pid, None)
+            if worker is None:
+                continue
+
+            codigo = os.waitstatus_to_exitcode(status)
+            vida = time.monotonic() - worker.iniciado_em
+            if worker.reciclando or self._encerrando:
+                continue
+            if codigo == 0:
+                logger.info("Worker %d reciclado após %.0f s", pid, vida)
+            else:
+                logger.warning("Worker %d terminou com código %d após %.0f s", pid, codigo, vida)
+                if vida < self.VIDA_MINIMA:
+                    time.sleep(1.0)
+            self._criar_worker()
+
+    def _verificar_memoria(self):
+        for worker in list(self._workers.values()):
+            if worker.reciclando:
+                continue
+            memoria = memoria_privada(worker.pid)
+            if memoria is not None and memoria > self.max_memoria_bytes:
+                self._reciclar(worker, f"{memoria / 2 ** 20:.0f} MiB de memória própria")
+
+    def _reciclar(self, worker: _Worker, motivo: str):
+        """Cria o substituto e pede ao worker que termine as requisições em andamento"""
+        logger.info("Reciclando worker %d (%s)", worker.pid, motivo)
+        worker.reciclando = True
+        self._criar_worker()
+        try:
+            os.kill(worker.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _encerrar_workers(self):
+        for worker in self._workers.values():
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        prazo = time.monotonic() + self.timeout_encerramento + 5
+        while self._workers and time.monotonic() < prazo:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+                continue
+            self._workers.pop(pid, None)
+
+        for pid in list(self._workers):
+            logger.warning("Worker %d não encerrou no prazo; finalizando", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._workers.clear()
+
+    def _sinal_encerrar(self, signum, frame):
+        self._encerrando = True
+
+    def _sinal_reciclar(self, signum, frame):
+        self._reciclar_todos = True
+
+
+def main(argv: Optional[list] = None) -> int:
+    for nome, valor in PADROES_AMBIENTE.items():
+        os.environ.setdefault(nome, valor)
+
+    from app import config
+
+    parser = argparse.ArgumentParser(description="Servidor prefork da API de propostas")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=3493)
+    parser.add_argument("--workers", type=int, default=config.SERVIDOR_WORKERS)
+    parser.add_argument("--max-requisicoes", type=int, default=config.SERVIDOR_MAX_REQUISICOES)
+    parser.add_argument("--max-memoria-mb", type=int, default=config.SERVIDOR_MAX_MEMORIA_MB)
+    parser.add_argument("--timeout-encerramento", type=int, default=config.SERVIDOR_TIMEOUT_ENCERRAMENTO)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.config.dictConfig(uvicorn.config.LOGGING_CONFIG)
+    logger.setLevel(args.log_level.upper())
+
+    from app.main import app
+    from app.services.renderizacao import precarregar
+
+    inicio = time.perf_counter()
+    precarregar()
+    logger.info("Renderização pré-carregada em %.1f s", time.perf_counter() - inicio)
+    if args.workers > 1:
+        logger.info("Jobs, cache de respostas e métricas são mantidos por worker")
+
+    servidor = ServidorPrefork(
+        app,
+        host=args.host,
+        porta=args.port,
+        workers=args.workers,
+        max_requisicoes=args.max_requisicoes,
+        max_memoria_bytes=args.max_memoria_mb * 1024 * 1024,
+        timeout_encerramento=args.timeout_encerramento,
+        opcoes_uvicorn={"log_level": args.log_level, "access_log": not args.no_access_log}
+    )
+    return servidor.executar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
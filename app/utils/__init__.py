@@ -1,17 +1,21 @@
 from app.utils.formatters import (
     formatar_moeda_br,
     formatar_numero_br,
+    formatar_saldo_br,
     formatar_potencia_kw,
     formatar_potencia_kwp,
     formatar_energia_kwh,
     ordinal
 )
+from app.utils.cache import CacheLRU
 
 __all__ = [
     "formatar_moeda_br",
     "formatar_numero_br",
+    "formatar_saldo_br",
     "formatar_potencia_kw",
     "formatar_potencia_kwp",
     "formatar_energia_kwh",
-    "ordinal"
+    "ordinal",
+    "CacheLRU"
 ]
@@ -0,0 +1,105 @@
+"""
+Cache LRU em memória
+Limitado por quantidade de itens e por tamanho total em bytes
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Cache LRU com limite de itens e de bytes.
+
+    O tamanho de cada valor é informado por quem insere (ex.: len do PDF),
+    já que medir objetos Python genéricos é caro e impreciso. Seguro para
+    uso entre threads.
+    """
+
+    def __init__(self, max_itens: int = 128, max_bytes: int = 0):
+        """
+        Args:
+            max_itens: Quantidade máxima de itens (0 = sem limite)
+            max_bytes: Soma máxima dos tamanhos informados (0 = sem limite)
+        """
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self._itens
+
+    @property
+    def bytes(self) -> int:
+        """Soma dos tamanhos dos itens armazenados"""
+        return self._bytes
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor e o marca como usado recentemente, ou None"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return item[0]
+
+    def inserir(self, chave: Hashable, valor: Any, tamanho: int = 0) -> bool:
+        """
+        Armazena um valor, removendo os itens menos usados se necessário.
+
+        Returns:
+            False se o valor sozinho excede max_bytes e não foi armazenado
+        """
+        if self.max_bytes and tamanho > self.max_bytes:
+            return False
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._itens[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            self._remover_excedentes()
+        return True
+
+    def remover(self, chave: Hashable) -> Optional[Any]:
+        """Remove uma chave, retornando o valor armazenado ou None"""
+        with self._lock:
+            item = self._itens.pop(chave, None)
+            if item is None:
+                return None
+            self._bytes -= item[1]
+            return item[0]
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {
+            "itens": len(self._itens),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def _remover_excedentes(self):
+        while self._itens and (
+            (self.max_itens and len(self._itens) > self.max_itens)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            _, (_, tamanho) = self._itens.popitem(last=False)
+            self._bytes -= tamanho
+            self.evictions += 1
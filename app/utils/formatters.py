@@ -3,6 +3,8 @@ Utilitários de Formatação
 Funções para formatação de valores no padrão brasileiro
 """
 
+import re
+import unicodedata
 from typing import Union
 
 
@@ -65,6 +67,22 @@ def formatar_numero_br(valor: Union[int, float], casas_decimais: int = 2) -> str
     return valor_str
 
 
+def formatar_saldo_br(valor: Union[int, float]) -> str:
+    """
+    Formata um saldo monetário com sinal à esquerda do símbolo, como nas
+    tabelas de retorno do investimento.
+    
+    Args:
+        valor: Saldo (pode ser negativo)
+        
+    Returns:
+        String formatada como "R$  1.234,56" ou "-R$  1.234,56"
+    """
+    if valor < 0:
+        return f"-R$  {formatar_numero_br(abs(valor))}"
+    return f"R$  {formatar_numero_br(valor)}"
+
+
 def formatar_potencia_kw(valor: float) -> str:
     """
     Formata um valor de potência em kW.
@@ -115,3 +133,19 @@ def ordinal(numero: int) -> str:
         String com ordinal, ex: "1º", "2º", "5º"
     """
     return f"{numero}º"
+
+
+def slug(texto: str, padrao: str = "") -> str:
+    """
+    Converte um texto livre em um trecho seguro para nomes de arquivo.
+    
+    Args:
+        texto: Texto original (ex.: nome do cliente)
+        padrao: Retorno quando não sobra nenhum caractere
+        
+    Returns:
+        Texto sem acentos, em minúsculas, com "_" no lugar de qualquer
+        outro caractere, ex: "João/Silva" -> "joao_silva"
+    """
+    normalizado = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", normalizado.lower()).strip("_") or padrao
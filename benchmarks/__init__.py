@@ -0,0 +1,4 @@
+"""
+Benchmarks da API
+Medições de desempenho executadas fora da aplicação (não são importadas por app/).
+"""
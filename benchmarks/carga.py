@@ -0,0 +1,379 @@
+"""
+Teste de Carga
+Gera carga contra POST /api/v1/proposta/gerar para dimensionar containers e
+comparar configurações lado a lado na mesma máquina, sem acesso à rede.
+
+Alvos:
+
+- asgi: a aplicação roda no próprio processo do teste (httpx + ASGITransport),
+  sem sockets; a memória medida inclui o cliente
+- uvicorn: sobe um uvicorn local (127.0.0.1, porta livre) por cenário
+- servidor: idem, com o servidor prefork (python -m app.servidor); a memória
+  somada conta várias vezes as páginas compartilhadas entre os workers
+- --url: usa um servidor já em execução (a memória não é medida)
+
+Cada cenário roda num interpretador novo (ou num uvicorn novo) com suas
+variáveis de ambiente, já que a configuração é lida na importação de
+app.config. Clientes concorrentes enviam requisições em laço fechado até o
+fim da duração; o aquecimento inicial é descartado.
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.carga --concorrencia 8 --duracao 30
+    python -m benchmarks.carga --alvo uvicorn --mix pequeno=0.5,tipico=0.4,grande=0.1 \\
+        --cenario "processo|RENDER_EXECUTOR=processo" \\
+        --cenario "thread|RENDER_EXECUTOR=thread" \\
+        --cenario "pdf|RENDER_EXECUTOR=processo|formato=pdf" \\
+        --saida carga.json
+
+Cenário: "nome|VAR=valor,VAR2=valor|query", com ambiente e query opcionais.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.payloads import TAMANHOS, gerar_payload
+
+ENDPOINT = "/api/v1/proposta/gerar"
+
+
+@dataclass
+class Cenario:
+    nome: str
+    ambiente: Dict[str, str] = field(default_factory=dict)
+    query: str = "salvar=false"
+
+    @classmethod
+    def de_texto(cls, texto: str) -> "Cenario":
+        partes = texto.split("|")
+        ambiente = {}
+        if len(partes) > 1 and partes[1]:
+            for par in partes[1].split(","):
+                nome, _, valor = par.partition("=")
+                ambiente[nome.strip()] = valor.strip()
+        cenario = cls(nome=partes[0], ambiente=ambiente)
+        if len(partes) > 2 and partes[2]:
+            cenario.query = partes[2]
+        return cenario
+
+
+@dataclass
+class ConfiguracaoCarga:
+    concorrencia: int = 4
+    duracao: float = 30.0
+    aquecimento: float = 5.0
+    mix: Dict[str, float] = field(default_factory=lambda: {"tipico": 1.0})
+    # Payloads diferentes por tamanho; repetições podem ser respondidas pelo cache
+    payloads_distintos: int = 50
+    intervalo_memoria: float = 0.5
+    timeout: float = 120.0
+    semente: int = 0
+
+
+class _Amostras:
+    """Latências, status e memória coletados durante a execução"""
+
+    def __init__(self):
+        self.latencias: List[float] = []
+        self.status: Dict[str, int] = {}
+        self.memoria: List[Tuple[float, float]] = []
+
+    def registrar(self, status: str, latencia: Optional[float]):
+        self.status[status] = self.status.get(status, 0) + 1
+        if latencia is not None:
+            self.latencias.append(latencia)
+
+
+def rss_arvore(pid: int) -> Optional[int]:
+    """
+    RSS (bytes) do processo e de todos os descendentes (ex.: workers de
+    renderização), lido de /proc. None fora do Linux.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    filhos: Dict[int, List[int]] = {}
+    rss_paginas: Dict[int, int] = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat", "rb") as f:
+                campos = f.read().rsplit(b")", 1)[1].split()
+        except OSError:
+            continue
+        # Após o nome: estado, ppid, ...; rss é o 24º campo do stat
+        filhos.setdefault(int(campos[1]), []).append(int(entrada))
+        rss_paginas[int(entrada)] = int(campos[21])
+
+    total = 0
+    pendentes = [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        total += rss_paginas.get(atual, 0)
+        pendentes.extend(filhos.get(atual, []))
+    return total * os.sysconf("SC_PAGE_SIZE")
+
+
+def _sortear_payloads(config: ConfiguracaoCarga) -> Tuple[List[str], List[float], Dict[str, List[Dict[str, Any]]]]:
+    tamanhos = [tamanho for tamanho in config.mix if config.mix[tamanho] > 0]
+    pesos = [config.mix[tamanho] for tamanho in tamanhos]
+    payloads = {
+        tamanho: [gerar_payload(tamanho, config.semente + i) for i in range(max(1, config.payloads_distintos))]
+        for tamanho in tamanhos
+    }
+    return tamanhos, pesos, payloads
+
+
+async def _gerar_carga(cliente, url: str, config: ConfiguracaoCarga, pid_memoria: Optional[int]) -> _Amostras:
+    """Executa a carga com um cliente httpx.AsyncClient já configurado"""
+    tamanhos, pesos, payloads = _sortear_payloads(config)
+    amostras = _Amostras()
+    inicio = time.perf_counter()
+    inicio_medicao = inicio + config.aquecimento
+    fim = inicio_medicao + config.duracao
+
+    async def cliente_carga(indice: int):
+        rng = random.Random(config.semente * 1000 + indice)
+        while True:
+            agora = time.perf_counter()
+            if agora >= fim:
+                return
+            payload = rng.choice(payloads[rng.choices(tamanhos, pesos)[0]])
+            try:
+                resposta = await cliente.post(url, json=payload, timeout=config.timeout)
+                await resposta.aread()
+                status = str(resposta.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            concluido = time.perf_counter()
+            if agora >= inicio_medicao and concluido <= fim:
+                amostras.registrar(status, concluido - agora if status.startswith("2") else None)
+
+    async def monitorar_memoria():
+        while time.perf_counter() < fim:
+            rss = rss_arvore(pid_memoria)
+            if rss is not None:
+                amostras.memoria.append((round(time.perf_counter() - inicio, 2), round(rss / 2 ** 20, 1)))
+            await asyncio.sleep(config.intervalo_memoria)
+
+    tarefas = [cliente_carga(i) for i in range(config.concorrencia)]
+    if pid_memoria is not None:
+        tarefas.append(monitorar_memoria())
+    await asyncio.gather(*tarefas)
+    return amostras
+
+
+def resumir(amostras: _Amostras, config: ConfiguracaoCarga) -> Dict[str, Any]:
+    """Throughput, percentis de latência, taxa de erro e memória"""
+    total = sum(amostras.status.values())
+    sucesso = sum(quantidade for status, quantidade in amostras.status.items() if status.startswith("2"))
+    latencias = sorted(amostras.latencias)
+
+    def percentil(p: float) -> Optional[float]:
+        if not latencias:
+            return None
+        return round(latencias[min(len(latencias) - 1, int(p / 100 * len(latencias)))] * 1000, 1)
+
+    memoria = [mib for _, mib in amostras.memoria]
+    return {
+        "requisicoes": total,
+        "throughput_rps": round(sucesso / config.duracao, 2),
+        "taxa_erro": round((total - sucesso) / total, 4) if total else None,
+        "status": dict(sorted(amostras.status.items())),
+        "latencia_ms": {
+            "media": round(statistics.fmean(latencias) * 1000, 1) if latencias else None,
+            "p50": percentil(50),
+            "p90": percentil(90),
+            "p95": percentil(95),
+            "p99": percentil(99),
+            "max": round(latencias[-1] * 1000, 1) if latencias else None
+        },
+        "memoria_mib": {
+            "inicial": memoria[0] if memoria else None,
+            "max": max(memoria) if memoria else None,
+            "final": memoria[-1] if memoria else None,
+            "serie": amostras.memoria
+        }
+    }
+
+
+async def _carga_asgi(cenario: Cenario, config: ConfiguracaoCarga) -> Dict[str, Any]:
+    """Carga no próprio processo; o ambiente do cenário já deve estar aplicado"""
+    import httpx
+
+    from app.main import app
+
+    transporte = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transporte, base_url="http://carga") as cliente:
+            amostras = await _gerar_carga(cliente, f"{ENDPOINT}?{cenario.query}", config, os.getpid())
+    return resumir(amostras, config)
+
+
+async def _carga_http(base_url: str, cenario: Cenario, config: ConfiguracaoCarga, pid: Optional[int]) -> Dict[str, Any]:
+    import httpx
+
+    limites = httpx.Limits(max_connections=config.concorrencia, max_keepalive_connections=config.concorrencia)
+    async with httpx.AsyncClient(base_url=base_url, limits=limites) as cliente:
+        amostras = await _gerar_carga(cliente, f"{ENDPOINT}?{cenario.query}", config, pid)
+    return resumir(amostras, config)
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _aguardar_saude(base_url: str, processo: subprocess.Popen, limite: float = 60.0):
+    import httpx
+
+    prazo = time.time() + limite
+    while time.time() < prazo:
+        if processo.poll() is not None:
+            raise RuntimeError(f"Servidor encerrou durante a inicialização (código {processo.returncode})")
+        try:
+            if httpx.get(f"{base_url}/api/v1/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Servidor não respondeu a /api/v1/health a tempo")
+
+
+def executar_cenario(cenario: Cenario, config: ConfiguracaoCarga, alvo: str, url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Executa um cenário isolado (interpretador ou servidor próprio).
+
+    Args:
+        cenario: Nome, variáveis de ambiente e query da requisição
+        config: Parâmetros da carga
+        alvo: "asgi", "uvicorn" ou "servidor" (ignorado quando url é informada)
+        url: Servidor já em execução
+    """
+    if url:
+        return asyncio.run(_carga_http(url.rstrip("/"), cenario, config, None))
+
+    ambiente = dict(os.environ, **cenario.ambiente)
+    if alvo == "asgi":
+        comando = [
+            sys.executable, "-m", "benchmarks.carga", "--_interno",
+            json.dumps({"cenario": cenario.__dict__, "config": config.__dict__})
+        ]
+        saida = subprocess.run(comando, env=ambiente, capture_output=True, text=True, check=False)
+        if saida.returncode != 0:
+            raise RuntimeError(f"Cenário {cenario.nome} falhou:\n{saida.stderr[-2000:]}")
+        return json.loads(saida.stdout.strip().splitlines()[-1])
+
+    porta = _porta_livre()
+    base_url = f"http://127.0.0.1:{porta}"
+    modulo = ["uvicorn", "app.main:app"] if alvo == "uvicorn" else ["app.servidor"]
+    processo = subprocess.Popen(
+        [sys.executable, "-m", *modulo, "--host", "127.0.0.1",
+         "--port", str(porta), "--log-level", "warning", "--no-access-log"],
+        env=ambiente
+    )
+    try:
+        _aguardar_saude(base_url, processo)
+        return asyncio.run(_carga_http(base_url, cenario, config, processo.pid))
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+
+
+def _imprimir(resultados: Dict[str, Dict[str, Any]]):
+    print(
+        f"{'cenário':<16} {'req':>6} {'req/s':>8} {'erro %':>7} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'RSS máx MiB':>12}"
+    )
+    for nome, r in resultados.items():
+        latencia = r["latencia_ms"]
+        erro = f"{r['taxa_erro'] * 100:.1f}" if r["taxa_erro"] is not None else "-"
+        print(
+            f"{nome:<16} {r['requisicoes']:>6} {r['throughput_rps']:>8.2f} {erro:>7} "
+            f"{_fmt(latencia['p50']):>8} {_fmt(latencia['p95']):>8} {_fmt(latencia['p99']):>8} "
+            f"{_fmt(r['memoria_mib']['max']):>12}"
+        )
+
+
+def _fmt(valor: Optional[float]) -> str:
+    return "-" if valor is None else f"{valor:.1f}"
+
+
+def _mix(texto: str) -> Dict[str, float]:
+    mix = {}
+    for parte in texto.split(","):
+        tamanho, _, peso = parte.partition("=")
+        tamanho = tamanho.strip()
+        if tamanho not in TAMANHOS:
+            raise argparse.ArgumentTypeError(f"Tamanho inválido no mix: {tamanho}")
+        mix[tamanho] = float(peso or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--_interno"]:
+        # Execução de um cenário asgi no interpretador filho
+        dados = json.loads(argv[1])
+        cenario = Cenario(**dados["cenario"])
+        resultado = asyncio.run(_carga_asgi(cenario, ConfiguracaoCarga(**dados["config"])))
+        print(json.dumps(resultado))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Teste de carga da geração de propostas")
+    parser.add_argument("--alvo", choices=("asgi", "uvicorn", "servidor"), default="asgi")
+    parser.add_argument("--url", help="Servidor já em execução (ex.: http://127.0.0.1:3493)")
+    parser.add_argument("--cenario", action="append", default=[], help='"nome|VAR=valor,...|query"')
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--duracao", type=float, default=30.0, help="Segundos medidos")
+    parser.add_argument("--aquecimento", type=float, default=5.0, help="Segundos descartados no início")
+    parser.add_argument("--mix", type=_mix, default={"tipico": 1.0}, help="ex.: pequeno=0.5,tipico=0.4,grande=0.1")
+    parser.add_argument("--payloads-distintos", type=int, default=50)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    config = ConfiguracaoCarga(
+        concorrencia=args.concorrencia,
+        duracao=args.duracao,
+        aquecimento=args.aquecimento,
+        mix=args.mix,
+        payloads_distintos=args.payloads_distintos,
+        semente=args.semente
+    )
+    cenarios = [Cenario.de_texto(texto) for texto in args.cenario] or [Cenario(nome="padrao")]
+
+    resultados = {}
+    for cenario in cenarios:
+        print(f"Executando {cenario.nome}...", file=sys.stderr)
+        resultados[cenario.nome] = executar_cenario(cenario, config, args.alvo, args.url)
+
+    _imprimir(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": config.__dict__,
+                "alvo": args.url or args.alvo,
+                "cenarios": {cenario.nome: cenario.__dict__ for cenario in cenarios},
+                "resultados": resultados
+            }, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Benchmark por Estágio
+Mede, para cada tamanho de payload (ver payloads.py), o tempo de cada etapa da
+geração de uma proposta e da chamada completa à API via TestClient:
+
+    validacao, calculos, grafico_producao (reportlab), grafico_producao_matplotlib,
+    tabela_retorno (imagem), sensibilidade, pdf, base64, serializacao, api
+
+Cada estágio roda algumas vezes para aquecer e depois `repeticoes` vezes; o
+resultado traz mediana, p95 e mínimo em milissegundos e o pico de memória
+alocada pelo Python (tracemalloc, numa execução separada para não distorcer
+os tempos). Na chamada à API o pico se refere apenas ao processo do cliente;
+a renderização roda nos workers do executor.
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.estagios --saida resultados.json
+    python -m benchmarks.estagios --baseline benchmarks/baseline.json
+    python -m benchmarks.estagios --atualizar-baseline benchmarks/baseline.json
+
+Com --baseline o processo termina com código 1 se a mediana de algum estágio
+passar de baseline * (1 + tolerancia) + folga (a folga absoluta evita falsos
+alarmes em estágios de poucos milissegundos).
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Cada chamada à API deve renderizar de fato, sem resposta do cache
+os.environ.setdefault("CACHE_RESULTADOS_MAX_ITENS", "0")
+os.environ.setdefault("GRAFICO_CACHE_MAX_ITENS", "0")
+
+from benchmarks.payloads import TAMANHOS, gerar_payload  # noqa: E402
+
+
+@dataclass
+class Estagio:
+    """
+    Uma etapa medida.
+
+    `preparar` roda antes de cada execução, fora da medição, e devolve os
+    argumentos de `executar` (ex.: um gráfico novo para cada montagem do PDF).
+    """
+    nome: str
+    executar: Callable[..., Any]
+    preparar: Callable[[], Tuple] = tuple
+
+
+def criar_estagios(payload: Dict[str, Any]) -> List[Estagio]:
+    """Estágios da renderização de uma proposta, na ordem do pipeline"""
+    from fastapi.responses import JSONResponse
+
+    from app.models.proposta import PropostaRequest, PropostaResponse
+    from app.services.calculos import CalculoService
+    from app.services.graficos import GraficoService
+    from app.services.graficos_reportlab import GraficoReportlabService
+    from app.services.pdf_generator import PDFGenerator
+
+    calculo_service = CalculoService()
+    grafico_reportlab = GraficoReportlabService()
+    grafico_service = GraficoService(cache=None)
+    pdf_generator = PDFGenerator()
+
+    request = PropostaRequest.model_validate(payload)
+
+    def calculos():
+        investimento_total = calculo_service.calcular_investimento_total(
+            request.investimento_kit_fotovoltaico, request.investimento_mao_de_obra
+        )
+        dados_retorno = request.retorno_investimento or calculo_service.projetar_retorno(
+            investimento_total, request.producao_mensal, request.parametros_financeiros
+        )
+        ano_payback, valor_payback = calculo_service.encontrar_ano_payback(dados_retorno)
+        taxa = request.parametros_financeiros.taxa_desconto if request.parametros_financeiros else None
+        return {
+            "investimento_total": investimento_total,
+            "dados_retorno": dados_retorno,
+            "ano_payback": ano_payback,
+            "valor_payback": valor_payback,
+            "economia_25_anos": calculo_service.calcular_economia_total(dados_retorno),
+            "indicadores": calculo_service.analisar_proposta(investimento_total, dados_retorno, taxa)
+        }
+
+    dados = calculos()
+
+    def grafico_producao():
+        return grafico_reportlab.gerar_grafico_producao(
+            dados_producao=request.producao_mensal,
+            quantidade_modulos=request.modulos_quantidade
+        )
+
+    def sensibilidade():
+        resumo = calculo_service.simular_proposta(
+            dados["investimento_total"], request.producao_mensal,
+            request.parametros_financeiros, request.analise_sensibilidade
+        ).resumo()
+        return {"grafico": grafico_reportlab.gerar_grafico_sensibilidade(resumo["faixas_saldo"]), "resumo": resumo}
+
+    def preparar_pdf():
+        # Flowables novos a cada montagem, como numa requisição
+        return (grafico_producao(), sensibilidade() if request.analise_sensibilidade else None)
+
+    def pdf(grafico, dados_sensibilidade):
+        buffer = BytesIO()
+        pdf_generator.gerar_proposta_plana(
+            nome_cliente=request.nome,
+            modulos_quantidade=request.modulos_quantidade,
+            especificacoes_modulo=request.especificacoes_modulo,
+            inversores_quantidade=request.inversores_quantidade,
+            especificacoes_inversores=request.especificacoes_inversores,
+            investimento_kit=request.investimento_kit_fotovoltaico,
+            investimento_mao_de_obra=request.investimento_mao_de_obra,
+            investimento_total=dados["investimento_total"],
+            grafico_producao=grafico,
+            tabela_retorno=None,
+            ano_payback=dados["ano_payback"],
+            valor_payback=dados["valor_payback"],
+            economia_25_anos=dados["economia_25_anos"],
+            output_path=buffer,
+            dados_retorno=dados["dados_retorno"],
+            sensibilidade=dados_sensibilidade
+        )
+        return buffer.getvalue()
+
+    pdf_bytes = pdf(*preparar_pdf())
+    pdf_base64 = base64.b64encode(pdf_bytes).decode("utf-8")
+
+    def serializacao():
+        resposta = PropostaResponse(
+            success=True,
+            message="Proposta gerada com sucesso",
+            pdf_filename=None,
+            pdf_url=None,
+            pdf_base64=pdf_base64,
+            dados_calculados={
+                chave: valor for chave, valor in dados.items() if chave != "dados_retorno"
+            }
+        )
+        return JSONResponse(resposta.model_dump(mode="json")).body
+
+    estagios = [
+        Estagio("validacao", lambda: PropostaRequest.model_validate(payload)),
+        Estagio("calculos", calculos),
+        Estagio("grafico_producao", grafico_producao),
+        Estagio("grafico_producao_matplotlib", lambda: grafico_service.gerar_grafico_producao(
+            dados_producao=request.producao_mensal,
+            quantidade_modulos=request.modulos_quantidade
+        )),
+        Estagio("tabela_retorno", lambda: grafico_service.gerar_tabela_retorno(dados["dados_retorno"])),
+    ]
+    if request.analise_sensibilidade is not None:
+        estagios.append(Estagio("sensibilidade", sensibilidade))
+    estagios += [
+        Estagio("pdf", pdf, preparar_pdf),
+        Estagio("base64", lambda: base64.b64encode(pdf_bytes).decode("utf-8")),
+        Estagio("serializacao", serializacao),
+    ]
+    return estagios
+
+
+def medir(estagio: Estagio, repeticoes: int, aquecimento: int) -> Dict[str, float]:
+    """Tempos (ms) e pico de memória (KiB) de um estágio"""
+    for _ in range(aquecimento):
+        estagio.executar(*estagio.preparar())
+
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = estagio.preparar()
+        inicio = time.perf_counter()
+        estagio.executar(*argumentos)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    argumentos = estagio.preparar()
+    tracemalloc.start()
+    try:
+        estagio.executar(*argumentos)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tempos.sort()
+    return {
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p95_ms": round(tempos[min(len(tempos) - 1, int(0.95 * len(tempos)))], 3),
+        "min_ms": round(tempos[0], 3),
+        "pico_memoria_kib": round(pico / 1024, 1)
+    }
+
+
+def medir_api(payloads: Dict[str, Dict[str, Any]], repeticoes: int, aquecimento: int) -> Dict[str, Dict[str, float]]:
+    """Chamada completa a POST /api/v1/proposta/gerar (validação, executor, PDF, base64, JSON)"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    resultados = {}
+    with TestClient(app) as cliente:
+        for tamanho, payload in payloads.items():
+            def chamar():
+                resposta = cliente.post("/api/v1/proposta/gerar?salvar=false", json=payload)
+                if resposta.status_code != 200:
+                    raise RuntimeError(f"API respondeu {resposta.status_code}: {resposta.text[:200]}")
+                return resposta.content
+            resultados[tamanho] = medir(Estagio("api", chamar), repeticoes, aquecimento)
+    return resultados
+
+
+def executar(
+    tamanhos: List[str],
+    repeticoes: int = 20,
+    aquecimento: int = 3,
+    incluir_api: bool = True,
+    filtro: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Executa o benchmark.
+
+    Args:
+        tamanhos: Tamanhos de payload medidos
+        repeticoes: Execuções medidas por estágio
+        aquecimento: Execuções descartadas antes da medição
+        incluir_api: Mede também a chamada completa via TestClient
+        filtro: Nomes dos estágios a medir (None = todos)
+
+    Returns:
+        Dicionário com metadados e resultados[tamanho][estagio]
+    """
+    payloads = {tamanho: gerar_payload(tamanho) for tamanho in tamanhos}
+    resultados: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    for tamanho, payload in payloads.items():
+        resultados[tamanho] = {}
+        for estagio in criar_estagios(payload):
+            if filtro and estagio.nome not in filtro:
+                continue
+            resultados[tamanho][estagio.nome] = medir(estagio, repeticoes, aquecimento)
+
+    if incluir_api and (not filtro or "api" in filtro):
+        for tamanho, medicao in medir_api(payloads, repeticoes, aquecimento).items():
+            resultados[tamanho]["api"] = medicao
+
+    return {
+        "meta": {
+            "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeticoes": repeticoes,
+            "aquecimento": aquecimento
+        },
+        "resultados": resultados
+    }
+
+
+def comparar(
+    atual: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerancia: float,
+    folga_ms: float
+) -> List[str]:
+    """
+    Regressões de tempo em relação à baseline.
+
+    Estágios ausentes em qualquer um dos lados são ignorados, de modo que a
+    baseline pode ser atualizada aos poucos.
+    """
+    regressoes = []
+    for tamanho, estagios in atual["resultados"].items():
+        referencia = baseline.get("resultados", {}).get(tamanho, {})
+        for nome, medicao in estagios.items():
+            if nome not in referencia:
+                continue
+            limite = referencia[nome]["mediana_ms"] * (1 + tolerancia) + folga_ms
+            if medicao["mediana_ms"] > limite:
+                regressoes.append(
+                    f"{tamanho}/{nome}: {medicao['mediana_ms']:.2f} ms > limite {limite:.2f} ms "
+                    f"(baseline {referencia[nome]['mediana_ms']:.2f} ms)"
+                )
+    return regressoes
+
+
+def _imprimir(resultado: Dict[str, Any], baseline: Optional[Dict[str, Any]]):
+    print(f"{'tamanho':<9} {'estágio':<28} {'mediana':>10} {'p95':>10} {'pico KiB':>10} {'baseline':>10}")
+    for tamanho, estagios in resultado["resultados"].items():
+        for nome, medicao in estagios.items():
+            referencia = ""
+            if baseline:
+                anterior = baseline.get("resultados", {}).get(tamanho, {}).get(nome)
+                if anterior:
+                    referencia = f"{anterior['mediana_ms']:.2f}"
+            print(
+                f"{tamanho:<9} {nome:<28} {medicao['mediana_ms']:>10.2f} {medicao['p95_ms']:>10.2f} "
+                f"{medicao['pico_memoria_kib']:>10.1f} {referencia:>10}"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark por estágio da geração de propostas")
+    parser.add_argument("--tamanhos", nargs="+", choices=TAMANHOS, default=list(TAMANHOS))
+    parser.add_argument("--estagios", nargs="+", help="Mede apenas estes estágios")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--aquecimento", type=int, default=3)
+    parser.add_argument("--sem-api", action="store_true", help="Não mede a chamada completa via TestClient")
+    parser.add_argument("--saida", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--baseline", help="Compara com uma baseline e falha se houver regressão")
+    parser.add_argument("--atualizar-baseline", metavar="ARQUIVO", help="Grava o resultado como nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Aumento relativo aceito (0.25 = 25%%)")
+    parser.add_argument("--folga-ms", type=float, default=2.0, help="Aumento absoluto sempre aceito")
+    args = parser.parse_args(argv)
+
+    resultado = executar(
+        args.tamanhos,
+        repeticoes=args.repeticoes,
+        aquecimento=args.aquecimento,
+        incluir_api=not args.sem_api,
+        filtro=args.estagios
+    )
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    _imprimir(resultado, baseline)
+
+    for destino in (args.saida, args.atualizar_baseline):
+        if destino:
+            with open(destino, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, indent=2, ensure_ascii=False)
+                f.write("\n")
+
+    if baseline is not None:
+        regressoes = comparar(resultado, baseline, args.tolerancia, args.folga_ms)
+        if regressoes:
+            print("\nRegressões:", file=sys.stderr)
+            for regressao in regressoes:
+                print(f"  {regressao}", file=sys.stderr)
+            return 1
+        print("\nSem regressões em relação à baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
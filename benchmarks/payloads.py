@@ -0,0 +1,136 @@
+"""
+Payloads Sintéticos
+Gera requisições de proposta realistas e reprodutíveis para os benchmarks.
+
+Os tamanhos cobrem os casos que a API recebe na prática:
+
+- pequeno: residencial, série de retorno projetada pelo servidor
+  (parametros_financeiros), 10 anos
+- tipico: comercial, 12 meses + média e série de 25 anos enviada pelo cliente
+- grande: nomes e especificações longos, 25 anos e análise de sensibilidade
+  (página extra com gráfico em leque)
+"""
+
+import random
+from typing import Any, Dict, List
+
+TAMANHOS = ("pequeno", "tipico", "grande")
+
+# Perfil de irradiação relativo de cada mês (verão mais produtivo)
+_SAZONALIDADE = [1.06, 1.0, 0.98, 0.95, 0.89, 0.87, 0.84, 0.89, 0.93, 0.96, 1.02, 1.05]
+
+_CLIENTES = [
+    "Paróquia Santo Antônio de Pádua",
+    "Supermercado Bom Preço",
+    "Condomínio Residencial das Palmeiras",
+    "Escola Municipal Professora Maria José",
+    "Padaria São João",
+]
+
+
+def gerar_payload(tamanho: str = "tipico", semente: int = 0) -> Dict[str, Any]:
+    """
+    Gera o JSON de uma proposta no formato de /api/v1/proposta/gerar.
+
+    Args:
+        tamanho: "pequeno", "tipico" ou "grande"
+        semente: Semente do gerador; a mesma semente produz o mesmo payload
+
+    Returns:
+        Dicionário pronto para ser enviado como corpo da requisição
+    """
+    if tamanho not in TAMANHOS:
+        raise ValueError(f"Tamanho inválido: {tamanho} (use {', '.join(TAMANHOS)})")
+
+    rng = random.Random(f"{tamanho}:{semente}")
+
+    modulos = {"pequeno": rng.randint(6, 14), "tipico": rng.randint(40, 80), "grande": rng.randint(150, 300)}[tamanho]
+    potencia_modulo = rng.choice([550, 585, 620])
+    # kWh/mês por kWp instalado
+    geracao_media = modulos * potencia_modulo / 1000 * rng.uniform(110, 130)
+
+    investimento_kit = round(modulos * potencia_modulo * rng.uniform(1.1, 1.4), 2)
+    investimento_mao_de_obra = round(investimento_kit * rng.uniform(0.35, 0.65), 2)
+
+    nome = rng.choice(_CLIENTES)
+    especificacoes_modulo = f"{potencia_modulo}W Mono Honor Solar"
+    especificacoes_inversores = "SOFAR 20kW AFCI"
+    if tamanho == "grande":
+        nome = f"{nome} - Unidade {rng.randint(1, 99)} - Ampliação do Sistema de Geração Distribuída"
+        especificacoes_modulo += " Bifacial Half-Cell com Moldura Reforçada e Garantia Linear de 30 Anos"
+        especificacoes_inversores = "SOFAR 50kW AFCI Trifásico com Monitoramento Remoto e String Box Integrada"
+
+    payload: Dict[str, Any] = {
+        "nome": nome,
+        "modulos_quantidade": modulos,
+        "especificacoes_modulo": especificacoes_modulo,
+        "inversores_quantidade": max(1, modulos // 40),
+        "especificacoes_inversores": especificacoes_inversores,
+        "investimento_kit_fotovoltaico": investimento_kit,
+        "investimento_mao_de_obra": investimento_mao_de_obra,
+        "producao_mensal": _producao_mensal(rng, geracao_media)
+    }
+
+    parametros = {
+        "tarifa_kwh": round(rng.uniform(0.75, 1.1), 2),
+        "inflacao_tarifa": round(rng.uniform(0.03, 0.06), 4),
+        "degradacao_anual": 0.005,
+        "custo_om_anual": round(investimento_kit * 0.01, 2),
+        "reajuste_om": 0.04
+    }
+
+    if tamanho == "pequeno":
+        payload["parametros_financeiros"] = dict(parametros, anos=10)
+    else:
+        payload["retorno_investimento"] = _retorno_investimento(
+            investimento_kit + investimento_mao_de_obra, geracao_media, parametros
+        )
+
+    if tamanho == "grande":
+        payload["parametros_financeiros"] = parametros
+        payload["analise_sensibilidade"] = {
+            "inflacao_tarifa": {"tipo": "normal", "media": parametros["inflacao_tarifa"], "desvio": 0.02},
+            "degradacao_anual": {"tipo": "uniforme", "minimo": 0.003, "maximo": 0.008},
+            "variacao_geracao": {"tipo": "triangular", "minimo": 0.85, "moda": 1.0, "maximo": 1.05},
+            "cenarios": 10000,
+            "semente": semente
+        }
+
+    return payload
+
+
+def gerar_payloads(tamanho: str, quantidade: int, semente: int = 0) -> List[Dict[str, Any]]:
+    """Lista de payloads distintos (sementes consecutivas), ex.: para contornar caches"""
+    return [gerar_payload(tamanho, semente + i) for i in range(quantidade)]
+
+
+def _producao_mensal(rng: random.Random, geracao_media: float) -> List[Dict[str, Any]]:
+    meses = [
+        {"mes": mes, "geracao_total": round(geracao_media * fator * rng.uniform(0.97, 1.03))}
+        for mes, fator in enumerate(_SAZONALIDADE, start=1)
+    ]
+    media = round(sum(item["geracao_total"] for item in meses) / len(meses))
+    meses.append({"mes": "média", "geracao_total": media})
+    return meses
+
+
+def _retorno_investimento(
+    investimento: float,
+    geracao_media: float,
+    parametros: Dict[str, float]
+) -> List[Dict[str, Any]]:
+    """Série de 25 anos na convenção da API: saldo do ano 1 é o investimento negativo"""
+    linhas = []
+    saldo = -investimento
+    for ano in range(1, 26):
+        fator = ((1 - parametros["degradacao_anual"]) * (1 + parametros["inflacao_tarifa"])) ** (ano - 1)
+        custo_om = parametros["custo_om_anual"] * (1 + parametros["reajuste_om"]) ** (ano - 1)
+        economia_anual = max(0.0, geracao_media * 12 * parametros["tarifa_kwh"] * fator - custo_om)
+        linhas.append({
+            "ano": ano,
+            "saldo": round(saldo, 2),
+            "economia_mensal": round(economia_anual / 12, 2),
+            "economia_anual": round(economia_anual, 2)
+        })
+        saldo += economia_anual
+    return linhas